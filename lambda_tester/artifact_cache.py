@@ -0,0 +1,123 @@
+"""Content hashes of Lambda artifacts, cached between deploys.
+
+Lambda reports each function's `CodeSha256` (the base64 SHA-256 of the
+deployment package), so an unchanged JAR can be recognized without
+uploading it. `ArtifactCache` computes that hash by memory-mapping the JAR
+and feeding it to SHA-256 in 8 MB slices, so a large fat JAR is never read
+into the Python heap. It keeps the result keyed by path, size and mtime, so
+a JAR that hasn't been rebuilt isn't hashed again. It also remembers the hash
+last deployed to each function.
+
+The cache is a JSON file (`.deploy/artifacts.json` next to this script, or
+LAMBDA_TESTER_ARTIFACT_CACHE) written atomically by `save()`.
+
+    python3 artifact_cache.py --stage dev    # which JARs differ from what is deployed
+"""
+import base64
+import hashlib
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / '.deploy' / 'artifacts.json'
+HASH_SLICE_BYTES = 8 << 20
+
+
+def file_sha256(path: Path) -> str:
+    """Base64 SHA-256 of a file, as Lambda's CodeSha256, hashed through a read-only memory map."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, 'madvise'):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                with memoryview(mapped) as view:
+                    for offset in range(0, size, HASH_SLICE_BYTES):
+                        digest.update(view[offset:offset + HASH_SLICE_BYTES])
+    return base64.b64encode(digest.digest()).decode()
+
+
+class ArtifactCache:
+    """Thread-safe cache of artifact hashes and of the hash last deployed to each function."""
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or os.environ.get('LAMBDA_TESTER_ARTIFACT_CACHE') or DEFAULT_CACHE_PATH)
+        self._lock = threading.Lock()
+        self.hashed = 0
+        self.reused = 0
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self._hashes: Dict[str, Dict[str, Any]] = data.get('hashes', {})
+        self._deployed: Dict[str, str] = data.get('deployed', {})
+
+    def code_sha256(self, path: Path) -> str:
+        """The artifact's CodeSha256, recomputed only if its size or mtime changed since it was cached."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        key = str(path)
+        with self._lock:
+            entry = self._hashes.get(key)
+            if entry and entry['size'] == stat.st_size and entry['mtimeNs'] == stat.st_mtime_ns:
+                self.reused += 1
+                return entry['sha256']
+        sha256 = file_sha256(path)
+        with self._lock:
+            self._hashes[key] = {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns, 'sha256': sha256}
+            self.hashed += 1
+        return sha256
+
+    def deployed(self, full_function_name: str) -> Optional[str]:
+        """The CodeSha256 this cache last recorded as deployed to the function, if any."""
+        with self._lock:
+            return self._deployed.get(full_function_name)
+
+    def record_deploy(self, full_function_name: str, sha256: str):
+        with self._lock:
+            self._deployed[full_function_name] = sha256
+
+    def save(self):
+        """Write the cache atomically (a crash mid-write leaves the previous file intact)."""
+        with self._lock:
+            data = {'hashes': self._hashes, 'deployed': self._deployed}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        scratch = self.path.with_suffix('.tmp')
+        with open(scratch, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(scratch, self.path)
+
+
+if __name__ == '__main__':
+    import argparse
+    import lambda_tester
+    from deploy_lambdas import deploy_targets
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Compare local JAR hashes with the deployed CodeSha256')
+    parser.add_argument('--functions', help='Comma-separated function names (default: every function with a jarPath)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    args = parser.parse_args()
+
+    load_env()
+    stage = args.stage or os.environ.get('STAGE', 'dev')
+    cache = ArtifactCache()
+    for target in deploy_targets(args.functions.split(',') if args.functions else None):
+        full_function_name = f"{target['function']}-{stage}"
+        if not target['jarPath'].is_file():
+            print(f"{target['function']:<40} missing JAR")
+            continue
+        local_sha = cache.code_sha256(target['jarPath'])
+        deployed_sha = lambda_tester.get_lambda_client().get_function_configuration(
+            FunctionName=full_function_name).get('CodeSha256')
+        status = 'unchanged' if local_sha == deployed_sha else 'changed'
+        if cache.deployed(full_function_name) not in (None, deployed_sha):
+            status += ' (redeployed outside deploy_lambdas.py since the last run)'
+        print(f"{target['function']:<40} {status}")
+    cache.save()
+    print(f"Hashed {cache.hashed} JARs, reused {cache.reused} cached hashes")
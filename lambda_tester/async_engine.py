@@ -0,0 +1,190 @@
+"""asyncio invocation engine for the Lambda test chains.
+
+The thread engine parks a thread per in-flight chain for the whole chain.
+Here every test DAG is a set of tasks on a single event loop; only the boto3
+`invoke` calls themselves run on a bounded executor, and a global semaphore
+caps how many invocations are outstanding. Thousands of chains can be in
+flight while only `max_in_flight` threads block on the network.
+"""
+import asyncio
+import time
+import uuid
+import concurrent.futures
+from typing import List, Dict, Any, Callable
+
+from chain_dag import Step, DagState, load_steps, skipped_steps
+from lambda_tester import (
+    log,
+    invoke_lambda,
+    invoke_lambda_direct,
+    cleanup_test_data,
+    extract_user_id,
+    summarize_sink,
+)
+from result_sink import ResultSink
+
+
+class AsyncInvoker:
+    """Bridges the blocking invoke helpers onto an event loop with a global concurrency limit."""
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix='invoke')
+
+    async def invoke(self, function_name: str, test_case: dict, stage: str) -> dict:
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, invoke_lambda, function_name, test_case, stage)
+
+    async def invoke_direct(self, function_name: str, event: dict, stage: str) -> dict:
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, invoke_lambda_direct, function_name, event, stage)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+async def run_dag_async(invoker: AsyncInvoker, steps: List[Step], stage: str, variables: Dict[str, Any],
+                        on_result: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+    """Async counterpart of chain_dag.run_dag: each ready step becomes a task on the running loop."""
+    state = DagState(steps, variables)
+    results = []
+    running: Dict[asyncio.Task, tuple] = {}
+    while True:
+        for step in state.ready():
+            event = step.build_event(state.variables)
+            if step.invoke == 'direct':
+                task = asyncio.create_task(invoker.invoke_direct(step.function, event, stage))
+            else:
+                task = asyncio.create_task(invoker.invoke(step.function, event, stage))
+            running[task] = (step, event)
+        if not running:
+            break
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            step, event = running.pop(task)
+            result = task.result()
+            state.complete(step, event, result)
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+def run_tests_async(stage: str, retain_data: bool, table_name: str, max_in_flight: int = None,
+                    results_file: str = None) -> dict:
+    """Run the full test pass on the asyncio engine. Same report shape as run_tests."""
+    test_email = f"{uuid.uuid4()}@email.com"
+    log(f"Starting all tests in stage: {stage} (async engine)")
+    log(f"Using test email: {test_email}")
+
+    steps = load_steps()
+    invoked = []
+    user_ids = []
+
+    def on_result(result):
+        sink.write(result)
+        invoked.append(result['function'])
+        user_id = extract_user_id([result])
+        if user_id:
+            user_ids.append(user_id)
+
+    async def main():
+        invoker = AsyncInvoker(max_in_flight or DEFAULT_MAX_IN_FLIGHT)
+        try:
+            await run_dag_async(invoker, steps, stage, {'email': test_email}, on_result=on_result)
+        finally:
+            invoker.close()
+
+    with ResultSink(results_file) as sink:
+        try:
+            log(f"Starting test DAG ({len(steps)} steps)...")
+            asyncio.run(main())
+            for name in skipped_steps(steps, invoked):
+                log(f"Skipped test: {name} (dependencies did not pass)")
+            log("Completed test DAG")
+        finally:
+            if user_ids and not retain_data:
+                try:
+                    cleanup_test_data(table_name, user_ids[0])
+                except Exception as e:
+                    log(f"Warning: Failed to clean up test data: {str(e)}")
+
+    return summarize_sink(sink)
+
+
+def drive_load(stats, steps: List[Step], stage: str, rate: float, concurrency: int,
+               should_start: Callable[[int], bool], max_in_flight: int):
+    """Run load_generator's chains (one DAG of `steps` per user) on one event loop until `should_start` says stop.
+
+    `stats` is a load_generator.LoadStats. With `rate` set, chains start
+    open-loop on a fixed schedule with at most `concurrency` chains alive;
+    otherwise `concurrency` worker coroutines run chains back to back.
+    """
+
+    async def run_chain(invoker: AsyncInvoker, scheduled: float = None):
+        chain = stats.chain_started(scheduled)
+        try:
+            stats.record_chain(await run_dag_async(invoker, steps, stage, {'email': f"{uuid.uuid4()}@email.com"},
+                                                   on_result=lambda result: stats.record_result(result, chain)),
+                               scheduled)
+        except Exception as e:
+            log(f"User chain error: {str(e)}")
+            stats.record_chain_error(scheduled)
+
+    async def open_loop(invoker: AsyncInvoker):
+        chain_slots = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        async def bounded_chain(scheduled: float):
+            try:
+                await run_chain(invoker, scheduled)
+            finally:
+                chain_slots.release()
+
+        start = time.monotonic()
+        started = 0
+        while True:
+            scheduled = start + started / rate
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not should_start(started):
+                break
+            await chain_slots.acquire()
+            task = asyncio.create_task(bounded_chain(scheduled))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            started += 1
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def closed_loop(invoker: AsyncInvoker):
+        started = 0
+
+        async def worker():
+            nonlocal started
+            # No await between the check and the increment, so this is race-free on one loop
+            while should_start(started):
+                started += 1
+                await run_chain(invoker)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def main():
+        invoker = AsyncInvoker(max_in_flight)
+        try:
+            if rate:
+                await open_loop(invoker)
+            else:
+                await closed_loop(invoker)
+        finally:
+            invoker.close()
+
+    asyncio.run(main())
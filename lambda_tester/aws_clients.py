@@ -0,0 +1,111 @@
+"""Lazily created, cached boto3 clients.
+
+Nothing here touches boto3 until the first client is requested, so importing
+the tester (or running it against the local backend) doesn't pay for session
+and client construction.
+
+Low-level clients are thread-safe and are shared by all threads, so their
+connection pool is the one every in-flight invocation draws from; size it to
+the run's concurrency with `configure(max_pool_connections=...)` or the
+extra workers just queue on botocore's default pool of 10. Resources and
+sessions are not thread-safe, so each thread gets its own resource, reused
+across calls on that thread; `resource_client` shares one resource's
+(thread-safe) client for hot paths.
+
+Clients keep botocore's retries, except `client(service, retries=False)`,
+a separate cached client for callers that retry and count failures
+themselves (the tester's Invoke calls, see invoke_with_throttle_retry).
+"""
+import os
+import threading
+from typing import Dict, Any
+
+DEFAULT_REGION = 'us-west-2'
+DEFAULT_MAX_POOL_CONNECTIONS = 10
+
+
+def default_profile() -> str:
+    return os.environ.get('AWS_PROFILE') or (
+        os.environ.get('SSO_PROFILE') if os.environ.get('USE_SSO') == 'true'
+        else os.environ.get('LOCAL_PROFILE')
+    )
+
+
+class ClientFactory:
+    """Creates boto3 clients and resources on first use and caches them.
+
+    `region` and `profile` default to AWS_REGION and the profile variables
+    from .env, read when the first client is created (after `load_env()`).
+    """
+
+    def __init__(self, region: str = None, profile: str = None,
+                 max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS):
+        self._region = region
+        self._profile = profile
+        self.max_pool_connections = max_pool_connections
+        self._lock = threading.Lock()
+        self._session = None
+        self._clients: Dict[str, Any] = {}
+        self._local = threading.local()
+
+    @property
+    def region(self) -> str:
+        return self._region or os.environ.get('AWS_REGION', DEFAULT_REGION)
+
+    def _config(self, retries: bool = True):
+        from botocore.config import Config
+        if not retries:
+            return Config(max_pool_connections=self.max_pool_connections, retries={'total_max_attempts': 1})
+        return Config(max_pool_connections=self.max_pool_connections)
+
+    def configure(self, max_pool_connections: int):
+        """Grow the connection pool; clients created before the change are replaced on next use."""
+        with self._lock:
+            if max_pool_connections > self.max_pool_connections:
+                self.max_pool_connections = max_pool_connections
+                self._clients = {}
+                self._local = threading.local()
+
+    def _shared_session(self):
+        # Callers hold self._lock
+        if self._session is None:
+            import boto3
+            self._session = boto3.Session(profile_name=self._profile or default_profile(), region_name=self.region)
+        return self._session
+
+    def client(self, service: str, retries: bool = True):
+        key = service if retries else f"{service}:no-retries"
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._shared_session().client(service, config=self._config(retries))
+            return self._clients[key]
+
+    def new_client(self, service: str, **config):
+        """An uncached client whose botocore Config is overridden by `config` (e.g. a longer read_timeout)."""
+        from botocore.config import Config
+        with self._lock:
+            return self._shared_session().client(service, config=self._config().merge(Config(**config)))
+
+    def resource_client(self, service: str):
+        """Shared low-level client that applies the resource layer's type conversions (e.g. plain
+        Python values for DynamoDB items), for hot paths that shouldn't build a resource per thread."""
+        key = f"{service}:resource"
+        with self._lock:
+            client = self._clients.get(key)
+        if client is None:
+            client = self.resource(service).meta.client
+            with self._lock:
+                client = self._clients.setdefault(key, client)
+        return client
+
+    def resource(self, service: str):
+        local = self._local
+        resources = getattr(local, 'resources', None)
+        if resources is None:
+            resources = local.resources = {}
+        if service not in resources:
+            import boto3
+            # boto3.Session isn't thread-safe either, so each thread builds its resource from its own
+            session = boto3.Session(profile_name=self._profile or default_profile(), region_name=self.region)
+            resources[service] = session.resource(service, config=self._config())
+        return resources[service]
@@ -0,0 +1,122 @@
+"""Where the tester's Lambda, DynamoDB and EventBridge calls go.
+
+- `aws` (default): real AWS through boto3, using the profile and region from
+  the environment / .env. Clients are created on first use (aws_clients.py).
+- `local`: the in-process stand-ins from local_aws.py, with the Python
+  emulations of the service Lambdas from local_lambdas.py registered and the
+  goal event bus rules wired up, so the whole harness runs offline.
+
+Select one with `--backend`, the `backend` key of the handler event, or the
+LAMBDA_TESTER_BACKEND environment variable.
+"""
+import os
+import threading
+from typing import Optional
+
+BACKENDS = ('aws', 'local')
+
+
+class AwsBackend:
+    name = 'aws'
+
+    def __init__(self, region: str = None):
+        from aws_clients import ClientFactory
+        self.clients = ClientFactory(region=region)
+
+    def configure(self, max_pool_connections: int):
+        self.clients.configure(max_pool_connections=max_pool_connections)
+
+    def use_table(self, table_name: str):
+        """Deployed functions read their table from the stack, so there is nothing to point at it."""
+
+    def lambda_client(self):
+        return self.clients.client('lambda')
+
+    def invoke_client(self):
+        """Lambda client without botocore retries, for Invoke calls the tester retries and counts itself."""
+        return self.clients.client('lambda', retries=False)
+
+    def dynamodb(self):
+        return self.clients.resource('dynamodb')
+
+    def dynamodb_client(self):
+        return self.clients.resource_client('dynamodb')
+
+    def events_client(self):
+        return self.clients.client('events')
+
+
+class LocalBackend:
+    name = 'local'
+
+    def __init__(self, init_duration_ms: float = 0.0):
+        from local_aws import LocalLambdaService, LocalDynamoDB, LocalEventBus
+        from local_lambdas import build_handlers, GOAL_CREATION_REQUEST_EVENT_DETAIL_TYPE, \
+            GOAL_PROGRESS_UPDATE_EVENT_DETAIL_TYPE
+
+        self.lambda_service = LocalLambdaService(init_duration_ms=init_duration_ms)
+        self.database = LocalDynamoDB()
+        self.event_bus = LocalEventBus(self.lambda_service)
+        for name, function in build_handlers(self.database, self.event_bus).items():
+            self.lambda_service.register(name, function)
+        self.event_bus.add_rule(GOAL_CREATION_REQUEST_EVENT_DETAIL_TYPE, 'CreateGoalFromGoalCreationRequestEvent')
+        self.event_bus.add_rule(GOAL_PROGRESS_UPDATE_EVENT_DETAIL_TYPE, 'GoalProgressCreator')
+
+    def configure(self, max_pool_connections: int):
+        pass
+
+    def use_table(self, table_name: str):
+        """Point the local functions at `table_name`, as the stack sets DYNAMODB_TABLE on the real ones."""
+        if table_name:
+            self.lambda_service.set_environment('DYNAMODB_TABLE', table_name)
+
+    def lambda_client(self):
+        return self.lambda_service
+
+    def invoke_client(self):
+        return self.lambda_service
+
+    def dynamodb(self):
+        return self.database
+
+    def dynamodb_client(self):
+        return self.database.meta.client
+
+    def events_client(self):
+        return self.event_bus
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the active backend, creating the one named by LAMBDA_TESTER_BACKEND on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _create(os.environ.get('LAMBDA_TESTER_BACKEND', 'aws'))
+        return _backend
+
+
+def set_backend(backend) -> Optional[object]:
+    """Install a backend object; returns the previous one."""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+        return previous
+
+
+def use_backend(name: str):
+    """Switch to a fresh backend by name ('aws' or 'local') and return it."""
+    backend = _create(name)
+    set_backend(backend)
+    return backend
+
+
+def _create(name: str):
+    if name == 'aws':
+        return AwsBackend()
+    if name == 'local':
+        return LocalBackend()
+    raise ValueError(f"Unknown backend: {name} (expected one of {', '.join(BACKENDS)})")
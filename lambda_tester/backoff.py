@@ -0,0 +1,33 @@
+"""Retry delays and throttle / unsent-request error detection shared by the tester's AWS callers."""
+import random
+
+# Error codes AWS uses when a call was rejected for exceeding a rate or concurrency limit
+THROTTLE_ERRORS = (
+    'TooManyRequestsException',
+    'ThrottlingException',
+    'Throttling',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+)
+
+# botocore exception types raised before the request was sent, so a retry can't run a call twice
+UNSENT_ERRORS = (
+    'EndpointConnectionError',
+    'ConnectTimeoutError',
+)
+
+
+def jittered_backoff(attempt: int, base: float = 0.05, cap: float = 5.0) -> float:
+    """Full-jitter exponential backoff: a random delay in [0, min(cap, base * 2**attempt)] seconds."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def is_throttle(error: Exception) -> bool:
+    """True for a botocore ClientError whose code is a throttling error (no botocore import needed)."""
+    response = getattr(error, 'response', None)
+    return isinstance(response, dict) and response.get('Error', {}).get('Code') in THROTTLE_ERRORS
+
+
+def is_unsent(error: Exception) -> bool:
+    """True for a connection failure raised before the request went out (safe to retry a non-idempotent call)."""
+    return type(error).__name__ in UNSENT_ERRORS
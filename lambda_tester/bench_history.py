@@ -0,0 +1,312 @@
+"""Benchmark history keyed by deployed code version and stage, and a regression gate over it.
+
+Runs saved with `lambda_tester.py --history` or `cold_start.py --history` go
+into a SQLite file (`.bench/history.sqlite` next to this script, or
+LAMBDA_TESTER_HISTORY): the run's report plus, per function, the lossless
+latency histograms from metrics.py and scalar metrics such as throughput.
+
+The JARs are built in the service repositories, not this one, so a run is
+keyed by the code actually deployed: a short hash of every config.json
+function's `CodeSha256` on the stage. BENCH_LABEL overrides it with an
+explicit label (a release tag, say).
+
+`compare` tests each function's candidate latencies against a baseline's
+with a one-sided Mann-Whitney U test, computed directly on the histograms
+(ranks only need bucket order; ties within a bucket get midranks and the
+tie-corrected variance). A function regresses when the shift is
+significant (p < `--alpha`) and its median also got at least
+`--min-change` slower, so huge samples don't flag trivial differences.
+Several runs for the same version are pooled. The command exits with status 1
+on any regression (but not when there is no baseline yet), so a deploy
+script can gate on it:
+
+    ./updateAllDevLambdas.sh && python3 lambda_tester.py --table-name GoalTracker-dev --load --users 500 --history \\
+        && python3 bench_history.py compare --stage dev --kind load
+"""
+import datetime
+import hashlib
+import json
+import math
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Dict, Any, Tuple
+
+import lambda_tester
+from chain_dag import load_lambda_configs
+from metrics import LatencyHistogram
+
+DEFAULT_HISTORY_PATH = Path(__file__).parent / '.bench' / 'history.sqlite'
+KINDS = ('tests', 'load', 'cold-start')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sha TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    created TEXT NOT NULL,
+    report TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_stage ON runs (stage, kind, sha);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    function TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    histogram TEXT,
+    PRIMARY KEY (run_id, function, metric)
+);
+"""
+
+
+def deployed_code(stage: str) -> Dict[str, str]:
+    """CodeSha256 of every config.json function deployed to `stage`."""
+    lambda_client = lambda_tester.get_lambda_client()
+    code = {}
+    for config in load_lambda_configs():
+        try:
+            code[config['name']] = lambda_client.get_function_configuration(
+                FunctionName=f"{config['name']}-{stage}")['CodeSha256']
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') != 'ResourceNotFoundException':
+                raise
+    return code
+
+
+def code_version(stage: str) -> str:
+    """The version runs on `stage` are keyed by: BENCH_LABEL, else a short hash of the deployed code."""
+    if os.environ.get('BENCH_LABEL'):
+        return os.environ['BENCH_LABEL']
+    code = deployed_code(stage)
+    if not code:
+        raise ValueError(f"No config.json functions are deployed to stage {stage}; set BENCH_LABEL to label the run")
+    return hashlib.sha256(json.dumps(code, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class HistoryStore:
+    """The SQLite history file. Use as a context manager or call close()."""
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or os.environ.get('LAMBDA_TESTER_HISTORY') or DEFAULT_HISTORY_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(SCHEMA)
+
+    def save_run(self, sha: str, stage: str, kind: str, report: Dict[str, Any],
+                 histograms: Dict[str, Dict[str, LatencyHistogram]],
+                 scalars: Dict[str, Dict[str, float]] = None) -> int:
+        """Store one run: `histograms` and `scalars` map function -> metric -> value. Returns the run id."""
+        with self._db:
+            run_id = self._db.execute(
+                'INSERT INTO runs (sha, stage, kind, created, report) VALUES (?, ?, ?, ?, ?)',
+                (sha, stage, kind, datetime.datetime.now().isoformat(timespec='seconds'), json.dumps(report))
+            ).lastrowid
+            rows = [(run_id, function, metric, None, json.dumps(histogram.to_dict()))
+                    for function, metrics in histograms.items() for metric, histogram in metrics.items()]
+            rows += [(run_id, function, metric, value, None)
+                     for function, metrics in (scalars or {}).items() for metric, value in metrics.items()]
+            self._db.executemany('INSERT INTO metrics (run_id, function, metric, value, histogram) '
+                                 'VALUES (?, ?, ?, ?, ?)', rows)
+        return run_id
+
+    def runs(self, stage: str = None, kind: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent runs first."""
+        query = 'SELECT id, sha, stage, kind, created FROM runs WHERE 1 = 1'
+        params = []
+        if stage:
+            query += ' AND stage = ?'
+            params.append(stage)
+        if kind:
+            query += ' AND kind = ?'
+            params.append(kind)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        return [dict(zip(('id', 'sha', 'stage', 'kind', 'created'), row))
+                for row in self._db.execute(query, params)]
+
+    def latest_sha(self, stage: str, kind: str, exclude: str = None) -> str:
+        """Version (the `sha` column) of the most recent run for stage/kind, skipping `exclude` (e.g. the candidate)."""
+        row = self._db.execute('SELECT sha FROM runs WHERE stage = ? AND kind = ? AND sha != ? '
+                               'ORDER BY id DESC LIMIT 1', (stage, kind, exclude or '')).fetchone()
+        return row[0] if row else None
+
+    def histograms(self, sha: str, stage: str, kind: str) -> Dict[Tuple[str, str], LatencyHistogram]:
+        """(function, metric) -> histogram pooled over every run of version `sha` on stage/kind."""
+        pooled: Dict[Tuple[str, str], LatencyHistogram] = {}
+        rows = self._db.execute(
+            'SELECT m.function, m.metric, m.histogram FROM metrics m JOIN runs r ON r.id = m.run_id '
+            'WHERE r.sha = ? AND r.stage = ? AND r.kind = ? AND m.histogram IS NOT NULL', (sha, stage, kind))
+        for function, metric, histogram in rows:
+            key = (function, metric)
+            if key not in pooled:
+                pooled[key] = LatencyHistogram()
+            pooled[key].merge(LatencyHistogram.from_dict(json.loads(histogram)))
+        return pooled
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def histograms_from_results(paths: Iterable[str]) -> Dict[str, Dict[str, LatencyHistogram]]:
+    """Per-function latencyMs histograms from ResultSink JSON-lines files."""
+    histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                if result.get('latencyMs') is None:
+                    continue
+                metrics = histograms.setdefault(result['function'], {'latencyMs': LatencyHistogram()})
+                metrics['latencyMs'].record(result['latencyMs'])
+    return histograms
+
+
+def save_tester_run(report: Dict[str, Any], results_paths: List[str], kind: str, stage: str,
+                    sha: str = None, path: str = None) -> int:
+    """Save a run_tests / run_load report, with latency histograms rebuilt from its results files."""
+    scalars = {name: {'throughput': function['throughput']}
+               for name, function in report.get('functions', {}).items() if 'throughput' in function}
+    with HistoryStore(path) as store:
+        return store.save_run(sha or code_version(stage), stage, kind, report, histograms_from_results(results_paths), scalars)
+
+
+def mann_whitney(baseline: LatencyHistogram, candidate: LatencyHistogram) -> Dict[str, float]:
+    """One-sided Mann-Whitney U test that `candidate` tends to be larger (slower) than `baseline`.
+
+    Returns U for the candidate, the normal-approximation p-value (with tie
+    and continuity corrections) and P(candidate > baseline) + P(tie) / 2.
+    """
+    n_base, n_cand = baseline.count, candidate.count
+    n = n_base + n_cand
+    rank_sum = 0.0
+    tie_term = 0
+    seen = 0
+    for index in sorted(set(baseline.counts) | set(candidate.counts)):
+        base, cand = baseline.counts.get(index, 0), candidate.counts.get(index, 0)
+        tied = base + cand
+        rank_sum += cand * (seen + (tied + 1) / 2)
+        tie_term += tied ** 3 - tied
+        seen += tied
+    u = rank_sum - n_cand * (n_cand + 1) / 2
+    mean = n_base * n_cand / 2
+    variance = n_base * n_cand / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if variance <= 0:
+        p_value = 1.0
+    else:
+        z = (u - mean - 0.5) / math.sqrt(variance)
+        p_value = 0.5 * math.erfc(z / math.sqrt(2))
+    return {
+        'u': u,
+        'pValue': p_value,
+        'probSlower': u / (n_base * n_cand) if n_base and n_cand else 0.5
+    }
+
+
+def compare_runs(store: HistoryStore, stage: str, kind: str, candidate_sha: str, baseline_sha: str = None,
+                 alpha: float = 0.01, min_change: float = 0.05, min_samples: int = 10) -> Dict[str, Any]:
+    """Test every (function, metric) both versions have for a latency regression.
+
+    The baseline defaults to the latest other version. Without one (the first
+    deployed version, say) the result has `baseline` None and no comparisons.
+    """
+    candidate = store.histograms(candidate_sha, stage, kind)
+    if not candidate:
+        raise ValueError(f"No runs for {candidate_sha} on stage {stage} ({kind})")
+    baseline_sha = baseline_sha or store.latest_sha(stage, kind, exclude=candidate_sha)
+    result = {
+        'stage': stage,
+        'kind': kind,
+        'baseline': baseline_sha,
+        'candidate': candidate_sha,
+        'regressions': [],
+        'comparisons': []
+    }
+    if not baseline_sha:
+        return result
+    baseline = store.histograms(baseline_sha, stage, kind)
+
+    comparisons = []
+    for key in sorted(baseline.keys() & candidate.keys()):
+        base, cand = baseline[key], candidate[key]
+        base_p50, cand_p50 = base.percentile(50), cand.percentile(50)
+        change = (cand_p50 - base_p50) / base_p50 if base_p50 else 0.0
+        comparison = {
+            'function': key[0],
+            'metric': key[1],
+            'samples': [base.count, cand.count],
+            'p50Ms': [round(base_p50, 3), round(cand_p50, 3)],
+            'p99Ms': [round(base.percentile(99), 3), round(cand.percentile(99), 3)],
+            'p50Change': round(change, 4)
+        }
+        if base.count < min_samples or cand.count < min_samples:
+            comparison['verdict'] = 'too few samples'
+        else:
+            test = mann_whitney(base, cand)
+            comparison['pValue'] = round(test['pValue'], 6)
+            comparison['probSlower'] = round(test['probSlower'], 4)
+            comparison['verdict'] = 'regression' if test['pValue'] < alpha and change >= min_change else 'ok'
+        comparisons.append(comparison)
+    result['regressions'] = [c for c in comparisons if c['verdict'] == 'regression']
+    result['comparisons'] = comparisons
+    return result
+
+
+def format_comparison(result: Dict[str, Any]) -> str:
+    if not result['baseline']:
+        return (f"{result['kind']} on {result['stage']}: no baseline runs other than {result['candidate']}, "
+                f"nothing to compare")
+    header = f"{'Function':<40} {'Metric':<26} {'Base p50':>9} {'Cand p50':>9} {'Change':>8} {'p-value':>9}  Verdict"
+    lines = [f"{result['kind']} on {result['stage']}: {result['baseline']} (baseline) vs {result['candidate']}",
+             header, '-' * len(header)]
+    for c in result['comparisons']:
+        p_value = f"{c['pValue']:.2g}" if 'pValue' in c else '-'
+        lines.append(f"{c['function']:<40} {c['metric']:<26} {c['p50Ms'][0]:>9.1f} {c['p50Ms'][1]:>9.1f} "
+                     f"{c['p50Change']:>+8.1%} {p_value:>9}  {c['verdict']}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description='Benchmark history and regression gate')
+    parser.add_argument('--history', help='History file (defaults to LAMBDA_TESTER_HISTORY, else .bench/history.sqlite)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help='List recent runs')
+    list_parser.add_argument('--stage', help='Only runs on this stage')
+    list_parser.add_argument('--kind', choices=KINDS, help='Only runs of this kind')
+    list_parser.add_argument('--limit', type=int, default=20, help='Number of runs (default: 20)')
+
+    compare_parser = subparsers.add_parser('compare', help='Flag latency regressions against a baseline (exit 1 if any)')
+    compare_parser.add_argument('--stage', default=os.environ.get('STAGE', 'dev'), help='Stage (defaults to STAGE, else dev)')
+    compare_parser.add_argument('--kind', choices=KINDS, default='load', help='Kind of run to compare (default: load)')
+    compare_parser.add_argument('--candidate',
+                                help='Candidate version (default: BENCH_LABEL, else the code deployed to the stage)')
+    compare_parser.add_argument('--baseline', help='Baseline version (default: the latest other version with runs)')
+    compare_parser.add_argument('--alpha', type=float, default=0.01, help='Significance level (default: 0.01)')
+    compare_parser.add_argument('--min-change', type=float, default=0.05,
+                                help='Smallest p50 slowdown that counts as a regression (default: 0.05 = 5%%)')
+    compare_parser.add_argument('--json', action='store_true', help='Print JSON instead of the table')
+    args = parser.parse_args()
+
+    lambda_tester.load_env()
+    with HistoryStore(args.history) as store:
+        if args.command == 'list':
+            for run in store.runs(stage=args.stage, kind=args.kind, limit=args.limit):
+                print(f"{run['id']:>5}  {run['created']}  {run['sha']:<12} {run['stage']:<8} {run['kind']}")
+            sys.exit(0)
+        result = compare_runs(store, args.stage, args.kind, args.candidate or code_version(args.stage), args.baseline,
+                              alpha=args.alpha, min_change=args.min_change)
+    print(json.dumps(result, indent=2) if args.json else format_comparison(result))
+    sys.exit(1 if result['regressions'] else 0)
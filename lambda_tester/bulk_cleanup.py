@@ -0,0 +1,188 @@
+"""Bulk deletion of tester-created data from the GoalTracker table.
+
+Every item a test user owns lives in the `USER#<id>` partition. For each
+user the partition is read with a paginated, key-only Query, and the keys
+are deleted with BatchWriteItem in chunks of 25, fanned out across a worker
+pool. Unprocessed items and throttled requests are retried with jittered
+backoff. `batch_put` is the write-side counterpart the benchmarks use to
+seed data.
+
+Load runs record the users they create under a run ID (see
+`record_run_users`), so a retained run can be cleaned up later. Manifests go
+to `.runs/` next to this script, LAMBDA_TESTER_RUNS_DIR, or inside Lambda
+(where only /tmp is writable) `/tmp/lambda-tester-runs`:
+
+    python3 bulk_cleanup.py --table-name GoalTracker-dev --run-id 20241018-1234-ab12cd
+"""
+import os
+import threading
+import time
+import concurrent.futures
+from pathlib import Path
+from typing import List, Dict, Any
+
+import lambda_tester
+from backoff import jittered_backoff, is_throttle
+from lambda_tester import log
+
+BATCH_WRITE_LIMIT = 25
+MAX_ATTEMPTS = 8
+if os.environ.get('LAMBDA_TESTER_RUNS_DIR'):
+    RUNS_DIR = Path(os.environ['LAMBDA_TESTER_RUNS_DIR'])
+elif os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+    RUNS_DIR = Path('/tmp/lambda-tester-runs')
+else:
+    RUNS_DIR = Path(__file__).parent / '.runs'
+
+
+def record_run_users(run_id: str, user_ids: List[str]) -> Path:
+    """Append user IDs to the run's manifest so the run can be cleaned up later."""
+    RUNS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RUNS_DIR / f"{run_id}.txt"
+    with open(path, 'a') as f:
+        for user_id in user_ids:
+            f.write(f"{user_id}\n")
+    return path
+
+
+def load_run_users(run_id: str) -> List[str]:
+    path = RUNS_DIR / f"{run_id}.txt"
+    if not path.exists():
+        raise ValueError(f"No user manifest for run {run_id} at {path}")
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class RetryCounter:
+    """Thread-safe tally of throttled calls and unprocessed batches that were retried."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.unprocessed = 0
+
+    def add(self, throttled: int = 0, unprocessed: int = 0):
+        with self._lock:
+            self.throttled += throttled
+            self.unprocessed += unprocessed
+
+
+def _call_with_retry(operation, retries: RetryCounter = None, **kwargs) -> Dict[str, Any]:
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return operation(**kwargs)
+        except Exception as e:
+            if not is_throttle(e) or attempt == MAX_ATTEMPTS - 1:
+                raise
+            if retries:
+                retries.add(throttled=1)
+            time.sleep(jittered_backoff(attempt))
+
+
+def query_user_keys(table_name: str, user_id: str, retries: RetryCounter = None) -> List[Dict[str, str]]:
+    """Return the pk/sk of every item in the user's partition, following LastEvaluatedKey."""
+    client = lambda_tester.get_dynamodb_client()
+    keys = []
+    query = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'pk = :pk',
+        'ExpressionAttributeValues': {':pk': f"USER#{user_id}"},
+        'ProjectionExpression': 'pk, sk',
+    }
+    while True:
+        response = _call_with_retry(client.query, retries, **query)
+        keys.extend({'pk': item['pk'], 'sk': item['sk']} for item in response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return keys
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _batch_write(table_name: str, requests: List[Dict[str, Any]], retries: RetryCounter, kind: str) -> int:
+    client = lambda_tester.get_dynamodb_client()
+    count = len(requests)
+    for attempt in range(MAX_ATTEMPTS):
+        response = _call_with_retry(client.batch_write_item, retries, RequestItems={table_name: requests})
+        requests = response.get('UnprocessedItems', {}).get(table_name, [])
+        if not requests:
+            return count
+        if retries:
+            retries.add(unprocessed=1)
+        time.sleep(jittered_backoff(attempt))
+    raise RuntimeError(f"{len(requests)} {kind} still unprocessed after {MAX_ATTEMPTS} attempts")
+
+
+def batch_delete(table_name: str, keys: List[Dict[str, str]], retries: RetryCounter = None) -> int:
+    """Delete up to 25 keys with BatchWriteItem, retrying unprocessed items. Returns the number deleted."""
+    return _batch_write(table_name, [{'DeleteRequest': {'Key': key}} for key in keys], retries, 'deletes')
+
+
+def batch_put(table_name: str, items: List[Dict[str, Any]], retries: RetryCounter = None) -> int:
+    """Write up to 25 items with BatchWriteItem, retrying unprocessed items. Returns the number written."""
+    return _batch_write(table_name, [{'PutRequest': {'Item': item}} for item in items], retries, 'puts')
+
+
+def cleanup_users(table_name: str, user_ids: List[str], max_workers: int = 16) -> Dict[str, Any]:
+    """Delete every item belonging to the given users, in parallel. Returns counts and any failures."""
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided")
+
+    start = time.monotonic()
+    items_deleted = 0
+    failures: Dict[str, str] = {}
+    retries = RetryCounter()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        queries = {executor.submit(query_user_keys, table_name, user_id, retries): user_id for user_id in user_ids}
+        deletes = {}
+        for future in concurrent.futures.as_completed(queries):
+            user_id = queries[future]
+            try:
+                keys = future.result()
+            except Exception as e:
+                failures[user_id] = str(e)
+                continue
+            for i in range(0, len(keys), BATCH_WRITE_LIMIT):
+                deletes[executor.submit(batch_delete, table_name, keys[i:i + BATCH_WRITE_LIMIT], retries)] = user_id
+
+        for future in concurrent.futures.as_completed(deletes):
+            try:
+                items_deleted += future.result()
+            except Exception as e:
+                failures[deletes[future]] = str(e)
+
+    elapsed = time.monotonic() - start
+    log(f"Cleaned up {items_deleted} items for {len(user_ids) - len(failures)}/{len(user_ids)} users in {elapsed:.1f}s")
+    return {
+        'users': len(user_ids),
+        'itemsDeleted': items_deleted,
+        'failedUsers': failures,
+        'throttledRetries': retries.throttled,
+        'unprocessedRetries': retries.unprocessed,
+        'durationSeconds': round(elapsed, 3)
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Delete tester-created users from the GoalTracker table')
+    parser.add_argument('--table-name', required=True, help='DynamoDB table name (required)')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--run-id', help='Clean up every user recorded for this load run')
+    source.add_argument('--user-ids', help='Comma-separated user IDs')
+    source.add_argument('--user-ids-file', help='File with one user ID per line')
+    parser.add_argument('--workers', type=int, default=16, help='Parallel query/delete workers (default: 16)')
+    args = parser.parse_args()
+
+    load_env()
+    if args.run_id:
+        user_ids = load_run_users(args.run_id)
+    elif args.user_ids:
+        user_ids = args.user_ids.split(',')
+    else:
+        with open(args.user_ids_file) as f:
+            user_ids = [line.strip() for line in f if line.strip()]
+
+    print(json.dumps(cleanup_users(args.table_name, user_ids, max_workers=args.workers), indent=2))
@@ -0,0 +1,245 @@
+"""Declarative test-chain DAG and dependency-aware scheduler.
+
+Each Lambda in config.json may carry a `test` block describing how the
+tester exercises it:
+
+    "test": {
+        "chain": "user",                      # group used to select subsets (e.g. for load runs)
+        "invoke": "api",                      # "api" (API Gateway event) or "direct" (raw event)
+        "needs": ["GetUser"],                 # steps that must PASS first (side-effect ordering)
+        "event": {"pathParameters": {"userId": "${userId}"}},
+        "outputs": {"userId": "body.userId"}  # variables published to later steps
+    }
+
+`${name}` placeholders in the event are the step's inputs. A step runs as
+soon as every step in `needs` has passed and every input has been published,
+either as a seed variable (e.g. `email`) or as an output of another step, so
+independent steps overlap and the run takes as long as its critical path.
+Steps whose dependencies fail are skipped, not invoked.
+"""
+import copy
+import json
+import os
+import re
+import concurrent.futures
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Iterable, Set
+
+PLACEHOLDER = re.compile(r'\$\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+
+def find_config_path() -> Path:
+    """Locate config.json: LAMBDA_TESTER_CONFIG, then next to the tester, then the repo root."""
+    if os.environ.get('LAMBDA_TESTER_CONFIG'):
+        return Path(os.environ['LAMBDA_TESTER_CONFIG'])
+    local_path = Path(__file__).parent / 'config.json'
+    if local_path.exists():
+        return local_path
+    return Path(__file__).parent.parent / 'config.json'
+
+
+def load_lambda_configs(config_path: Path = None) -> List[Dict[str, Any]]:
+    """Return the `lambda` blocks of every stack in config.json that defines one."""
+    with open(config_path or find_config_path()) as f:
+        config = json.load(f)
+    return [stack['lambda'] for stack in config['stacks'].values() if 'lambda' in stack]
+
+
+class Step:
+    """One Lambda invocation in the test DAG."""
+
+    def __init__(self, function: str, test: Dict[str, Any]):
+        self.function = function
+        self.chain = test.get('chain', 'default')
+        self.invoke = test.get('invoke', 'api')
+        self.needs: List[str] = list(test.get('needs', []))
+        self.event: Dict[str, Any] = test['event']
+        self.outputs: Dict[str, str] = dict(test.get('outputs', {}))
+        self.inputs: Set[str] = set(PLACEHOLDER.findall(json.dumps(self.event)))
+
+        if self.invoke not in ('api', 'direct'):
+            raise ValueError(f"{function}: invoke must be 'api' or 'direct', got {self.invoke!r}")
+
+    def build_event(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Substitute variables into the event template. API `body` objects are JSON-encoded."""
+        event = _substitute(copy.deepcopy(self.event), variables)
+        if self.invoke == 'api' and isinstance(event.get('body'), (dict, list)):
+            event['body'] = json.dumps(event['body'])
+        return event
+
+    def extract_outputs(self, event: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Pull this step's outputs from the request it sent or the response it got back."""
+        values = {}
+        for name, path in self.outputs.items():
+            value = _extract(path, event, result)
+            if value is not None:
+                values[name] = value
+        return values
+
+    def __repr__(self):
+        return f"Step({self.function!r})"
+
+
+def _substitute(value: Any, variables: Dict[str, Any]) -> Any:
+    if isinstance(value, dict):
+        return {key: _substitute(item, variables) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, variables) for item in value]
+    if isinstance(value, str):
+        match = PLACEHOLDER.fullmatch(value)
+        if match:
+            # A bare placeholder keeps the variable's type (e.g. numbers stay numbers)
+            return variables[match.group(1)]
+        return PLACEHOLDER.sub(lambda m: str(variables[m.group(1)]), value)
+    return value
+
+
+def _extract(path: str, event: Dict[str, Any], result: Dict[str, Any]) -> Any:
+    root, _, rest = path.partition('.')
+    if root == 'request':
+        value = event
+    elif root == 'response':
+        value = result.get('response')
+    elif root == 'body':
+        body = (result.get('response') or {}).get('body')
+        value = json.loads(body) if isinstance(body, str) else body
+    else:
+        raise ValueError(f"Output path must start with request., response. or body.: {path}")
+
+    for key in rest.split('.') if rest else []:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def load_steps(config_path: Path = None, chains: List[str] = None) -> List[Step]:
+    """Build the test DAG from config.json, optionally restricted to some chains."""
+    steps = [Step(config['name'], config['test'])
+             for config in load_lambda_configs(config_path) if 'test' in config]
+    if chains is not None:
+        steps = [step for step in steps if step.chain in chains]
+    validate_steps(steps)
+    return steps
+
+
+def validate_steps(steps: List[Step]):
+    """Reject unknown `needs`, outputs published twice, and dependency cycles."""
+    names = {step.function for step in steps}
+    producers: Dict[str, str] = {}
+    for step in steps:
+        for need in step.needs:
+            if need not in names:
+                raise ValueError(f"{step.function} needs unknown step {need}")
+        for output in step.outputs:
+            if output in producers:
+                raise ValueError(f"Variable {output} is produced by both {producers[output]} and {step.function}")
+            producers[output] = step.function
+
+    dependencies = {
+        step.function: set(step.needs) | {producers[name] for name in step.inputs if name in producers}
+        for step in steps
+    }
+    visiting, visited = set(), set()
+
+    def visit(name: str):
+        if name in visited:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through {name}")
+        visiting.add(name)
+        for dependency in dependencies[name]:
+            visit(dependency)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in dependencies:
+        visit(name)
+
+
+class DagState:
+    """Tracks which steps are ready, running, done or skipped. Not thread-safe; drive it from one thread/loop."""
+
+    def __init__(self, steps: List[Step], variables: Dict[str, Any]):
+        self.variables = dict(variables)
+        self.pending: Dict[str, Step] = {step.function: step for step in steps}
+        self.running: Set[str] = set()
+        self.passed: Set[str] = set()
+        self.skipped: Set[str] = set()
+        self._producers = {output: step.function for step in steps for output in step.outputs}
+
+    def _blocked(self, step: Step) -> bool:
+        """A step is blocked for good when a dependency did not pass or an input can never be published."""
+        for need in step.needs:
+            if need not in self.pending and need not in self.running and need not in self.passed:
+                return True
+        for name in step.inputs:
+            if name in self.variables:
+                continue
+            producer = self._producers.get(name)
+            if producer is None or (producer not in self.pending and producer not in self.running):
+                return True
+        return False
+
+    def ready(self) -> List[Step]:
+        """Return steps that can start now and mark them running. Permanently blocked steps are skipped."""
+        ready = []
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, step in list(self.pending.items()):
+                if self._blocked(step):
+                    del self.pending[name]
+                    self.skipped.add(name)
+                    progressed = True
+                elif all(need in self.passed for need in step.needs) and step.inputs <= self.variables.keys():
+                    del self.pending[name]
+                    self.running.add(name)
+                    ready.append(step)
+        return ready
+
+    def complete(self, step: Step, event: Dict[str, Any], result: Dict[str, Any]):
+        self.running.discard(step.function)
+        if result['status'] == 'PASS':
+            self.passed.add(step.function)
+            self.variables.update(step.extract_outputs(event, result))
+
+    @property
+    def finished(self) -> bool:
+        return not self.pending and not self.running
+
+
+def run_dag(steps: List[Step], stage: str, variables: Dict[str, Any],
+            invoke: Callable[[Step, Dict[str, Any], str], Dict[str, Any]],
+            on_result: Callable[[Dict[str, Any]], None] = None,
+            max_workers: int = None) -> List[Dict[str, Any]]:
+    """Run the DAG on a thread pool, starting each step as soon as its inputs are ready.
+
+    `invoke(step, event, stage)` performs one invocation and returns the
+    result dict; `on_result` is called with each result as it arrives.
+    """
+    state = DagState(steps, variables)
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or max(1, len(steps))) as executor:
+        running: Dict[concurrent.futures.Future, tuple] = {}
+        while True:
+            for step in state.ready():
+                event = step.build_event(state.variables)
+                running[executor.submit(invoke, step, event, stage)] = (step, event)
+            if not running:
+                break
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                step, event = running.pop(future)
+                result = future.result()
+                state.complete(step, event, result)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    return results
+
+
+def skipped_steps(steps: List[Step], invoked: Iterable[str]) -> List[str]:
+    """Return the names of steps that were never invoked."""
+    invoked = set(invoked)
+    return [step.function for step in steps if step.function not in invoked]
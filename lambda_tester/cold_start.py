@@ -0,0 +1,193 @@
+"""Cold-start vs warm-start measurement for the tester's Lambdas.
+
+For each function, forces a fresh execution environment N times (by bumping
+an environment variable and waiting for the update), invoking once after
+each bump, then invokes M more times back to back while warm. Every call
+requests the log tail, and the REPORT line's Init Duration, Duration, Billed
+Duration and Max Memory Used are aggregated into a cold/warm comparison.
+
+Payloads carry real IDs from one setup pass of the test DAG, shared by all
+functions (see lambda_reports.BenchmarkData). Calls that error or answer with
+a statusCode other than 200 count as `failed`, and the users the measurement
+creates are deleted afterwards unless `--retain-data` is given.
+
+    python3 cold_start.py --functions CreateUser,GetCharacterHiscores --table-name GoalTracker-dev --cold 5 --warm 20
+"""
+import json
+import os
+from typing import List, Dict, Any, Callable
+
+from lambda_reports import (
+    BenchmarkData,
+    benchmark_steps,
+    force_cold_start,
+    invoke_with_report,
+    update_configuration_and_wait,
+)
+from lambda_tester import log
+from metrics import LatencyHistogram
+
+REPORT_METRICS = ('initDurationMs', 'durationMs', 'billedDurationMs', 'maxMemoryUsedMb', 'clientLatencyMs')
+
+
+def sample_histograms(samples: List[Dict[str, Any]]) -> Dict[str, LatencyHistogram]:
+    """REPORT-line metrics (and client latency) of the samples, one histogram per metric that occurred."""
+    histograms = {metric: LatencyHistogram() for metric in REPORT_METRICS}
+    for sample in samples:
+        values = dict(sample['report'] or {}, clientLatencyMs=sample['clientLatencyMs'])
+        for metric in REPORT_METRICS:
+            if metric in values:
+                histograms[metric].record(values[metric])
+    return {metric: histogram for metric, histogram in histograms.items() if histogram.count}
+
+
+def _summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    histograms = sample_histograms(samples)
+    summary = {'invocations': len(samples),
+               'failed': sum(1 for sample in samples if sample['failed'])}
+    for metric, histogram in histograms.items():
+        summary[metric] = histogram.summary()
+    return summary
+
+
+def measure_function(function_name: str, stage: str, cold: int, warm: int, data: BenchmarkData,
+                     on_samples: Callable[[str, str, List[Dict[str, Any]]], None] = None) -> Dict[str, Any]:
+    """Measure one function `cold` times from a fresh environment and `warm` times while warm.
+
+    `on_samples(function_name, 'cold' | 'warm', samples)` receives the raw
+    samples behind the summaries.
+    """
+    data.check(function_name)
+    full_function_name = f"{function_name}-{stage}"
+
+    def invoke():
+        sample = invoke_with_report(full_function_name, data.payload(function_name))
+        data.observe(function_name, sample)
+        return sample
+
+    cold_samples, warm_samples = [], []
+    original_variables = None
+    try:
+        for i in range(cold):
+            log(f"{function_name}: cold invocation {i + 1}/{cold}")
+            variables = force_cold_start(full_function_name)
+            if original_variables is None:
+                original_variables = variables
+            cold_samples.append(invoke())
+
+        if not cold_samples:
+            # Make sure the warm samples don't include the one cold start
+            invoke()
+        log(f"{function_name}: {warm} warm invocations")
+        for _ in range(warm):
+            warm_samples.append(invoke())
+    finally:
+        if original_variables is not None:
+            update_configuration_and_wait(full_function_name, Environment={'Variables': original_variables})
+
+    # An invocation counts as cold only if Lambda reported an init phase for it
+    unexpected_warm = sum(1 for sample in cold_samples
+                          if 'initDurationMs' not in (sample['report'] or {}))
+    if unexpected_warm:
+        log(f"Warning: {function_name}: {unexpected_warm} forced invocations reported no Init Duration")
+
+    if on_samples:
+        on_samples(function_name, 'cold', cold_samples)
+        on_samples(function_name, 'warm', warm_samples)
+    return {
+        'cold': _summarize(cold_samples),
+        'warm': _summarize(warm_samples)
+    }
+
+
+def format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    """Render the per-function cold/warm comparison as a fixed-width table (p50 values, ms / MB)."""
+
+    def p50(summary: Dict[str, Any], metric: str) -> str:
+        return f"{summary[metric]['p50']:.0f}" if metric in summary else '-'
+
+    header = f"{'Function':<40} {'Init':>8} {'Cold dur':>9} {'Cold billed':>12} {'Warm dur':>9} " \
+             f"{'Warm p99':>9} {'Warm billed':>12} {'Max mem':>8}"
+    lines = [header, '-' * len(header)]
+    for name, result in results.items():
+        cold, warm = result['cold'], result['warm']
+        warm_p99 = f"{warm['durationMs']['p99']:.0f}" if 'durationMs' in warm else '-'
+        max_memory = max((f"{summary['maxMemoryUsedMb']['max']:.0f}" for summary in (cold, warm)
+                          if 'maxMemoryUsedMb' in summary), key=float, default='-')
+        lines.append(
+            f"{name:<40} {p50(cold, 'initDurationMs'):>8} {p50(cold, 'durationMs'):>9} "
+            f"{p50(cold, 'billedDurationMs'):>12} {p50(warm, 'durationMs'):>9} {warm_p99:>9} "
+            f"{p50(warm, 'billedDurationMs'):>12} {max_memory:>8}")
+    return '\n'.join(lines)
+
+
+def run_cold_start(functions: List[str] = None, stage: str = None, cold: int = 5, warm: int = 20,
+                   on_samples: Callable[[str, str, List[Dict[str, Any]]], None] = None,
+                   payload_path: str = None, table_name: str = None, retain_data: bool = False) -> Dict[str, Any]:
+    """Measure cold and warm starts for each function (default: every function with a test or benchmark block)."""
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+    if functions is None:
+        functions = list(benchmark_steps())
+
+    data = BenchmarkData(stage, table_name, payload_path, retain_data)
+    results = {}
+    try:
+        for function_name in functions:
+            try:
+                results[function_name] = measure_function(function_name, stage, cold, warm, data, on_samples)
+            except Exception as e:
+                log(f"Cold-start measurement failed for {function_name}: {str(e)}")
+                results[function_name] = {'error': str(e)}
+    finally:
+        data.close()
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Compare cold and warm start latency of the OSRS Goal Tracker Lambdas')
+    parser.add_argument('--functions', help='Comma-separated function names (default: every function with a test or benchmark block)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--table-name', help='DynamoDB table name (defaults to DYNAMODB_TABLE environment variable)')
+    parser.add_argument('--cold', type=int, default=5, help='Forced cold invocations per function (default: 5)')
+    parser.add_argument('--warm', type=int, default=20, help='Warm invocations per function (default: 20)')
+    parser.add_argument('--payload', help='JSON file to invoke every function with instead of its config.json event')
+    parser.add_argument('--retain-data', action='store_true', help='Keep the users created while measuring')
+    parser.add_argument('--json', action='store_true', help='Print the full JSON results instead of the table')
+    parser.add_argument('--history', action='store_true',
+                        help='Save the cold/warm distributions to the benchmark history (bench_history.py)')
+    args = parser.parse_args()
+
+    load_env()
+    histograms = {}
+
+    def keep_histograms(function_name: str, phase: str, samples: List[Dict[str, Any]]):
+        for metric, histogram in sample_histograms(samples).items():
+            histograms.setdefault(function_name, {})[f"{phase}.{metric}"] = histogram
+
+    results = run_cold_start(
+        functions=args.functions.split(',') if args.functions else None,
+        stage=args.stage,
+        cold=args.cold,
+        warm=args.warm,
+        on_samples=keep_histograms if args.history else None,
+        payload_path=args.payload,
+        table_name=args.table_name,
+        retain_data=args.retain_data
+    )
+    if args.history:
+        from bench_history import HistoryStore, code_version
+        stage = args.stage or os.environ.get('STAGE', 'dev')
+        with HistoryStore() as store:
+            store.save_run(code_version(stage), stage, 'cold-start', results, histograms)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_table({name: result for name, result in results.items() if 'error' not in result}))
@@ -0,0 +1,132 @@
+"""Distributed load driver: fan a load run out across copies of the tester Lambda.
+
+In coordinator mode the tester splits a load run into `workers` shards (the
+same split as process_driver.py) and invokes its own function once per
+shard, all at once. Each copy runs `handler({"shard": ...})`: it drives its
+slice of the virtual users, cleans up after itself and returns its chain
+counters and latency histograms, which the coordinator merges into one
+report. Tens of thousands of concurrent chains then need tens of tester
+Lambdas rather than one large box.
+
+Shards are invoked with RequestResponse, each from its own thread, so the
+partials come back as the invocation results and no intermediate store is
+needed. Every shard must finish within the tester function's timeout (at
+most 15 minutes), and so must the coordinator. Handler event:
+
+    {"table_name": "GoalTracker-dev", "engine": "async",
+     "load": {"workers": 20, "users": 20000, "concurrency": 4000, "max_in_flight": 1000}}
+
+`"fanout": "processes"` sends each shard through `handler` in a local worker
+process instead, to exercise coordinator mode without deploying anything:
+
+    python3 coordinator.py --table-name GoalTracker-dev --backend local --fanout processes --workers 4 --users 2000 --concurrency 200
+"""
+import json
+import concurrent.futures
+from typing import List, Dict, Any
+
+from backends import get_backend
+from lambda_tester import log
+from process_driver import run_load_processes, run_shards_in_processes
+
+FANOUTS = ('lambda', 'processes')
+# A shard can run for as long as the worker function's 15-minute maximum timeout
+SHARD_READ_TIMEOUT_SECONDS = 900
+
+
+def invoke_shard(client, function_name: str, shard: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one shard on a copy of the tester function and return its partial, or {'shard', 'error'}."""
+    try:
+        response = client.invoke(
+            FunctionName=function_name,
+            InvocationType='RequestResponse',
+            Payload=json.dumps({'shard': shard})
+        )
+        payload = json.loads(response['Payload'].read().decode())
+    except Exception as e:
+        return {'shard': shard['shard'], 'error': str(e)}
+    if 'FunctionError' in response:
+        return {'shard': shard['shard'], 'error': payload.get('errorMessage', response['FunctionError'])}
+    return payload
+
+
+class LambdaFanout:
+    """Runs every shard on its own copy of the tester function, concurrently."""
+
+    def __init__(self, function_name: str):
+        self.function_name = function_name
+
+    def __call__(self, shards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        backend = get_backend()
+        if backend.name != 'aws':
+            raise ValueError("Lambda fan-out needs the aws backend; use fanout 'processes' to run shards locally")
+        # A dedicated client: the shared one gives up on a response after botocore's default 60 seconds
+        client = backend.clients.new_client('lambda', read_timeout=SHARD_READ_TIMEOUT_SECONDS,
+                                            max_pool_connections=len(shards))
+        log(f"Invoking {len(shards)} copies of {self.function_name}")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            return list(executor.map(lambda shard: invoke_shard(client, self.function_name, shard), shards))
+
+
+def _invoke_handler(shard: Dict[str, Any]) -> Dict[str, Any]:
+    import lambda_tester
+    return lambda_tester.handler({'shard': shard}, None)
+
+
+def run_shards_locally(shards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stand-in for the Lambda fan-out: each shard goes through `handler` in its own local process."""
+    return run_shards_in_processes(shards, target=_invoke_handler)
+
+
+def run_distributed_load(workers: int, fanout: str = 'lambda', function_name: str = None, **load) -> dict:
+    """Coordinate a load run (see load_generator.run_load for `load`) across `workers` tester invocations."""
+    if fanout not in FANOUTS:
+        raise ValueError(f"Unknown fanout: {fanout} (expected one of {', '.join(FANOUTS)})")
+    if fanout == 'lambda' and not function_name:
+        raise ValueError("function_name of the tester Lambda is required for Lambda fan-out")
+    run_shards = LambdaFanout(function_name) if fanout == 'lambda' else run_shards_locally
+    return {'fanout': fanout, **run_load_processes(processes=workers, run_shards=run_shards, **load)}
+
+
+if __name__ == '__main__':
+    import argparse
+    from backends import use_backend
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Fan a load run out across copies of the tester Lambda')
+    parser.add_argument('--table-name', required=True, help='DynamoDB table name (required)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--workers', type=int, required=True, help='Number of shards / tester invocations')
+    parser.add_argument('--fanout', choices=FANOUTS, default='lambda',
+                        help='Run shards on the tester Lambda or in local processes (default: lambda)')
+    parser.add_argument('--function-name', help='Deployed tester function to fan out to (required for --fanout lambda)')
+    parser.add_argument('--backend', choices=['aws', 'local'],
+                        help='Backend the shards run against (defaults to LAMBDA_TESTER_BACKEND, else aws)')
+    parser.add_argument('--users', type=int, help='Total number of user chains to run')
+    parser.add_argument('--rate', type=float, help='Open-loop chain start rate (chains/sec); omit for fixed concurrency')
+    parser.add_argument('--concurrency', type=int, default=10, help='Maximum user chains in flight (default: 10)')
+    parser.add_argument('--duration', type=float, help='Stop starting new chains after this many seconds')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads', help='Invocation engine (default: threads)')
+    parser.add_argument('--max-in-flight', type=int, help='Async engine only: limit on concurrent Lambda invocations')
+    parser.add_argument('--chains', default='user', help='Comma-separated test-DAG chains each virtual user runs (default: user)')
+    parser.add_argument('--retain-data', action='store_true', help='Keep the created users')
+    args = parser.parse_args()
+
+    load_env()
+    if args.backend:
+        use_backend(args.backend)
+    print(json.dumps(run_distributed_load(
+        workers=args.workers,
+        fanout=args.fanout,
+        function_name=args.function_name,
+        stage=args.stage,
+        table_name=args.table_name,
+        users=args.users,
+        rate=args.rate,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        engine=args.engine,
+        max_in_flight=args.max_in_flight,
+        chains=args.chains.split(','),
+        retain_data=args.retain_data
+    ), indent=2))
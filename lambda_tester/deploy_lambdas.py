@@ -0,0 +1,205 @@
+"""Parallel deploy-and-verify for the service Lambdas.
+
+The Python counterpart of `updateAllDevLambdas.sh`: reads every function's
+`jarPath` from config.json and, on a bounded pool, for each function
+
+1. skips it if the JAR's SHA-256 already matches the deployed `CodeSha256`
+   (hashes are memory-mapped and cached across runs, see artifact_cache.py),
+2. uploads the JAR with UpdateFunctionCode,
+3. waits on the `function_updated` waiter (LastUpdateStatus) polling every
+   second, rather than sleeping a fixed time.
+
+Once every upload has finished, each updated function is smoke-invoked with
+its config.json test (or benchmark) event, filled with real IDs from one setup
+pass of the test DAG (see lambda_reports.BenchmarkData). The smoke passes only
+on a 200 answer. The users the smoke creates are deleted afterwards.
+
+A full refresh takes about as long as the slowest single upload. The
+command exits with status 1 if any function fails to deploy or its smoke
+invocation fails.
+
+    python3 deploy_lambdas.py --stage dev --table-name GoalTracker-dev
+    python3 deploy_lambdas.py --functions CreateUser,GetUser --force
+"""
+import json
+import os
+import time
+import concurrent.futures
+from pathlib import Path
+from typing import List, Dict, Any
+
+import lambda_tester
+from artifact_cache import ArtifactCache
+from backoff import jittered_backoff, is_throttle
+from chain_dag import Step, find_config_path, load_lambda_configs
+from lambda_reports import BenchmarkData, benchmark_steps, invoke_with_report
+from lambda_tester import log
+
+UPDATE_ATTEMPTS = 6
+WAITER_CONFIG = {'Delay': 1, 'MaxAttempts': 300}
+
+
+def deploy_targets(functions: List[str] = None, config_path: Path = None) -> List[Dict[str, Any]]:
+    """Functions with a `jarPath` in config.json, with the path resolved against the config's directory."""
+    config_path = config_path or find_config_path()
+    targets = [{'function': config['name'], 'jarPath': config_path.parent / config['jarPath']}
+               for config in load_lambda_configs(config_path) if config.get('jarPath')]
+    if functions:
+        by_name = {target['function']: target for target in targets}
+        unknown = [name for name in functions if name not in by_name]
+        if unknown:
+            raise ValueError(f"No jarPath in config.json for: {', '.join(unknown)}")
+        targets = [by_name[name] for name in functions]
+    return targets
+
+
+def _update_code(full_function_name: str, jar_path: Path):
+    """UpdateFunctionCode, retrying throttles and updates still in progress (ResourceConflictException)."""
+    lambda_client = lambda_tester.get_lambda_client()
+    zip_file = jar_path.read_bytes()
+    for attempt in range(UPDATE_ATTEMPTS):
+        try:
+            return lambda_client.update_function_code(FunctionName=full_function_name, ZipFile=zip_file)
+        except Exception as e:
+            code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+            if attempt == UPDATE_ATTEMPTS - 1 or not (is_throttle(e) or code == 'ResourceConflictException'):
+                raise
+            time.sleep(jittered_backoff(attempt, base=0.5))
+
+
+def deploy_function(target: Dict[str, Any], stage: str, cache: ArtifactCache, force: bool = False) -> Dict[str, Any]:
+    """Deploy one function if its JAR changed and wait for the update."""
+    function_name = target['function']
+    full_function_name = f"{function_name}-{stage}"
+    result = {'function': function_name, 'jarPath': str(target['jarPath'])}
+    start = time.monotonic()
+    try:
+        if not target['jarPath'].is_file():
+            return {**result, 'status': 'FAILED', 'error': 'JAR not found; build the project first'}
+        lambda_client = lambda_tester.get_lambda_client()
+        local_sha = cache.code_sha256(target['jarPath'])
+        deployed_sha = lambda_client.get_function_configuration(FunctionName=full_function_name).get('CodeSha256')
+        if local_sha == deployed_sha and not force:
+            log(f"{function_name}: unchanged, skipping upload")
+            cache.record_deploy(full_function_name, deployed_sha)
+            return {**result, 'status': 'UNCHANGED', 'codeSha256': local_sha}
+
+        log(f"{function_name}: uploading {target['jarPath'].stat().st_size / 1e6:.1f} MB")
+        _update_code(full_function_name, target['jarPath'])
+        uploaded = time.monotonic()
+        lambda_client.get_waiter('function_updated').wait(FunctionName=full_function_name, WaiterConfig=WAITER_CONFIG)
+        updated = time.monotonic()
+        cache.record_deploy(full_function_name, local_sha)
+        result.update({
+            'status': 'UPDATED',
+            'codeSha256': local_sha,
+            'uploadSeconds': round(uploaded - start, 3),
+            'waitSeconds': round(updated - uploaded, 3)
+        })
+        log(f"{function_name}: updated in {updated - start:.1f}s")
+    except Exception as e:
+        log(f"{function_name}: deploy failed ({str(e)})")
+        return {**result, 'status': 'FAILED', 'error': str(e)}
+    return result
+
+
+def smoke_function(step: Step, stage: str, data: BenchmarkData) -> Dict[str, Any]:
+    """Invoke one deployed function with a real-ID payload; an API function passes only on a 200 answer."""
+    function_name = step.function
+    try:
+        sample = invoke_with_report(f"{function_name}-{stage}", data.payload(function_name))
+    except Exception as e:
+        log(f"{function_name}: smoke invocation error ({str(e)})")
+        return {'passed': False, 'error': str(e)}
+    data.observe(function_name, sample)
+    # Direct-invoke handlers answer without a statusCode; API handlers always carry one
+    passed = not sample['failed'] and (step.invoke != 'api' or sample['statusCode'] == 200)
+    if not passed:
+        log(f"{function_name}: smoke invocation failed ({sample['functionError'] or sample['statusCode']})")
+    return {
+        'passed': passed,
+        'statusCode': sample['statusCode'],
+        'functionError': sample['functionError'],
+        'clientLatencyMs': round(sample['clientLatencyMs'], 3),
+        'initDurationMs': (sample['report'] or {}).get('initDurationMs')
+    }
+
+
+def deploy_all(functions: List[str] = None, stage: str = None, workers: int = 10, force: bool = False,
+               smoke: bool = True, table_name: str = None) -> Dict[str, Any]:
+    """Deploy every function (default: all with a jarPath) concurrently, then smoke-test the updated ones."""
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if smoke and not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+    targets = deploy_targets(functions)
+    lambda_tester.get_backend().configure(max_pool_connections=workers)
+    cache = ArtifactCache()
+
+    log(f"Deploying {len(targets)} functions to stage: {stage} ({workers} at a time)")
+    start = time.monotonic()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda target: deploy_function(target, stage, cache, force), targets))
+    finally:
+        cache.save()
+
+    steps = benchmark_steps()
+    updated = [r for r in results if r['status'] == 'UPDATED' and r['function'] in steps]
+    if smoke and updated:
+        # Smoke only after every upload, so the setup pass runs against the new code throughout
+        log(f"Smoke-testing {len(updated)} updated functions")
+        data = BenchmarkData(stage, table_name)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                smokes = executor.map(lambda r: smoke_function(steps[r['function']], stage, data), updated)
+                for result, smoke_result in zip(updated, smokes):
+                    result['smoke'] = smoke_result
+        finally:
+            data.close()
+    elapsed = time.monotonic() - start
+
+    failed = [r['function'] for r in results
+              if r['status'] == 'FAILED' or not r.get('smoke', {}).get('passed', True)]
+    statuses = [r['status'] for r in results]
+    uploaded_bytes = sum(Path(r['jarPath']).stat().st_size for r in results if r['status'] == 'UPDATED')
+    log(f"Deploy completed in {elapsed:.1f}s. Updated: {statuses.count('UPDATED')}, "
+        f"Unchanged: {statuses.count('UNCHANGED')}, Failed: {len(failed)}")
+    return {
+        'stage': stage,
+        'durationSeconds': round(elapsed, 3),
+        'uploadedMb': round(uploaded_bytes / 1e6, 1),
+        'jarsHashed': cache.hashed,
+        'cachedHashesReused': cache.reused,
+        'failed': failed,
+        'functions': results
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Deploy the service Lambdas in parallel and smoke-test them')
+    parser.add_argument('--functions', help='Comma-separated function names (default: every function with a jarPath)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--table-name', help='DynamoDB table to delete smoke-test users from (defaults to DYNAMODB_TABLE environment variable)')
+    parser.add_argument('--workers', type=int, default=10, help='Functions deployed at once (default: 10)')
+    parser.add_argument('--force', action='store_true', help='Upload even when the JAR matches the deployed code')
+    parser.add_argument('--no-smoke', action='store_true', help='Skip the smoke invocations')
+    args = parser.parse_args()
+
+    load_env()
+    report = deploy_all(
+        functions=args.functions.split(',') if args.functions else None,
+        stage=args.stage,
+        workers=args.workers,
+        force=args.force,
+        smoke=not args.no_smoke,
+        table_name=args.table_name
+    )
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report['failed'] else 0)
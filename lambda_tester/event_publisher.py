@@ -0,0 +1,290 @@
+"""Batched EventBridge publisher, and synthetic goal creation traffic built on it.
+
+`EventPublisher` sends entries to `goal-event-bus-{stage}` with PutEvents,
+10 entries per call (the API limit), from a pool of parallel senders.
+PutEvents can succeed as a call yet reject some of its entries (e.g.
+`ThrottlingException` past the account's quota); those entries are resent
+with jittered backoff, as are calls that are throttled outright. The report
+counts calls, retried and finally failed entries, and per-call latency.
+
+`goal_creation_entries` builds GoalCreationRequestEvents like the ones
+GoalCreationRequestEventProducer publishes, each with a unique `requestId`
+and varied `targetAttribute`, `targetValue`, `frequency` and notification
+channel. Publishing them loads CreateGoalFromGoalCreationRequestEvent
+through the bus, with EventBridge's own delivery, rather than one direct
+invoke per event with a fixed envelope. With `wait`, the table is polled
+until every goal has been written.
+
+Offline, `--backend local` publishes to the in-process bus, and
+`--fail-rate` makes it reject that fraction of entries to exercise retries.
+
+    python3 event_publisher.py --table-name GoalTracker-dev --events 5000 --users 20 --senders 8 --wait
+    python3 event_publisher.py --backend local --table-name GoalTracker-dev --events 2000 --fail-rate 0.1 --wait
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import datetime
+import concurrent.futures
+from collections import Counter
+from typing import List, Dict, Any
+
+import lambda_tester
+from backoff import jittered_backoff, is_throttle
+from bulk_cleanup import batch_put
+from lambda_tester import log
+from load_generator import new_run_id, release_users
+from local_lambdas import EVENT_SOURCE, GOAL_CREATION_REQUEST_EVENT_DETAIL_TYPE, HISCORES_SKILLS
+from metrics import LatencyHistogram
+from table_benchmark import user_items
+
+PUT_EVENTS_LIMIT = 10
+MAX_ATTEMPTS = 6
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+CHANNEL_TYPES = ('EMAIL', 'SMS', 'DISCORD')
+
+
+class EventPublisher:
+    """PutEvents in batches of 10 from `senders` threads, retrying failed entries.
+
+    After `publish`, `failed` holds the entries that still failed on the last attempt.
+    """
+
+    def __init__(self, senders: int = 8, max_attempts: int = MAX_ATTEMPTS):
+        self.senders = senders
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.published = 0
+        self.retried_entries = 0
+        self.throttled_calls = 0
+        self.failed: List[Dict[str, Any]] = []
+        self.error_codes: Counter = Counter()
+
+    def _put(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            return lambda_tester.get_events_client().put_events(Entries=entries)
+        finally:
+            with self._lock:
+                self.latency.record((time.perf_counter() - start) * 1000)
+                self.calls += 1
+
+    def _send(self, batch: List[Dict[str, Any]]):
+        pending = batch
+        for attempt in range(self.max_attempts):
+            try:
+                response = self._put(pending)
+            except Exception as e:
+                if not is_throttle(e) or attempt == self.max_attempts - 1:
+                    with self._lock:
+                        self.failed.extend(pending)
+                        self.error_codes[getattr(e, 'response', {}).get('Error', {}).get('Code', type(e).__name__)] += len(pending)
+                    return
+                with self._lock:
+                    self.throttled_calls += 1
+                time.sleep(jittered_backoff(attempt))
+                continue
+
+            # Result entries line up with the request; failed ones carry an ErrorCode instead of an EventId
+            failed = [(entry, result['ErrorCode']) for entry, result in zip(pending, response['Entries'])
+                      if result.get('ErrorCode')]
+            with self._lock:
+                self.published += len(pending) - len(failed)
+                for _, code in failed:
+                    self.error_codes[code] += 1
+                if failed and attempt < self.max_attempts - 1:
+                    self.retried_entries += len(failed)
+                elif failed:
+                    self.failed.extend(entry for entry, _ in failed)
+            if not failed:
+                return
+            pending = [entry for entry, _ in failed]
+            time.sleep(jittered_backoff(attempt))
+
+    def publish(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Publish every entry; returns counts, throughput and PutEvents call latency for this call."""
+        with self._lock:
+            self._reset()
+        batches = [entries[i:i + PUT_EVENTS_LIMIT] for i in range(0, len(entries), PUT_EVENTS_LIMIT)]
+        start = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.senders) as executor:
+            list(executor.map(self._send, batches))
+        elapsed = time.monotonic() - start
+        with self._lock:
+            return {
+                'entries': len(entries),
+                'published': self.published,
+                'failedEntries': len(self.failed),
+                'retriedEntries': self.retried_entries,
+                'throttledCalls': self.throttled_calls,
+                'errorCodes': dict(self.error_codes),
+                'calls': self.calls,
+                'publishSeconds': round(elapsed, 3),
+                'publishThroughput': round(self.published / elapsed, 1) if elapsed else 0.0,
+                'putEventsLatencyMs': self.latency.summary()
+            }
+
+
+def goal_creation_entries(characters: List[Dict[str, str]], count: int, stage: str,
+                          seed: int = 42) -> List[Dict[str, Any]]:
+    """`count` GoalCreationRequestEvent entries spread round-robin over (userId, characterName) pairs."""
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    entries = []
+    for i in range(count):
+        character = characters[i % len(characters)]
+        target_level = rng.randint(50, 99)
+        target_date = now + datetime.timedelta(days=rng.randint(7, 365))
+        detail = {
+            'requestId': str(uuid.uuid4()),
+            'userId': character['userId'],
+            'characterName': character['characterName'],
+            'targetAttribute': rng.choice(HISCORES_SKILLS[1:]).upper(),
+            'targetType': 'SKILL',
+            'targetValue': target_level,
+            'currentValue': rng.randint(1, target_level - 1),
+            'targetDate': target_date.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'notificationChannelType': rng.choice(CHANNEL_TYPES),
+            'frequency': rng.choice(FREQUENCIES)
+        }
+        entries.append({
+            'Source': EVENT_SOURCE,
+            'DetailType': GOAL_CREATION_REQUEST_EVENT_DETAIL_TYPE,
+            'Detail': json.dumps(detail),
+            'EventBusName': f"goal-event-bus-{stage}"
+        })
+    return entries
+
+
+def count_goals(table_name: str, character: Dict[str, str]) -> int:
+    """Number of goal items under one user's character."""
+    client = lambda_tester.get_dynamodb_client()
+    query = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'pk = :pk AND begins_with(sk, :prefix)',
+        'ExpressionAttributeValues': {':pk': f"USER#{character['userId']}",
+                                      ':prefix': f"CHARACTER#{character['characterName']}#GOAL#"},
+        'Select': 'COUNT'
+    }
+    count = 0
+    while True:
+        response = client.query(**query)
+        count += response['Count']
+        if 'LastEvaluatedKey' not in response:
+            return count
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def wait_for_goals(table_name: str, expected: Dict[str, int], characters: List[Dict[str, str]], timeout: float,
+                   poll_interval: float = 1.0) -> Dict[str, Any]:
+    """Poll until each character has its expected number of goals or `timeout` passes."""
+    deadline = time.monotonic() + timeout
+    counts = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+        while True:
+            found = executor.map(lambda character: count_goals(table_name, character), characters)
+            counts = {character['userId']: count for character, count in zip(characters, found)}
+            if all(counts[user_id] >= want for user_id, want in expected.items()) or time.monotonic() >= deadline:
+                break
+            time.sleep(poll_interval)
+    persisted = sum(min(counts[user_id], want) for user_id, want in expected.items())
+    return {'persisted': persisted, 'missing': sum(expected.values()) - persisted, 'finishedAt': time.monotonic()}
+
+
+def run_goal_traffic(stage: str = None, table_name: str = None, events: int = 1000, users: int = 10,
+                     senders: int = 8, wait: bool = False, timeout: float = 120.0,
+                     retain_data: bool = False) -> Dict[str, Any]:
+    """Publish synthetic goal creation requests for fresh users through the bus, optionally until persisted."""
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+
+    run_id = new_run_id()
+    lambda_tester.get_backend().configure(max_pool_connections=max(senders, 16))
+    lambda_tester.get_backend().use_table(table_name)
+    characters = []
+    try:
+        for _ in range(users):
+            user_id = str(uuid.uuid4())
+            items, _ = user_items(user_id, f"{user_id}@email.com", characters=1, channels=0, goals_per_character=0,
+                                  progress_per_goal=0, start=time.time())
+            # Recorded before the write, so a failed write is still cleaned up
+            characters.append({'userId': user_id, 'characterName': items[1]['name']})
+            batch_put(table_name, items)
+
+        entries = goal_creation_entries(characters, events, stage)
+        log(f"Goal traffic run {run_id}: publishing {events} GoalCreationRequestEvents for {users} users "
+            f"with {senders} senders")
+        start = time.monotonic()
+        publisher = EventPublisher(senders=senders)
+        report = publisher.publish(entries)
+        log(f"Published {report['published']}/{events} events in {report['publishSeconds']}s "
+            f"({report['retriedEntries']} entries retried, {report['failedEntries']} failed)")
+        if wait:
+            expected = Counter(json.loads(entry['Detail'])['userId'] for entry in entries)
+            for entry in publisher.failed:
+                expected[json.loads(entry['Detail'])['userId']] -= 1
+            persistence = wait_for_goals(table_name, expected, characters, timeout)
+            window = persistence.pop('finishedAt') - start
+            report.update({
+                **persistence,
+                'endToEndSeconds': round(window, 3),
+                'endToEndThroughput': round(persistence['persisted'] / window, 1) if window else 0.0
+            })
+            log(f"Persisted {persistence['persisted']} goals in {window:.1f}s")
+    finally:
+        release_users(run_id, table_name, [character['userId'] for character in characters], retain_data)
+    return {'runId': run_id, 'stage': stage, 'users': users, 'senders': senders, **report}
+
+
+if __name__ == '__main__':
+    import argparse
+    from backends import use_backend
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Publish synthetic GoalCreationRequestEvents with batched PutEvents')
+    parser.add_argument('--table-name', help='DynamoDB table name (defaults to DYNAMODB_TABLE)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--backend', choices=['aws', 'local'],
+                        help='Run against AWS or the offline in-process stand-ins (defaults to LAMBDA_TESTER_BACKEND, else aws)')
+    parser.add_argument('--events', type=int, default=1000, help='Goal creation requests to publish (default: 1000)')
+    parser.add_argument('--users', type=int, default=10, help='Synthetic users to spread them over (default: 10)')
+    parser.add_argument('--senders', type=int, default=8, help='Parallel PutEvents senders (default: 8)')
+    parser.add_argument('--wait', action='store_true', help='Poll the table until every goal has been written')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Give up waiting after this many seconds (default: 120)')
+    parser.add_argument('--fail-rate', type=float,
+                        help='Local backend only: fraction of entries the bus rejects as throttled')
+    parser.add_argument('--retain-data', action='store_true',
+                        help='Keep the synthetic users and their goals (recorded for bulk_cleanup.py --run-id)')
+    args = parser.parse_args()
+
+    load_env()
+    if args.backend:
+        use_backend(args.backend)
+    if args.fail_rate is not None:
+        backend = lambda_tester.get_backend()
+        if not hasattr(backend, 'event_bus'):
+            parser.error('--fail-rate needs the local backend')
+        backend.event_bus.failure_rate = args.fail_rate
+    report = run_goal_traffic(
+        stage=args.stage,
+        table_name=args.table_name,
+        events=args.events,
+        users=args.users,
+        senders=args.senders,
+        wait=args.wait,
+        timeout=args.timeout,
+        retain_data=args.retain_data
+    )
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,95 @@
+"""Pre-serialized event envelopes with per-request fields spliced in.
+
+Only a request's own fields (`pathParameters`, `body`, ...) change between
+invocations; the API Gateway envelope around them never does. An
+`EventTemplate` serializes the envelope once and renders a payload by
+encoding just the request fields and splicing them into the cached bytes:
+
+    envelope without its closing brace + b',' + fields without their opening brace
+
+If a request overrides an envelope key, that key is dropped from the cached
+envelope (one cached variant per set of overridden keys) so the payload never
+carries duplicate keys. Fields are encoded with orjson when it is installed,
+otherwise with json. Run this module for a microbenchmark:
+
+    python3 event_templates.py
+"""
+import json
+import threading
+from typing import Dict, Any, Callable, FrozenSet
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Encode to compact JSON bytes with the standard library."""
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+# Encode to compact JSON bytes, with orjson if available
+dumps = orjson.dumps if orjson is not None else json_dumps
+
+
+class EventTemplate:
+    """An event envelope serialized once; `render(fields)` returns the payload bytes for one request."""
+
+    def __init__(self, envelope: Dict[str, Any], encode: Callable[[Any], bytes] = None):
+        self.envelope = envelope
+        self.encode = encode or dumps
+        self._keys = frozenset(envelope)
+        self._lock = threading.Lock()
+        self._prefixes: Dict[FrozenSet[str], bytes] = {frozenset(): self.encode(envelope)[:-1]}
+
+    def _prefix(self, overridden: FrozenSet[str]) -> bytes:
+        prefix = self._prefixes.get(overridden)
+        if prefix is None:
+            envelope = {key: value for key, value in self.envelope.items() if key not in overridden}
+            prefix = self.encode(envelope)[:-1]
+            with self._lock:
+                self._prefixes[overridden] = prefix
+        return prefix
+
+    def render(self, fields: Dict[str, Any]) -> bytes:
+        """Payload that decodes to {**envelope, **fields}, without re-encoding the envelope."""
+        if not fields:
+            return self._prefixes[frozenset()] + b'}'
+        overridden = self._keys.intersection(fields)
+        prefix = self._prefix(frozenset(overridden)) if overridden else self._prefixes[frozenset()]
+        if len(prefix) == 1:
+            # Every envelope key was overridden
+            return self.encode(fields)
+        return prefix + b',' + self.encode(fields)[1:]
+
+
+if __name__ == '__main__':
+    import argparse
+    import timeit
+    from lambda_tester import create_api_gateway_event
+
+    parser = argparse.ArgumentParser(description='Compare per-invocation event construction cost')
+    parser.add_argument('--number', type=int, default=100000, help='Calls per measurement (default: 100000)')
+    args = parser.parse_args()
+
+    fields = {
+        'pathParameters': {'userId': '3f1c2a9e-5b7d-4c1e-9a2f-0d6b8e4c7a11', 'name': 'SoloMission'},
+        'body': json.dumps({'targetAttribute': 'WOODCUTTING', 'targetType': 'SKILL', 'targetValue': 99,
+                            'currentValue': 1, 'targetDate': '2024-12-31T23:59:59Z'})
+    }
+    envelope = create_api_gateway_event({})
+    templates = {'template + json': EventTemplate(envelope, encode=json_dumps)}
+    if orjson is not None:
+        templates['template + orjson'] = EventTemplate(envelope, encode=orjson.dumps)
+
+    candidates = {'dict + json.dumps (previous)': lambda: json.dumps(create_api_gateway_event(fields))}
+    for name, template in templates.items():
+        assert json.loads(template.render(fields)) == create_api_gateway_event(fields)
+        candidates[name] = lambda template=template: template.render(fields)
+
+    baseline = None
+    for name, candidate in candidates.items():
+        per_call_us = min(timeit.repeat(candidate, number=args.number, repeat=5)) / args.number * 1e6
+        baseline = baseline or per_call_us
+        print(f"{name:<30} {per_call_us:>8.2f} us/call  {baseline / per_call_us:>5.1f}x")
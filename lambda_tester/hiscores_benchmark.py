@@ -0,0 +1,304 @@
+"""Hiscores lookup benchmark: is a cache in front of GetCharacterHiscores worth building?
+
+GetCharacterHiscores proxies the OSRS hiscores site, our slowest and most
+rate-limited dependency, yet the test chain looks up a single name. This
+replays a Zipf-skewed stream of character names (a few popular characters
+looked up constantly, a long tail rarely) through a read-through cache and
+compares each cache with going straight to the function:
+
+- `none`: every lookup invokes GetCharacterHiscores
+- `lru`: an in-process LRU with a TTL (what the harness itself could use)
+- `dynamodb`: a cache item per character in the GoalTracker table,
+  `HISCORES#<name>` / `CACHE`, with an `expiresAt` epoch the reader checks
+  (the table has no TTL attribute configured, so stale items are not
+  deleted by DynamoDB; the benchmark removes its own items afterwards)
+
+Every pass replays the same name sequence from a cold cache. The report
+gives, per cache, hit ratio, hit/miss/overall latency, origin calls and the
+p50/p99 improvement over `none`.
+
+    python3 hiscores_benchmark.py --table-name GoalTracker-dev --lookups 5000 --names 2000 --skew 1.1
+    python3 hiscores_benchmark.py --backend local --table-name GoalTracker-dev --origin-latency-ms 300
+"""
+import itertools
+import os
+import random
+import threading
+import time
+import concurrent.futures
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import lambda_tester
+from bulk_cleanup import BATCH_WRITE_LIMIT, batch_delete
+from lambda_tester import log, invoke_lambda
+from metrics import LatencyHistogram
+
+HISCORES_FUNCTION = 'GetCharacterHiscores'
+CACHES = ('none', 'lru', 'dynamodb')
+CACHE_SK = 'CACHE'
+
+
+def zipf_choices(population: List[Any], k: int, skew: float = 1.1, seed: int = 42) -> List[Any]:
+    """`k` draws from `population`, where the item at rank r (1-based) has weight 1/r^skew (0 is uniform)."""
+    cum_weights = list(itertools.accumulate(1 / rank ** skew for rank in range(1, len(population) + 1)))
+    return random.Random(seed).choices(population, cum_weights=cum_weights, k=k)
+
+
+def zipf_names(lookups: int, names: int, skew: float = 1.1, seed: int = 42) -> List[str]:
+    """`lookups` character names drawn from `names` distinct ones, the k-th most popular with weight 1/k^skew."""
+    return zipf_choices([f"Zipf{rank:06d}" for rank in range(1, names + 1)], lookups, skew, seed)
+
+
+class NoCache:
+    """Every lookup goes to the origin."""
+
+    name = 'none'
+
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def put(self, key: str, value: str):
+        pass
+
+    def close(self):
+        pass
+
+
+class LruTtlCache:
+    """Thread-safe LRU of at most `capacity` entries, each valid for `ttl_seconds` after it was stored."""
+
+    name = 'lru'
+
+    def __init__(self, capacity: int = 1000, ttl_seconds: float = 300.0):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self.expired = 0
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def close(self):
+        pass
+
+
+class DynamoDBCache:
+    """Cache items in the GoalTracker table: `HISCORES#<name>` / `CACHE` holding the body and an `expiresAt` epoch."""
+
+    name = 'dynamodb'
+
+    def __init__(self, table_name: str, ttl_seconds: float = 300.0):
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self.expired = 0
+        self.consumed_capacity = 0.0
+        self._written = set()
+        self._lock = threading.Lock()
+
+    def _add_capacity(self, response: Dict[str, Any]):
+        units = (response.get('ConsumedCapacity') or {}).get('CapacityUnits', 0.0)
+        with self._lock:
+            self.consumed_capacity += units
+
+    def get(self, key: str) -> Optional[str]:
+        response = lambda_tester.get_dynamodb_client().get_item(
+            TableName=self.table_name,
+            Key={'pk': f"HISCORES#{key}", 'sk': CACHE_SK},
+            ReturnConsumedCapacity='TOTAL'
+        )
+        self._add_capacity(response)
+        item = response.get('Item')
+        if item is None:
+            return None
+        if float(item['expiresAt']) <= time.time():
+            with self._lock:
+                self.expired += 1
+            return None
+        return item['body']
+
+    def put(self, key: str, value: str):
+        response = lambda_tester.get_dynamodb_client().put_item(
+            TableName=self.table_name,
+            Item={'pk': f"HISCORES#{key}", 'sk': CACHE_SK, 'body': value,
+                  'expiresAt': int(time.time() + self.ttl_seconds)},
+            ReturnConsumedCapacity='TOTAL'
+        )
+        self._add_capacity(response)
+        with self._lock:
+            self._written.add(key)
+
+    def close(self):
+        """Delete the cache items this benchmark wrote."""
+        keys = [{'pk': f"HISCORES#{key}", 'sk': CACHE_SK} for key in sorted(self._written)]
+        for start in range(0, len(keys), BATCH_WRITE_LIMIT):
+            batch_delete(self.table_name, keys[start:start + BATCH_WRITE_LIMIT])
+        self._written.clear()
+
+
+def make_cache(name: str, table_name: str, capacity: int, ttl_seconds: float):
+    if name == 'none':
+        return NoCache()
+    if name == 'lru':
+        return LruTtlCache(capacity=capacity, ttl_seconds=ttl_seconds)
+    if name == 'dynamodb':
+        return DynamoDBCache(table_name, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown cache: {name} (expected one of {', '.join(CACHES)})")
+
+
+def run_pass(cache, names: List[str], stage: str, concurrency: int) -> Dict[str, Any]:
+    """Replay `names` through `cache` in front of GetCharacterHiscores and summarize hits, misses and latency."""
+    overall, hits, misses = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    lock = threading.Lock()
+    errors = []
+
+    def lookup(name: str):
+        start = time.perf_counter()
+        cached = cache.get(name)
+        if cached is None:
+            result = invoke_lambda(HISCORES_FUNCTION, {'pathParameters': {'name': name}}, stage)
+            if result['status'] == 'PASS':
+                cache.put(name, result['response']['body'])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            overall.record(elapsed_ms)
+            if cached is not None:
+                hits.record(elapsed_ms)
+            else:
+                misses.record(elapsed_ms)
+                if result['status'] != 'PASS':
+                    errors.append(result.get('error'))
+
+    log(f"Cache {cache.name}: {len(names)} lookups, {concurrency} at a time")
+    start = time.monotonic()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lookup, names))
+    finally:
+        cache.close()
+    elapsed = time.monotonic() - start
+
+    report = {
+        'lookups': overall.count,
+        'hitRatio': round(hits.count / overall.count, 4) if overall.count else 0.0,
+        'originCalls': misses.count,
+        'originErrors': len(errors),
+        'throughput': round(overall.count / elapsed, 2) if elapsed else 0.0,
+        'latencyMs': overall.summary(),
+        'hitLatencyMs': hits.summary(),
+        'missLatencyMs': misses.summary()
+    }
+    for attribute in ('evictions', 'expired'):
+        if hasattr(cache, attribute):
+            report[attribute] = getattr(cache, attribute)
+    if isinstance(cache, DynamoDBCache):
+        report['consumedCapacityUnits'] = round(cache.consumed_capacity, 1)
+    log(f"Cache {cache.name}: hit ratio {report['hitRatio']:.1%}, p99 {report['latencyMs'].get('p99')} ms")
+    return report
+
+
+def run_hiscores_benchmark(table_name: str = None, stage: str = None, caches: List[str] = None,
+                           lookups: int = 2000, names: int = 1000, skew: float = 1.1, concurrency: int = 10,
+                           capacity: int = 200, ttl_seconds: float = 300.0, seed: int = 42) -> Dict[str, Any]:
+    """Run the same Zipf lookup stream through each cache and compare them with the uncached baseline."""
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    caches = caches or list(CACHES)
+    if 'dynamodb' in caches and not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+    if 'none' not in caches:
+        caches = ['none'] + caches
+
+    sequence = zipf_names(lookups, names, skew, seed)
+    lambda_tester.get_backend().configure(max_pool_connections=concurrency)
+    passes = {name: run_pass(make_cache(name, table_name, capacity, ttl_seconds), sequence, stage, concurrency)
+              for name in caches}
+
+    baseline = passes['none']['latencyMs']
+    for name, report in passes.items():
+        if name == 'none' or not report['latencyMs'].get('count') or not baseline.get('count'):
+            continue
+        report['improvement'] = {
+            'p50': round(1 - report['latencyMs']['p50'] / baseline['p50'], 4) if baseline['p50'] else 0.0,
+            'p99': round(1 - report['latencyMs']['p99'] / baseline['p99'], 4) if baseline['p99'] else 0.0,
+            'originCallsSaved': passes['none']['originCalls'] - report['originCalls']
+        }
+    return {
+        'stage': stage,
+        'lookups': lookups,
+        'distinctNames': len(set(sequence)),
+        'skew': skew,
+        'lruCapacity': capacity,
+        'ttlSeconds': ttl_seconds,
+        'caches': passes
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from backends import use_backend
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Benchmark GetCharacterHiscores behind candidate caches')
+    parser.add_argument('--table-name', help='DynamoDB table for the dynamodb cache (defaults to DYNAMODB_TABLE)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--backend', choices=['aws', 'local'],
+                        help='Run against AWS or the offline in-process stand-ins (defaults to LAMBDA_TESTER_BACKEND, else aws)')
+    parser.add_argument('--caches', default=','.join(CACHES),
+                        help=f"Comma-separated caches to evaluate (default: {','.join(CACHES)})")
+    parser.add_argument('--lookups', type=int, default=2000, help='Lookups per cache (default: 2000)')
+    parser.add_argument('--names', type=int, default=1000, help='Distinct character names (default: 1000)')
+    parser.add_argument('--skew', type=float, default=1.1, help='Zipf exponent; higher concentrates on fewer names (default: 1.1)')
+    parser.add_argument('--concurrency', type=int, default=10, help='Lookups in flight (default: 10)')
+    parser.add_argument('--capacity', type=int, default=200, help='LRU cache entries (default: 200)')
+    parser.add_argument('--ttl', type=float, default=300.0, help='Cache entry lifetime in seconds (default: 300)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the name sequence (default: 42)')
+    parser.add_argument('--origin-latency-ms', type=float,
+                        help='Local backend only: simulated GetCharacterHiscores latency, standing in for the hiscores site')
+    args = parser.parse_args()
+
+    load_env()
+    if args.backend:
+        use_backend(args.backend)
+    if args.origin_latency_ms is not None:
+        backend = lambda_tester.get_backend()
+        if not hasattr(backend, 'lambda_service'):
+            parser.error('--origin-latency-ms needs the local backend')
+        backend.lambda_service.latency_ms[HISCORES_FUNCTION] = args.origin_latency_ms
+    lambda_tester.VERBOSE = False
+    report = run_hiscores_benchmark(
+        table_name=args.table_name,
+        stage=args.stage,
+        caches=args.caches.split(','),
+        lookups=args.lookups,
+        names=args.names,
+        skew=args.skew,
+        concurrency=args.concurrency,
+        capacity=args.capacity,
+        ttl_seconds=args.ttl,
+        seed=args.seed
+    )
+    print(json.dumps(report, indent=2))
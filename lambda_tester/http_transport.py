@@ -0,0 +1,526 @@
+"""HTTP transport: drive the test chains through the real API Gateway.
+
+By default the tester invokes each Lambda directly with a synthetic API
+Gateway event, which skips the `OsrsGoalsApi` RestApi and whatever it adds:
+routing, the proxy integration, CORS preflight. With an `HttpTransport`
+installed as `lambda_tester.TRANSPORT`, every `api` step instead becomes a
+real request to its route (see `ROUTES`, mirrored from lib/app.ts) on the
+stage URL (the `ApiUrl` stack output). `direct` steps, such as EventBridge
+consumers, are still invoked directly.
+
+Requests go through a pool of keep-alive HTTP/1.1 connections (http.client)
+or, with `http2=True` and the optional `httpx[http2]` package, one HTTP/2
+connection that multiplexes every request. `preflight=True` also sends the
+CORS OPTIONS request a browser would send before each POST and times it
+separately. A 429 from API Gateway is retried like a throttled Invoke.
+
+`StubApiServer` stands in for API Gateway offline: it maps routes to proxy
+events and invokes the functions on the active backend (e.g. `--backend
+local`), answering preflights and unknown routes the way API Gateway does.
+
+    python3 lambda_tester.py --table-name GoalTracker-dev --transport http --api-url https://abc123.execute-api.us-west-2.amazonaws.com/v1/
+    python3 http_transport.py serve --port 8080 --backend local
+    python3 http_transport.py compare --table-name GoalTracker-dev --users 50   # API Gateway share of latency
+"""
+import http.client
+import json
+import os
+import queue
+import re
+import ssl
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+import lambda_tester
+from backoff import jittered_backoff
+from lambda_tester import log
+from metrics import LatencyHistogram
+from profiling import phase_timer
+
+# Method and resource path per function, as routed by ApiGatewayStack in lib/app.ts
+ROUTES = {
+    'CreateUser': ('POST', '/users'),
+    'GetUser': ('GET', '/users/{userId}'),
+    'GetCharacterHiscores': ('GET', '/characters/{name}/hiscores'),
+    'AddCharacterToUser': ('POST', '/users/{userId}/characters/{name}'),
+    'GetCharactersForUser': ('GET', '/users/{userId}/characters'),
+    'CreateNotificationChannelForUser': ('POST', '/users/{userId}/notification-channels'),
+    'GetNotificationChannelsForUser': ('GET', '/users/{userId}/notification-channels'),
+    'GoalCreationRequestEventProducer': ('POST', '/users/{userId}/characters/{name}/goal'),
+}
+
+PATH_PARAMETER = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)\}')
+REQUEST_HEADERS = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+PREFLIGHT_ORIGIN = 'https://lambda-tester.invalid'
+# Connections the server closed while idle surface as one of these on reuse; retry once on a fresh one
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                           ConnectionResetError, BrokenPipeError)
+
+
+def build_request(function_name: str, test_case: Dict[str, Any]) -> Tuple[str, str, Optional[bytes]]:
+    """Method, resource path and body of the HTTP request for one API step's test case."""
+    if function_name not in ROUTES:
+        raise ValueError(f"No API Gateway route for {function_name}")
+    method, template = ROUTES[function_name]
+    path_parameters = test_case.get('pathParameters') or {}
+    path = PATH_PARAMETER.sub(lambda m: quote(str(path_parameters[m.group(1)]), safe=''), template)
+    body = test_case.get('body')
+    if body is not None and not isinstance(body, (str, bytes)):
+        body = json.dumps(body)
+    if isinstance(body, str):
+        body = body.encode()
+    return method, path, body
+
+
+def resolve_api_url() -> str:
+    """The deployed stage URL: API_URL if set, else the `ApiGatewayUrl` CloudFormation export."""
+    if os.environ.get('API_URL'):
+        return os.environ['API_URL']
+    clients = getattr(lambda_tester.get_backend(), 'clients', None)
+    if clients is None:
+        raise ValueError("API URL must be provided with --api-url or API_URL on this backend")
+    paginator = clients.client('cloudformation').get_paginator('list_exports')
+    for page in paginator.paginate():
+        for export in page['Exports']:
+            if export['Name'] == 'ApiGatewayUrl':
+                return export['Value']
+    raise ValueError("No ApiGatewayUrl export found; deploy ApiGatewayStack or pass --api-url")
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one host, reused across threads (at most `size` idle)."""
+
+    http_version = 'HTTP/1.1'
+
+    def __init__(self, base_url: str, size: int = 10, timeout: float = 30.0):
+        url = urlsplit(base_url)
+        if url.scheme not in ('http', 'https'):
+            raise ValueError(f"API URL must be http:// or https://, got {base_url}")
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        self.base_path = url.path.rstrip('/')
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context() if url.scheme == 'https' else None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.connections_opened += 1
+        if self._ssl_context:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, connection: http.client.HTTPConnection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def request(self, method: str, path: str, body: bytes = None,
+                headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Send one request; returns (status, headers, body)."""
+        try:
+            connection, reused = self._idle.get_nowait(), True
+        except queue.Empty:
+            connection, reused = self._connect(), False
+        while True:
+            try:
+                connection.request(method, self.base_path + path, body=body, headers=headers or {})
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except STALE_CONNECTION_ERRORS:
+                connection.close()
+                if not reused:
+                    raise
+                connection, reused = self._connect(), False
+            except Exception:
+                connection.close()
+                raise
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        return response.status, {key.lower(): value for key, value in response.getheaders()}, data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class Http2Pool:
+    """One multiplexed HTTP/2 connection through httpx (optional dependency: pip install 'httpx[http2]')."""
+
+    http_version = 'HTTP/2'
+
+    def __init__(self, base_url: str, size: int = 10, timeout: float = 30.0):
+        try:
+            import h2  # noqa: F401 (httpx only negotiates HTTP/2 when h2 is installed)
+            import httpx
+        except ImportError:
+            raise ValueError("HTTP/2 needs the httpx package with HTTP/2 support (pip install 'httpx[http2]')")
+        self.base_path = ''
+        self._client = httpx.Client(base_url=base_url.rstrip('/'), http2=True, timeout=timeout,
+                                    limits=httpx.Limits(max_connections=size, max_keepalive_connections=size))
+        # httpx doesn't expose its pool; with HTTP/2 every request shares one connection anyway
+        self.connections_opened = None
+
+    def request(self, method: str, path: str, body: bytes = None,
+                headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+        response = self._client.request(method, path, content=body, headers=headers)
+        self.http_version = response.http_version
+        return response.status_code, {key.lower(): value for key, value in response.headers.items()}, response.content
+
+    def close(self):
+        self._client.close()
+
+
+class HttpTransport:
+    """Sends `api` test steps to API Gateway. Install as `lambda_tester.TRANSPORT`."""
+
+    def __init__(self, api_url: str, pool_size: int = 10, http2: bool = False, preflight: bool = False):
+        self.api_url = api_url
+        self.pool = (Http2Pool if http2 else ConnectionPool)(api_url, size=pool_size)
+        self.preflight = preflight
+        self.preflight_latency = LatencyHistogram()
+        self.requests = 0
+        self.gateway_errors = 0
+        self._lock = threading.Lock()
+
+    def _send_preflight(self, method: str, path: str):
+        start = time.perf_counter()
+        self.pool.request('OPTIONS', path, headers={
+            'Origin': PREFLIGHT_ORIGIN,
+            'Access-Control-Request-Method': method,
+            'Access-Control-Request-Headers': 'content-type'
+        })
+        with self._lock:
+            self.preflight_latency.record((time.perf_counter() - start) * 1000)
+
+    def _send(self, method: str, path: str, body: Optional[bytes]) -> Tuple[int, Dict[str, str], bytes, int]:
+        """Send the request, retrying 429s from API Gateway. Returns (status, headers, body, retries)."""
+        for attempt in range(lambda_tester.MAX_THROTTLE_RETRIES + 1):
+            status, headers, data = self.pool.request(method, path, body=body, headers=REQUEST_HEADERS)
+            if status != 429 or attempt == lambda_tester.MAX_THROTTLE_RETRIES:
+                return status, headers, data, attempt
+            time.sleep(jittered_backoff(attempt))
+
+    def invoke(self, function_name: str, test_case: dict, stage: str) -> dict:
+        """Same contract as `lambda_tester.invoke_lambda`; `stage` is fixed by the API URL."""
+        timer = phase_timer(lambda_tester.PROFILER, function_name)
+        log(f"Starting test: {function_name}", verbose=True)
+        start = time.perf_counter()
+        try:
+            method, path, body = build_request(function_name, test_case)
+            timer.mark('build')
+            if self.preflight and method != 'GET':
+                self._send_preflight(method, path)
+            start = time.perf_counter()
+            status_code, headers, data, retries = self._send(method, path, body)
+            timer.mark('invoke')
+            text = data.decode()
+            latency_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.requests += 1
+                if 'x-amzn-errortype' in headers:
+                    self.gateway_errors += 1
+        except Exception as e:
+            log(f"Test error: {function_name} ({str(e)})")
+            return {
+                'function': function_name,
+                'status': 'ERROR',
+                'error': str(e),
+                'latencyMs': (time.perf_counter() - start) * 1000,
+                'retries': 0,
+                'throttled': False
+            }
+
+        error_body = None
+        if status_code != 200:
+            try:
+                error_body = json.loads(text) if text else None
+            except ValueError:
+                error_body = text
+            log(f"Test failed: {function_name} (Status: {status_code})", verbose=True)
+            if error_body:
+                log(f"Error details: {error_body}", verbose=True)
+        else:
+            log(f"Test passed: {function_name}", verbose=True)
+        timer.mark('decode')
+
+        return {
+            'function': function_name,
+            'status': 'PASS' if status_code == 200 else 'FAIL',
+            'statusCode': status_code,
+            # Shaped like a proxy-integration Lambda response so `body.*` outputs resolve unchanged
+            'response': {'statusCode': status_code, 'headers': headers, 'body': text},
+            'error': error_body,
+            'latencyMs': latency_ms,
+            'retries': retries,
+            'throttled': status_code == 429
+        }
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            report = {
+                'apiUrl': self.api_url,
+                'httpVersion': self.pool.http_version,
+                'requests': self.requests,
+                'connectionsOpened': self.pool.connections_opened,
+                'gatewayErrors': self.gateway_errors
+            }
+            if self.preflight:
+                report['preflightMs'] = self.preflight_latency.summary()
+        return report
+
+    def close(self):
+        self.pool.close()
+
+
+class StubApiServer:
+    """Offline stand-in for the API Gateway stage, proxying each route to a Lambda on the active backend."""
+
+    def __init__(self, stage: str = None, host: str = '127.0.0.1', port: int = 0, added_latency_ms: float = 0.0):
+        self.stage = stage or os.environ.get('STAGE', 'dev')
+        self.added_latency_ms = added_latency_ms
+        self.routes = [(method, re.compile('^' + PATH_PARAMETER.sub(r'(?P<\1>[^/]+)', template) + '$'),
+                        template, function)
+                       for function, (method, template) in ROUTES.items()]
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def match(self, method: str, path: str):
+        """(function, resource template, path parameters) for a request, or None if no route matches."""
+        for route_method, pattern, template, function in self.routes:
+            found = pattern.match(path)
+            if found and route_method == method:
+                return function, template, {key: unquote(value) for key, value in found.groupdict().items()}
+        return None
+
+    def allowed_methods(self, path: str):
+        return sorted({method for method, pattern, _, _ in self.routes if pattern.match(path)})
+
+    def proxy_event(self, method: str, path: str, template: str, path_parameters: Dict[str, str],
+                    headers: Dict[str, str], body: Optional[str]) -> Dict[str, Any]:
+        """The REST API proxy-integration event API Gateway sends for this request."""
+        return {
+            'resource': template,
+            'path': path,
+            'httpMethod': method,
+            'headers': headers,
+            'queryStringParameters': None,
+            'pathParameters': path_parameters or None,
+            'body': body,
+            'isBase64Encoded': False,
+            'requestContext': {
+                'resourcePath': template,
+                'httpMethod': method,
+                'path': '/v1' + path,
+                'stage': 'v1',
+                'requestId': str(uuid.uuid4()),
+                'requestTimeEpoch': int(time.time() * 1000),
+                'identity': {'sourceIp': '127.0.0.1'}
+            }
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; without TCP_NODELAY each reply waits on delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes = b'', headers: Dict[str, str] = None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _path(self) -> str:
+                path = urlsplit(self.path).path
+                return path[len('/v1'):] if path.startswith('/v1/') else path
+
+            def do_OPTIONS(self):
+                methods = server.allowed_methods(self._path())
+                if not methods:
+                    return self._missing_route()
+                self._reply(204, headers={
+                    'Access-Control-Allow-Methods': ','.join(['OPTIONS'] + methods),
+                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'
+                })
+
+            def _missing_route(self):
+                self._reply(403, json.dumps({'message': 'Missing Authentication Token'}).encode(),
+                            {'Content-Type': 'application/json', 'x-amzn-ErrorType': 'MissingAuthenticationTokenException'})
+
+            def _proxy(self):
+                path = self._path()
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode() if length else None
+                matched = server.match(self.command, path)
+                if not matched:
+                    return self._missing_route()
+                function, template, path_parameters = matched
+                if server.added_latency_ms:
+                    time.sleep(server.added_latency_ms / 1000)
+                event = server.proxy_event(self.command, path, template, path_parameters, dict(self.headers), body)
+                try:
+                    response = lambda_tester.get_lambda_client().invoke(
+                        FunctionName=f"{function}-{server.stage}",
+                        InvocationType='RequestResponse',
+                        Payload=json.dumps(event)
+                    )
+                    payload = json.loads(response['Payload'].read())
+                except Exception as e:
+                    log(f"Stub API: {function} invoke failed ({str(e)})")
+                    payload, response = None, {'FunctionError': 'Unhandled'}
+                if response.get('FunctionError') or not isinstance(payload, dict) or 'statusCode' not in payload:
+                    # What API Gateway returns when a proxy integration's response is malformed or errored
+                    return self._reply(502, json.dumps({'message': 'Internal server error'}).encode(),
+                                       {'Content-Type': 'application/json', 'x-amzn-ErrorType': 'InternalServerErrorException'})
+                body_out = payload.get('body') or ''
+                self._reply(int(payload['statusCode']), body_out.encode(),
+                            {'Content-Type': 'application/json', **(payload.get('headers') or {})})
+
+            do_GET = _proxy
+            do_POST = _proxy
+            do_PUT = _proxy
+            do_DELETE = _proxy
+
+        return Handler
+
+    def start(self) -> 'StubApiServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def gateway_overhead(invoke_functions: Dict[str, Any], http_functions: Dict[str, Any]) -> Dict[str, Any]:
+    """Per function: p50/p99 client latency via direct invoke and via HTTP, and the share HTTP adds."""
+    overhead = {}
+    for name, http_metrics in sorted(http_functions.items()):
+        invoke_metrics = invoke_functions.get(name)
+        if not invoke_metrics or not http_metrics['latencyMs'].get('count') or name not in ROUTES:
+            continue
+        invoke_ms, http_ms = invoke_metrics['latencyMs'], http_metrics['latencyMs']
+        overhead[name] = {
+            'invokeP50Ms': invoke_ms['p50'],
+            'httpP50Ms': http_ms['p50'],
+            'addedP50Ms': round(http_ms['p50'] - invoke_ms['p50'], 3),
+            'invokeP99Ms': invoke_ms['p99'],
+            'httpP99Ms': http_ms['p99'],
+            'gatewayShare': round(max(http_ms['p50'] - invoke_ms['p50'], 0.0) / http_ms['p50'], 4) if http_ms['p50'] else 0.0
+        }
+    return overhead
+
+
+def compare_transports(api_url: str, table_name: str = None, stage: str = None, users: int = 50,
+                       concurrency: int = 1, chains=None, http2: bool = False, preflight: bool = False) -> Dict[str, Any]:
+    """Run the same load through direct invoke and then through API Gateway, and compare latencies."""
+    from load_generator import run_load
+
+    previous = lambda_tester.TRANSPORT
+    load = dict(table_name=table_name, stage=stage, users=users, concurrency=concurrency, chains=chains)
+    try:
+        lambda_tester.TRANSPORT = None
+        log("Comparison pass 1/2: direct invoke")
+        invoke_run = run_load(**load)
+        transport = lambda_tester.TRANSPORT = HttpTransport(api_url, pool_size=concurrency, http2=http2,
+                                                            preflight=preflight)
+        log(f"Comparison pass 2/2: HTTP via {api_url}")
+        http_run = run_load(**load)
+        transport.close()
+    finally:
+        lambda_tester.TRANSPORT = previous
+    return {
+        'users': users,
+        'concurrency': concurrency,
+        'transport': transport.report(),
+        'functions': gateway_overhead(invoke_run['functions'], http_run['functions']),
+        'chainThroughput': {'invoke': invoke_run['chains']['throughput'], 'http': http_run['chains']['throughput']}
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    from backends import use_backend
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Serve a stub API Gateway, or compare HTTP and direct-invoke latency')
+    parser.add_argument('--backend', choices=['aws', 'local'],
+                        help='Backend the Lambdas run on (defaults to LAMBDA_TESTER_BACKEND, else aws)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='Run the stub API Gateway in the foreground')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--added-latency-ms', type=float, default=0.0,
+                       help='Delay added to every proxied request, to model gateway overhead offline')
+    compare = commands.add_parser('compare', help='Run the same chains via direct invoke and via HTTP')
+    compare.add_argument('--table-name', required=True, help='DynamoDB table name')
+    compare.add_argument('--api-url', help='Stage URL (defaults to API_URL, else the ApiGatewayUrl export)')
+    compare.add_argument('--stub', action='store_true', help='Compare against a stub API Gateway started in-process')
+    compare.add_argument('--users', type=int, default=50, help='User chains per pass (default: 50)')
+    compare.add_argument('--concurrency', type=int, default=1, help='Chains in flight per pass (default: 1)')
+    compare.add_argument('--chains', default='user', help='Comma-separated test-DAG chains (default: user)')
+    compare.add_argument('--http2', action='store_true', help='Use HTTP/2 (needs httpx[http2])')
+    compare.add_argument('--preflight', action='store_true', help='Send a CORS preflight before each POST')
+    args = parser.parse_args()
+
+    load_env()
+    if args.backend:
+        use_backend(args.backend)
+    if args.command == 'serve':
+        server = StubApiServer(stage=args.stage, port=args.port, added_latency_ms=args.added_latency_ms)
+        log(f"Stub API Gateway for stage {server.stage} listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
+    else:
+        lambda_tester.VERBOSE = False
+        stub = StubApiServer(stage=args.stage).start() if args.stub else None
+        try:
+            comparison = compare_transports(
+                api_url=stub.url if stub else (args.api_url or resolve_api_url()),
+                table_name=args.table_name,
+                stage=args.stage,
+                users=args.users,
+                concurrency=args.concurrency,
+                chains=args.chains.split(','),
+                http2=args.http2,
+                preflight=args.preflight
+            )
+        finally:
+            if stub:
+                stub.stop()
+        print(json.dumps(comparison, indent=2))
@@ -0,0 +1,187 @@
+"""Helpers for measuring Lambdas from their own REPORT log lines.
+
+Invoking with `LogType='Tail'` returns the last 4 KB of the execution log,
+which ends with the platform's REPORT line:
+
+    REPORT RequestId: ... Duration: 12.34 ms Billed Duration: 13 ms
+    Memory Size: 512 MB Max Memory Used: 150 MB Init Duration: 2345.67 ms
+
+Init Duration is only present when the invocation ran in a fresh execution
+environment, which is how cold starts are told apart from warm ones.
+
+Payloads come from each function's `test` block in config.json or, for
+functions outside the test chains (GoalProgressCreator), its `benchmark`
+block; a payload file given on the command line overrides both.
+`BenchmarkData` fills them with real IDs from one setup pass of the test
+DAG, so a GetUser sample times a found user rather than the 404 path, and
+deletes every user the setup pass and the measured calls create.
+"""
+import base64
+import json
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import lambda_tester
+from chain_dag import Step, load_lambda_configs, load_steps
+from lambda_tester import create_api_gateway_event, extract_user_id, log, setup_variables
+
+REPORT_FIELDS = {
+    'durationMs': re.compile(r'(?<!Billed )(?<!Init )Duration: ([\d.]+) ms'),
+    'billedDurationMs': re.compile(r'Billed Duration: ([\d.]+) ms'),
+    'memorySizeMb': re.compile(r'Memory Size: (\d+) MB'),
+    'maxMemoryUsedMb': re.compile(r'Max Memory Used: (\d+) MB'),
+    'initDurationMs': re.compile(r'Init Duration: ([\d.]+) ms'),
+}
+
+# Environment variable bumped to force Lambda to discard its warm execution environments
+COLD_START_VARIABLE = 'LAMBDA_TESTER_COLD_START_NONCE'
+
+
+def parse_report(log_tail: str) -> Optional[Dict[str, float]]:
+    """Parse the last REPORT line in a log tail. Returns None if there is no REPORT line."""
+    report_lines = [line for line in log_tail.splitlines() if line.startswith('REPORT ')]
+    if not report_lines:
+        return None
+    report = {}
+    for field, pattern in REPORT_FIELDS.items():
+        match = pattern.search(report_lines[-1])
+        if match:
+            report[field] = float(match.group(1))
+    return report
+
+
+def build_step_payload(step: Step, variables: Dict[str, Any] = None) -> bytes:
+    """Build the invocation payload for a test-DAG step, filling unknown inputs with synthetic values."""
+    values = {name: f"benchmark-{name}-{uuid.uuid4().hex[:8]}" for name in step.inputs}
+    values.update(variables or {})
+    event = step.build_event(values)
+    if step.invoke == 'api':
+        event = create_api_gateway_event(event)
+    return json.dumps(event).encode()
+
+
+def benchmark_steps(config_path: Path = None) -> Dict[str, Step]:
+    """Payload template per function: its `test` block, else its `benchmark` block."""
+    steps = {}
+    for config in load_lambda_configs(config_path):
+        block = config.get('test') or config.get('benchmark')
+        if block:
+            steps[config['name']] = Step(config['name'], block)
+    return steps
+
+
+class BenchmarkData:
+    """Payloads for single-function measurements, and cleanup of the users they create.
+
+    The first payload runs one setup pass of the test DAG (as rate_controller
+    does) for real variables (userId, characterName, ...). Every payload is
+    built fresh with a new email, so repeated CreateUser calls don't hit its
+    duplicate check. A payload file, if given, is sent as-is instead.
+    `observe` each sample so `close` can delete the users CreateUser made.
+    """
+
+    def __init__(self, stage: str, table_name: str, payload_path: str = None, retain_data: bool = False):
+        self.stage = stage
+        self.table_name = table_name
+        self.retain_data = retain_data
+        lambda_tester.get_backend().use_table(table_name)
+        self.user_ids: List[str] = []
+        self._payload = Path(payload_path).read_bytes() if payload_path else None
+        self._steps = benchmark_steps()
+        self._variables = None
+        self._lock = threading.Lock()
+
+    def check(self, function_name: str):
+        if self._payload is None and function_name not in self._steps:
+            raise ValueError(f"{function_name} has no test or benchmark block in config.json; pass a payload file")
+
+    def variables(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._variables is None:
+                log(f"Running a setup pass of the test DAG in stage: {self.stage}")
+                self._variables = setup_variables(load_steps(), self.stage)
+                if self._variables.get('userId'):
+                    self.user_ids.append(self._variables['userId'])
+            return self._variables
+
+    def payload(self, function_name: str) -> bytes:
+        self.check(function_name)
+        if self._payload is not None:
+            return self._payload
+        return build_step_payload(self._steps[function_name],
+                                  {**self.variables(), 'email': f"{uuid.uuid4()}@email.com"})
+
+    def observe(self, function_name: str, sample: Dict[str, Any]):
+        """Remember the user a passing CreateUser sample created."""
+        if not isinstance(sample['response'], dict):
+            return
+        user_id = extract_user_id([{'function': function_name, 'status': 'FAIL' if sample['failed'] else 'PASS',
+                                    'response': sample['response']}])
+        if user_id:
+            with self._lock:
+                self.user_ids.append(user_id)
+
+    def close(self):
+        """Delete the created users, or with `retain_data` record them for bulk_cleanup.py --run-id."""
+        from load_generator import new_run_id, release_users
+        if self.user_ids:
+            release_users(new_run_id(), self.table_name, self.user_ids, self.retain_data)
+
+
+def invoke_with_report(full_function_name: str, payload: bytes) -> Dict[str, Any]:
+    """Invoke synchronously with the log tail and return the parsed REPORT plus client-side latency.
+
+    A sample is `failed` on a function error, an `errorMessage` payload, or a
+    `statusCode` other than 200, so error responses aren't timed as successes.
+    """
+    start = time.perf_counter()
+    response = lambda_tester.get_lambda_client().invoke(
+        FunctionName=full_function_name,
+        InvocationType='RequestResponse',
+        LogType='Tail',
+        Payload=payload
+    )
+    raw_payload = response['Payload'].read()
+    latency_ms = (time.perf_counter() - start) * 1000
+
+    try:
+        result = json.loads(raw_payload)
+    except ValueError:
+        result = None
+    status_code = result.get('statusCode') if isinstance(result, dict) else None
+    log_tail = base64.b64decode(response.get('LogResult', '')).decode('utf-8', errors='replace')
+    return {
+        'clientLatencyMs': latency_ms,
+        'functionError': response.get('FunctionError'),
+        'statusCode': status_code,
+        'failed': bool(response.get('FunctionError')) or (status_code is not None and status_code != 200)
+                  or (isinstance(result, dict) and 'errorMessage' in result),
+        'response': result,
+        'report': parse_report(log_tail)
+    }
+
+
+def update_configuration_and_wait(full_function_name: str, **configuration):
+    """Apply a configuration change and block until Lambda reports the update as Successful."""
+    lambda_client = lambda_tester.get_lambda_client()
+    lambda_client.update_function_configuration(FunctionName=full_function_name, **configuration)
+    lambda_client.get_waiter('function_updated').wait(FunctionName=full_function_name)
+
+
+def force_cold_start(full_function_name: str) -> Dict[str, str]:
+    """Bump a harmless environment variable so the next invocation gets a fresh execution environment.
+
+    Returns the function's environment variables as they were before the
+    bump so the caller can restore them.
+    """
+    configuration = lambda_tester.get_lambda_client().get_function_configuration(FunctionName=full_function_name)
+    variables = configuration.get('Environment', {}).get('Variables', {})
+    update_configuration_and_wait(
+        full_function_name,
+        Environment={'Variables': {**variables, COLD_START_VARIABLE: uuid.uuid4().hex}}
+    )
+    return {name: value for name, value in variables.items() if name != COLD_START_VARIABLE}
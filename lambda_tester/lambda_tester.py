@@ -1,25 +1,56 @@
+import functools
 import json
-import boto3
 import os
+import threading
 import uuid
 import datetime
-import concurrent.futures
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
 import sys
 from pathlib import Path
 
-def log(message: str):
-    """Print log message with timestamp"""
+from backends import get_backend, use_backend
+from backoff import jittered_backoff, is_throttle, is_unsent
+from chain_dag import Step, load_steps, run_dag, skipped_steps
+from event_templates import EventTemplate, dumps
+from profiling import phase_timer
+from result_sink import ResultSink
+
+# Per-invocation log lines are suppressed when False (e.g. during load runs)
+VERBOSE = True
+
+# Where log lines go (None: stdout); stderr when results are streamed to stdout
+LOG_FILE = None
+
+# Throttled (TooManyRequestsException) and transiently failed invocations are retried this many times with jittered backoff
+MAX_THROTTLE_RETRIES = 5
+
+# When set (a traffic_replay.TrafficRecorder), every invocation payload is recorded for later replay
+RECORDER = None
+
+# When set (a profiling.PhaseProfiler), every invocation's build/invoke/read/decode phases are timed
+PROFILER = None
+
+# When set (an http_transport.HttpTransport), API steps are sent through API Gateway instead of invoked directly
+TRANSPORT = None
+
+def log(message: str, verbose: bool = False):
+    """Print log message with timestamp. Verbose messages are dropped when VERBOSE is off."""
+    if verbose and not VERBOSE:
+        return
     timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    print(f"[{timestamp}] {message}")
+    print(f"[{timestamp}] {message}", file=LOG_FILE)
 
 def load_env():
-    """Load environment variables from .env file"""
+    """Load environment variables from .env file, if there is one.
+
+    Without it the local backend still works; the aws backend falls back to
+    boto3's own credential chain and fails on first use if it finds nothing.
+    """
     env_path = Path(__file__).parent.parent / '.env'
     if not env_path.exists():
-        print("Error: .env file not found")
-        sys.exit(1)
-    
+        return
+
     with open(env_path) as f:
         for line in f:
             line = line.strip()
@@ -31,16 +62,23 @@ def load_env():
 if __name__ == '__main__':
     load_env()
 
-# Configure AWS clients
-region = os.environ.get('AWS_REGION', 'us-west-2')
-profile = os.environ.get('AWS_PROFILE') or (
-    os.environ.get('SSO_PROFILE') if os.environ.get('USE_SSO') == 'true'
-    else os.environ.get('LOCAL_PROFILE')
-)
+# AWS clients come from the active backend (real AWS or the offline stand-ins, see backends.py)
+def get_lambda_client():
+    return get_backend().lambda_client()
+
+def get_invoke_client():
+    """Lambda client for the tester's own Invoke calls; it doesn't retry, invoke_with_throttle_retry does."""
+    return get_backend().invoke_client()
+
+def get_dynamodb():
+    return get_backend().dynamodb()
+
+def get_dynamodb_client():
+    """DynamoDB client taking plain Python values, shared across threads."""
+    return get_backend().dynamodb_client()
 
-session = boto3.Session(profile_name=profile, region_name=region)
-lambda_client = session.client('lambda')
-dynamodb = session.resource('dynamodb', region_name='us-west-2')
+def get_events_client():
+    return get_backend().events_client()
 
 def create_api_gateway_event(test_case):
     """Create an API Gateway-like event for Lambda invocation."""
@@ -73,20 +111,66 @@ def create_api_gateway_event(test_case):
         **test_case
     }
 
+# The envelope above serialized once; invoke_lambda splices each test case into it
+API_GATEWAY_TEMPLATE = EventTemplate(create_api_gateway_event({}))
+
+def recorded(invoke_type: str):
+    """Record the wrapped invoke function's payloads to RECORDER, when one is installed."""
+    def decorator(invoke):
+        @functools.wraps(invoke)
+        def wrapper(function_name: str, event: dict, stage: str) -> dict:
+            if not RECORDER:
+                return invoke(function_name, event, stage)
+            started = time.monotonic()
+            result = invoke(function_name, event, stage)
+            RECORDER.record(function_name, invoke_type, event, started, result)
+            return result
+        return wrapper
+    return decorator
+
+def invoke_with_throttle_retry(full_function_name: str, payload: bytes) -> tuple:
+    """Invoke synchronously, retrying throttles and connection failures. Returns (response, retries).
+
+    Only errors that mean the function did not run are retried: a 5xx, a
+    read timeout or a connection dropped mid-request may follow a run, and
+    most service functions (CreateUser, ...) aren't idempotent. An exception
+    that escapes carries `retries` and `throttled` attributes.
+    """
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        try:
+            response = get_invoke_client().invoke(
+                FunctionName=full_function_name,
+                InvocationType='RequestResponse',
+                Payload=payload
+            )
+            return response, attempt
+        except Exception as e:
+            if not (is_throttle(e) or is_unsent(e)) or attempt == MAX_THROTTLE_RETRIES:
+                e.retries = attempt
+                e.throttled = is_throttle(e)
+                raise
+            time.sleep(jittered_backoff(attempt))
+
+@recorded('api')
 def invoke_lambda(function_name: str, test_case: dict, stage: str) -> dict:
     """Invoke a Lambda function and return its response."""
+    if TRANSPORT:
+        return TRANSPORT.invoke(function_name, test_case, stage)
     full_function_name = f"{function_name}-{stage}"
-    test_event = create_api_gateway_event(test_case)
+    timer = phase_timer(PROFILER, function_name)
+    payload = API_GATEWAY_TEMPLATE.render(test_case)
+    timer.mark('build')
 
-    log(f"Starting test: {function_name}")
+    log(f"Starting test: {function_name}", verbose=True)
+    start = time.perf_counter()
     try:
-        response = lambda_client.invoke(
-            FunctionName=full_function_name,
-            InvocationType='RequestResponse',
-            Payload=json.dumps(test_event)
-        )
-
-        response_payload = json.loads(response['Payload'].read().decode())
+        response, retries = invoke_with_throttle_retry(full_function_name, payload)
+        timer.mark('invoke')
+        raw_payload = response['Payload'].read()
+        timer.mark('read')
+        response_payload = json.loads(raw_payload)
+        timer.mark('decode')
+        latency_ms = (time.perf_counter() - start) * 1000
         status_code = response_payload.get('statusCode', 500)
 
         if status_code != 200:
@@ -95,18 +179,20 @@ def invoke_lambda(function_name: str, test_case: dict, stage: str) -> dict:
                 error_body = json.loads(error_body) if error_body else None
             except:
                 pass
-            log(f"Test failed: {function_name} (Status: {status_code})")
+            log(f"Test failed: {function_name} (Status: {status_code})", verbose=True)
             if error_body:
-                log(f"Error details: {error_body}")
+                log(f"Error details: {error_body}", verbose=True)
         else:
-            log(f"Test passed: {function_name}")
+            log(f"Test passed: {function_name}", verbose=True)
 
         return {
             'function': function_name,
             'status': 'PASS' if status_code == 200 else 'FAIL',
             'statusCode': status_code,
             'response': response_payload,
-            'error': error_body if status_code != 200 else None
+            'error': error_body if status_code != 200 else None,
+            'latencyMs': latency_ms,
+            'retries': retries
         }
 
     except Exception as e:
@@ -114,204 +200,50 @@ def invoke_lambda(function_name: str, test_case: dict, stage: str) -> dict:
         return {
             'function': function_name,
             'status': 'ERROR',
-            'error': str(e)
-        }
-
-def execute_character_chain(stage: str, user_id: str) -> List[Dict[str, Any]]:
-    """Execute character-related operations for a user."""
-    log("Starting character chain tests...")
-    results = []
-
-    # Add Character to User
-    add_character_result = invoke_lambda('AddCharacterToUser', {
-        'pathParameters': {
-            'userId': user_id,
-            'name': 'characterN'
+            'error': str(e),
+            'latencyMs': (time.perf_counter() - start) * 1000,
+            'retries': getattr(e, 'retries', 0),
+            'throttled': getattr(e, 'throttled', False)
         }
-    }, stage)
-    results.append(add_character_result)
-
-    # Get Characters for User (validate add character)
-    if add_character_result['status'] == 'PASS':
-        results.append(invoke_lambda('GetCharactersForUser', {
-            'pathParameters': {
-                'userId': user_id
-            }
-        }, stage))
-
-    log("Completed character chain tests")
-    return results
-
-def execute_notification_chain(stage: str, user_id: str, email: str) -> List[Dict[str, Any]]:
-    """Execute notification-related operations for a user."""
-    log("Starting notification chain tests...")
-    results = []
-
-    # Create Notification Channel
-    create_channel_result = invoke_lambda('CreateNotificationChannelForUser', {
-        'pathParameters': {
-            'userId': user_id
-        },
-        'body': json.dumps({
-            'channelType': 'EMAIL',
-            'identifier': email
-        })
-    }, stage)
-    results.append(create_channel_result)
-
-    # Get Notification Channels (validate create channel)
-    if create_channel_result['status'] == 'PASS':
-        results.append(invoke_lambda('GetNotificationChannelsForUser', {
-            'pathParameters': {
-                'userId': user_id
-            }
-        }, stage))
-
-    log("Completed notification chain tests")
-    return results
-
-def execute_user_chain(stage: str, test_email: str) -> List[Dict[str, Any]]:
-    """Execute the user-related Lambda chain with parallel sub-chains."""
-    log("Starting user chain tests...")
-    results = []
-
-    # Step 1: Create User (root of the tree)
-    create_user_result = invoke_lambda('CreateUser', {
-        'body': json.dumps({
-            'email': test_email
-        })
-    }, stage)
-    results.append(create_user_result)
-
-    if create_user_result['status'] == 'PASS':
-        response_body = json.loads(create_user_result['response'].get('body', '{}'))
-        user_id = response_body.get('userId')
-
-        # Step 2: Get User (validates create user)
-        get_user_result = invoke_lambda('GetUser', {
-            'pathParameters': {
-                'userId': user_id
-            }
-        }, stage)
-        results.append(get_user_result)
-
-        if get_user_result['status'] == 'PASS':
-            log("Starting parallel character and notification chains...")
-            # Execute character and notification chains in parallel
-            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-                # Submit independent chains
-                character_chain = executor.submit(execute_character_chain, stage, user_id)
-                notification_chain = executor.submit(execute_notification_chain, stage, user_id, test_email)
-
-                # Gather results from all chains
-                results.extend(character_chain.result())
-                results.extend(notification_chain.result())
-            log("Completed parallel chains")
-
-    log("Completed user chain tests")
-    return results
-
-def execute_hiscores_chain(stage: str) -> List[Dict[str, Any]]:
-    """Execute the hiscores Lambda chain (independent of user)."""
-    log("Starting hiscores chain test...")
-    results = [invoke_lambda('GetCharacterHiscores', {
-        'pathParameters': {
-            'name': 'SoloMission'
-        }
-    }, stage)]
-    log("Completed hiscores chain test")
-    return results
-
-def execute_goal_chain(stage: str, user_id: str, character_name: str) -> List[Dict[str, Any]]:
-    """Execute goal creation test."""
-    log("Starting goal creation test...")
-    results = []
-
-    # Create a goal using direct lambda invocation
-    goal_creation_event = {
-        'version': '0',
-        'id': 'test-event-id',
-        'detail-type': 'Goal Creation Request',
-        'source': 'osrs.goals',
-        'account': '123456789012',
-        'time': '2024-03-20T15:00:00Z',
-        'region': 'us-east-1',
-        'detail': {
-            'userId': user_id,
-            'characterName': character_name,
-            'targetAttribute': 'SMITHING',
-            'targetType': 'SKILL',
-            'targetValue': 99,
-            'currentValue': 1,
-            'targetDate': '2024-12-31T23:59:59Z',
-            'notificationChannelType': 'DISCORD',
-            'frequency': 'WEEKLY'
-        }
-    }
-
-    # Note: For this lambda, we pass the event directly without API Gateway wrapping
-    create_goal_result = invoke_lambda_direct('CreateGoalFromGoalCreationRequestEvent', goal_creation_event, stage)
-    results.append(create_goal_result)
-
-    log("Completed goal creation test")
-    return results
-
-def execute_goal_creation_request_producer_test(stage: str, user_id: str) -> List[Dict[str, Any]]:
-    """Execute goal creation request producer test independently."""
-    log("Starting goal creation request producer test...")
-    
-    # Test data for the GoalCreationRequestEventProducer lambda
-    test_data = {
-        'pathParameters': {
-            'userId': user_id,
-            'name': 'test-character'
-        },
-        'body': json.dumps({
-            'targetAttribute': 'WOODCUTTING',
-            'targetType': 'SKILL',
-            'targetValue': 99,
-            'currentValue': 1,
-            'targetDate': '2024-12-31T23:59:59Z',
-            'notificationChannelType': 'EMAIL',
-            'frequency': 'DAILY'
-        })
-    }
-    
-    # Invoke the lambda with API Gateway-like event
-    result = invoke_lambda('GoalCreationRequestEventProducer', test_data, stage)
-    
-    log("Completed goal creation request producer test")
-    return [result]
 
+@recorded('direct')
 def invoke_lambda_direct(function_name: str, event: dict, stage: str) -> dict:
     """Invoke a Lambda function directly without API Gateway wrapping and return its response."""
     full_function_name = f"{function_name}-{stage}"
+    timer = phase_timer(PROFILER, function_name)
+    payload = dumps(event)
+    timer.mark('build')
 
-    log(f"Starting test: {function_name}")
+    log(f"Starting test: {function_name}", verbose=True)
+    start = time.perf_counter()
     try:
-        response = lambda_client.invoke(
-            FunctionName=full_function_name,
-            InvocationType='RequestResponse',
-            Payload=json.dumps(event)
-        )
-
-        response_payload = json.loads(response['Payload'].read().decode())
+        response, retries = invoke_with_throttle_retry(full_function_name, payload)
+        timer.mark('invoke')
+        raw_payload = response['Payload'].read()
+        timer.mark('read')
+        response_payload = json.loads(raw_payload)
+        timer.mark('decode')
+        latency_ms = (time.perf_counter() - start) * 1000
         
         # Check if the response is an error
         if isinstance(response_payload, dict) and 'errorMessage' in response_payload:
-            log(f"Test failed: {function_name}")
-            log(f"Error details: {response_payload['errorMessage']}")
+            log(f"Test failed: {function_name}", verbose=True)
+            log(f"Error details: {response_payload['errorMessage']}", verbose=True)
             return {
                 'function': function_name,
                 'status': 'FAIL',
-                'error': response_payload['errorMessage']
+                'error': response_payload['errorMessage'],
+                'latencyMs': latency_ms,
+                'retries': retries
             }
         
-        log(f"Test passed: {function_name}")
+        log(f"Test passed: {function_name}", verbose=True)
         return {
             'function': function_name,
             'status': 'PASS',
-            'response': response_payload
+            'response': response_payload,
+            'latencyMs': latency_ms,
+            'retries': retries
         }
 
     except Exception as e:
@@ -319,38 +251,54 @@ def invoke_lambda_direct(function_name: str, event: dict, stage: str) -> dict:
         return {
             'function': function_name,
             'status': 'ERROR',
-            'error': str(e)
+            'error': str(e),
+            'latencyMs': (time.perf_counter() - start) * 1000,
+            'retries': getattr(e, 'retries', 0),
+            'throttled': getattr(e, 'throttled', False)
         }
 
+def invoke_step(step: Step, event: dict, stage: str) -> dict:
+    """Invoke one test-DAG step with the event built from its template."""
+    if step.invoke == 'direct':
+        return invoke_lambda_direct(step.function, event, stage)
+    return invoke_lambda(step.function, event, stage)
+
+def extract_user_id(results: List[Dict[str, Any]]) -> Optional[str]:
+    """Return the userId created by CreateUser, if it passed."""
+    for result in results:
+        if result['function'] == 'CreateUser' and result['status'] == 'PASS':
+            return json.loads(result['response'].get('body', '{}')).get('userId')
+    return None
+
+def setup_variables(steps: List[Step], stage: str) -> Dict[str, Any]:
+    """Run the test DAG once and collect the variables its passing steps publish (userId, ...)."""
+    variables = {'email': f"{uuid.uuid4()}@email.com"}
+    lock = threading.Lock()
+
+    def setup_invoke(step: Step, event: Dict[str, Any], stage: str) -> Dict[str, Any]:
+        result = invoke_step(step, event, stage)
+        if result['status'] == 'PASS':
+            with lock:
+                variables.update(step.extract_outputs(event, result))
+        return result
+
+    run_dag(steps, stage, dict(variables), setup_invoke)
+    return variables
+
 def cleanup_test_data(table_name: str, user_id: str):
     """Delete all items in the partition for a given user ID."""
-    if not table_name:
-        raise ValueError("DynamoDB table name must be provided")
-    
-    table = dynamodb.Table(table_name)
-    
-    # Query all items in the partition
-    response = table.query(
-        KeyConditionExpression='pk = :pk',
-        ExpressionAttributeValues={
-            ':pk': f"USER#{user_id}"
-        }
-    )
-    
-    # Delete all items found
-    with table.batch_writer() as batch:
-        for item in response['Items']:
-            batch.delete_item(
-                Key={
-                    'pk': item['pk'],
-                    'sk': item['sk']
-                }
-            )
-    
-    log(f"Cleaned up test data for user {user_id}")
-
-def run_tests(stage: str = None, retain_data: bool = False, table_name: str = None) -> dict:
-    """Run all tests and return results. If stage is None, use environment variable."""
+    from bulk_cleanup import cleanup_users
+    result = cleanup_users(table_name, [user_id], max_workers=4)
+    if result['failedUsers']:
+        raise RuntimeError(result['failedUsers'][user_id])
+
+def run_tests(stage: str = None, retain_data: bool = False, table_name: str = None,
+              engine: str = 'threads', results_file: str = None, max_in_flight: int = None) -> dict:
+    """Run all tests and return results. If stage is None, use environment variable.
+
+    With `results_file`, every result is also streamed there as a JSON line ('-' for stdout).
+    `max_in_flight` caps outstanding invocations on the async engine (default 8).
+    """
     if stage is None:
         stage = os.environ.get('STAGE', 'dev')
     
@@ -360,82 +308,108 @@ def run_tests(stage: str = None, retain_data: bool = False, table_name: str = No
     if not table_name:
         raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
     
+    get_backend().use_table(table_name)
+    if engine == 'async':
+        from async_engine import run_tests_async
+        return run_tests_async(stage=stage, retain_data=retain_data, table_name=table_name,
+                               max_in_flight=max_in_flight, results_file=results_file)
+    if engine != 'threads':
+        raise ValueError(f"Unknown engine: {engine}")
+    
     test_email = f"{uuid.uuid4()}@email.com"
     log(f"Starting all tests in stage: {stage}")
     log(f"Using test email: {test_email}")
-    results = []
-    user_id = None
-
-    try:
-        # Execute main chains concurrently
-        log("Starting parallel test chains...")
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            # Submit all main chains
-            user_chain = executor.submit(execute_user_chain, stage, test_email)
-            hiscores_chain = executor.submit(execute_hiscores_chain, stage)
-
-            # Get user_id from user chain results
-            user_results = user_chain.result()
-            results.extend(user_results)
-            results.extend(hiscores_chain.result())
-
-            # Extract user_id from user chain results
-            for result in user_results:
-                if result['function'] == 'CreateUser' and result['status'] == 'PASS':
-                    response_body = json.loads(result['response'].get('body', '{}'))
-                    user_id = response_body.get('userId')
-
-            # If we have user_id, execute goal creation request producer test
-            if user_id:
-                results.extend(execute_goal_creation_request_producer_test(stage, user_id))
-
-            # Extract character_name from user chain results
-            character_name = None
-            for result in user_results:
-                if result['function'] == 'AddCharacterToUser' and result['status'] == 'PASS':
-                    character_name = 'characterN'  # This matches the name used in execute_character_chain
-
-            # If we have both user_id and character_name, execute goal chain
-            if user_id and character_name:
-                results.extend(execute_goal_chain(stage, user_id, character_name))
-
-        log("Completed all parallel test chains")
-
-    finally:
-        # Clean up test data unless retain_data is True
-        if user_id and not retain_data:
-            try:
-                cleanup_test_data(table_name, user_id)
-            except Exception as e:
-                log(f"Warning: Failed to clean up test data: {str(e)}")
-
-    # Process results into a cleaner format
-    passed_tests = [r['function'] for r in results if r['status'] == 'PASS']
-    failed_tests = [{
-        'function': r['function'],
-        'status': r['status'],
-        'statusCode': r.get('statusCode'),
-        'error': r['error']
-    } for r in results if r['status'] != 'PASS']
-
-    log(f"Tests completed. Passed: {len(passed_tests)}, Failed: {len(failed_tests)}")
-    return {
-        'passed': passed_tests,
-        'failed': failed_tests,
-        'summary': {
-            'total': len(results),
-            'passed': len(passed_tests),
-            'failed': len(failed_tests)
-        }
-    }
+    steps = load_steps()
+    invoked = []
+    user_ids = []
+
+    def on_result(result):
+        sink.write(result)
+        invoked.append(result['function'])
+        user_id = extract_user_id([result])
+        if user_id:
+            user_ids.append(user_id)
+
+    with ResultSink(results_file) as sink:
+        try:
+            # Each step starts as soon as the steps it depends on have passed
+            log(f"Starting test DAG ({len(steps)} steps)...")
+            run_dag(steps, stage, {'email': test_email}, invoke_step, on_result=on_result)
+            for name in skipped_steps(steps, invoked):
+                log(f"Skipped test: {name} (dependencies did not pass)")
+            log("Completed test DAG")
+
+        finally:
+            # Clean up test data unless retain_data is True
+            if user_ids and not retain_data:
+                try:
+                    cleanup_test_data(table_name, user_ids[0])
+                except Exception as e:
+                    log(f"Warning: Failed to clean up test data: {str(e)}")
+
+    return summarize_sink(sink)
+
+def summarize_results(results: List[Dict[str, Any]]) -> dict:
+    """Process raw invocation results into the passed/failed/summary report."""
+    sink = ResultSink()
+    for result in results:
+        sink.write(result)
+    return summarize_sink(sink)
+
+def summarize_sink(sink: ResultSink) -> dict:
+    """Build the passed/failed/summary report from a sink's running aggregates."""
+    report = sink.summary()
+    log(f"Tests completed. Passed: {report['summary']['passed']}, Failed: {report['summary']['failed']}")
+    return report
 
 def handler(event, context):
     """AWS Lambda handler."""
     retain_data = event.get('retain_data', False)
     table_name = event.get('table_name')
+    engine = event.get('engine', 'threads')
+    results_file = event.get('results_file')
+    if event.get('backend'):
+        use_backend(event['backend'])
+    if event.get('shard'):
+        # One slice of a coordinated load run (see coordinator.py); returns mergeable partial metrics
+        from process_driver import run_shard
+        return run_shard(event['shard'])
     if not table_name:
         raise ValueError("table_name must be provided in the event")
-    return run_tests(retain_data=retain_data, table_name=table_name)
+    if event.get('load', {}).get('workers'):
+        from coordinator import run_distributed_load
+        load = event['load']
+        return run_distributed_load(
+            workers=load['workers'],
+            fanout=event.get('fanout', 'lambda'),
+            function_name=event.get('function_name') or getattr(context, 'function_name', None),
+            table_name=table_name,
+            retain_data=retain_data,
+            users=load.get('users'),
+            rate=load.get('rate'),
+            concurrency=load.get('concurrency', 10),
+            duration=load.get('duration'),
+            engine=engine,
+            max_in_flight=load.get('max_in_flight'),
+            chains=load.get('chains')
+        )
+    if event.get('load'):
+        from load_generator import run_load
+        load = event['load']
+        return run_load(
+            table_name=table_name,
+            retain_data=retain_data,
+            users=load.get('users'),
+            rate=load.get('rate'),
+            concurrency=load.get('concurrency', 10),
+            duration=load.get('duration'),
+            engine=engine,
+            max_in_flight=load.get('max_in_flight'),
+            chains=load.get('chains'),
+            results_file=results_file
+        )
+    return run_tests(retain_data=retain_data, table_name=table_name, engine=engine, results_file=results_file,
+                     max_in_flight=event.get('max_in_flight'))
 
 if __name__ == '__main__':
     """Allow running the script locally."""
@@ -444,7 +418,144 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Run OSRS Goal Tracker tests')
     parser.add_argument('--retain-data', action='store_true', help='Retain test data after completion')
     parser.add_argument('--table-name', required=True, help='DynamoDB table name (required)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads',
+                        help='Invocation engine: a thread pool per chain or a single asyncio event loop (default: threads)')
+    parser.add_argument('--backend', choices=['aws', 'local'],
+                        help='Run against AWS or the offline in-process stand-ins (defaults to LAMBDA_TESTER_BACKEND, else aws)')
+    parser.add_argument('--record',
+                        help='Record every invocation payload to this traffic file (.jsonl, .jsonl.gz or .jsonl.zst) for traffic_replay.py')
+    parser.add_argument('--transport', choices=['invoke', 'http'], default='invoke',
+                        help='Invoke API steps directly with a synthetic API Gateway event, or send real HTTP requests to the API (default: invoke)')
+    parser.add_argument('--api-url',
+                        help='HTTP transport: stage URL (defaults to API_URL, else the ApiGatewayUrl stack export)')
+    parser.add_argument('--http2', action='store_true', help='HTTP transport: use HTTP/2 (needs httpx[http2])')
+    parser.add_argument('--preflight', action='store_true',
+                        help='HTTP transport: send a CORS preflight before each POST and time it separately')
+    parser.add_argument('--results-file',
+                        help="Stream every invocation result to this file as JSON lines ('-' for stdout)")
+    load_group = parser.add_argument_group('load generation')
+    load_group.add_argument('--load', action='store_true', help='Run many independent user chains instead of a single test pass')
+    load_group.add_argument('--users', type=int, help='Total number of user chains to run')
+    load_group.add_argument('--rate', type=float, help='Open-loop chain start rate (chains/sec); omit for fixed concurrency')
+    load_group.add_argument('--concurrency', type=int, default=10, help='Maximum user chains in flight (default: 10)')
+    load_group.add_argument('--duration', type=float, help='Stop starting new chains after this many seconds')
+    load_group.add_argument('--max-in-flight', type=int,
+                            help='Async engine only: global limit on concurrent Lambda invocations '
+                                 '(defaults to --concurrency, or 8 for a single test pass)')
+    load_group.add_argument('--chains', default='user',
+                            help='Comma-separated test-DAG chains each virtual user runs (default: user)')
+    load_group.add_argument('--processes', type=int, default=1,
+                            help='Split the load run across this many worker processes (default: 1)')
+    profile_group = parser.add_argument_group('profiling')
+    profile_group.add_argument('--profile-phases', action='store_true',
+                               help='Time the build/invoke/read/decode phases of every invocation, per function')
+    profile_group.add_argument('--cprofile',
+                               help='Profile the whole run with cProfile (all threads) and write the stats to this file')
+    parser.add_argument('--history', action='store_true',
+                        help='Save per-function latency distributions and throughput to the benchmark history (bench_history.py)')
     args = parser.parse_args()
+    if args.processes > 1 and (args.record or args.profile_phases or args.cprofile or args.transport == 'http'):
+        parser.error('--record, --profile-phases, --cprofile and --transport http are not supported with --processes')
+    if args.history and args.results_file == '-':
+        parser.error('--history needs a --results-file it can read back, not stdout')
+    if args.history and not args.results_file:
+        # The history is built from the streamed results; keep them in a scratch file
+        import tempfile
+        scratch_fd, args.results_file = tempfile.mkstemp(suffix='.jsonl')
+        os.close(scratch_fd)
+    else:
+        scratch_fd = None
     
-    results = run_tests(retain_data=args.retain_data, table_name=args.table_name)
-    print(json.dumps(results, indent=2)) 
\ No newline at end of file
+    if args.backend:
+        use_backend(args.backend)
+    # Run through the imported module: as a script this file is also __main__, whose globals
+    # (RECORDER, PROFILER, TRANSPORT) the load generator and async engine never see
+    import lambda_tester
+    if args.results_file == '-':
+        # Keep stdout to the JSON lines: logs and the final report go to stderr
+        LOG_FILE = lambda_tester.LOG_FILE = sys.stderr
+    if args.record:
+        from traffic_replay import TrafficRecorder
+        lambda_tester.RECORDER = TrafficRecorder(args.record)
+    if args.profile_phases:
+        from profiling import PhaseProfiler
+        lambda_tester.PROFILER = PhaseProfiler()
+    if args.transport == 'http':
+        from http_transport import HttpTransport, resolve_api_url
+        lambda_tester.TRANSPORT = HttpTransport(
+            args.api_url or resolve_api_url(),
+            pool_size=max(args.concurrency, args.max_in_flight or 0) if args.load else 10,
+            http2=args.http2,
+            preflight=args.preflight
+        )
+    run_profile = None
+    if args.cprofile:
+        from profiling import RunProfile
+        run_profile = RunProfile(args.cprofile).start()
+    try:
+        if args.load and args.processes > 1:
+            from process_driver import run_load_processes
+            results = run_load_processes(
+                stage=args.stage,
+                table_name=args.table_name,
+                processes=args.processes,
+                retain_data=args.retain_data,
+                users=args.users,
+                rate=args.rate,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                engine=args.engine,
+                max_in_flight=args.max_in_flight,
+                chains=args.chains.split(','),
+                results_file=args.results_file
+            )
+        elif args.load:
+            from load_generator import run_load
+            results = run_load(
+                stage=args.stage,
+                table_name=args.table_name,
+                retain_data=args.retain_data,
+                users=args.users,
+                rate=args.rate,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                engine=args.engine,
+                max_in_flight=args.max_in_flight,
+                chains=args.chains.split(','),
+                results_file=args.results_file
+            )
+        else:
+            results = lambda_tester.run_tests(stage=args.stage, retain_data=args.retain_data,
+                                              table_name=args.table_name, engine=args.engine,
+                                              results_file=args.results_file, max_in_flight=args.max_in_flight)
+    finally:
+        # Close the traffic file even on failure, so a compressed recording isn't left truncated
+        if lambda_tester.RECORDER:
+            lambda_tester.RECORDER.close()
+        if lambda_tester.TRANSPORT:
+            lambda_tester.TRANSPORT.close()
+        if run_profile:
+            run_profile.stop()
+    if args.history:
+        from bench_history import save_tester_run
+        if args.load and args.processes > 1:
+            from process_driver import shard_results_file
+            results_paths = [shard_results_file(args.results_file, shard) for shard in range(results['shards'])]
+        else:
+            results_paths = [args.results_file]
+        run_id = save_tester_run(results, results_paths, kind='load' if args.load else 'tests',
+                                 stage=args.stage or os.environ.get('STAGE', 'dev'))
+        log(f"Saved run {run_id} to the benchmark history")
+        if scratch_fd is not None:
+            for path in set(results_paths + [args.results_file]):
+                if os.path.exists(path):
+                    os.remove(path)
+    if lambda_tester.TRANSPORT:
+        results['transport'] = lambda_tester.TRANSPORT.report()
+    if lambda_tester.PROFILER:
+        results['phaseProfile'] = lambda_tester.PROFILER.report()
+    if run_profile:
+        log(f"cProfile stats written to {args.cprofile}; top functions by cumulative time:")
+        print(run_profile.top(), file=sys.stderr)
+    print(json.dumps(results, indent=2), file=sys.stderr if args.results_file == '-' else sys.stdout) 
\ No newline at end of file
@@ -0,0 +1,321 @@
+"""Load generation for the OSRS Goal Tracker Lambda chains.
+
+Runs many independent copies of the test DAG (by default just the `user`
+chain: CreateUser -> GetUser -> character and notification steps), each with
+its own email, either open-loop at a
+target start rate or closed-loop at a fixed concurrency, and reports
+per-function throughput, error rate and latency percentiles.
+
+Open-loop chains are timed from their scheduled start, not from when a
+worker picked them up, so a system that falls behind shows up in the
+report (`scheduleLagMs`, `chains.latencyMs`) instead of being hidden by a
+growing queue (coordinated omission).
+"""
+import os
+import threading
+import time
+import uuid
+import datetime
+import concurrent.futures
+from typing import List, Dict, Any, Callable
+
+import lambda_tester
+from backends import get_backend
+from bulk_cleanup import cleanup_users, record_run_users
+from chain_dag import Step, load_steps, run_dag
+from lambda_tester import log, invoke_step, extract_user_id
+from metrics import LatencyHistogram
+from result_sink import ResultSink
+
+
+class LoadStats:
+    """Thread-safe counters collected while a load run is in progress.
+
+    Invocation results go straight to a ResultSink (streamed as JSON lines if
+    it has a file, aggregated otherwise); only chain counters and the created
+    user IDs are kept here.
+    """
+
+    def __init__(self, sink: ResultSink = None):
+        self._lock = threading.Lock()
+        self.sink = sink or ResultSink()
+        self.metrics = self.sink.metrics
+        self.chains_started = 0
+        self.chains_completed = 0
+        self.chains_failed = 0
+        self.user_ids: List[str] = []
+        # Open-loop only: start delay past the schedule, and chain time measured from the schedule
+        self.schedule_lag = LatencyHistogram()
+        self.chain_latency = LatencyHistogram()
+
+    def chain_started(self, scheduled: float = None) -> int:
+        """Count a new chain (and its lag behind `scheduled`, a time.monotonic()) and return its sequence number."""
+        with self._lock:
+            if scheduled is not None:
+                self.schedule_lag.record(max(0.0, time.monotonic() - scheduled) * 1000)
+            self.chains_started += 1
+            return self.chains_started
+
+    def record_result(self, result: Dict[str, Any], chain: int):
+        """Stream one invocation result as it arrives."""
+        self.sink.write(result, chain=chain)
+
+    def record_chain(self, results: List[Dict[str, Any]], scheduled: float = None):
+        """Fold one finished user chain (its results already went through record_result) into the counters."""
+        user_id = extract_user_id(results)
+        with self._lock:
+            if scheduled is not None:
+                self.chain_latency.record((time.monotonic() - scheduled) * 1000)
+            self.chains_completed += 1
+            if any(r['status'] != 'PASS' for r in results):
+                self.chains_failed += 1
+            if user_id:
+                self.user_ids.append(user_id)
+
+    def record_chain_error(self, scheduled: float = None):
+        """Count a chain that raised before producing results."""
+        with self._lock:
+            if scheduled is not None:
+                self.chain_latency.record((time.monotonic() - scheduled) * 1000)
+            self.chains_completed += 1
+            self.chains_failed += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Chain counters, user IDs and the sink's aggregates, JSON-serializable, for merging elsewhere."""
+        with self._lock:
+            chains = {
+                'started': self.chains_started,
+                'completed': self.chains_completed,
+                'failed': self.chains_failed
+            }
+            user_ids = list(self.user_ids)
+            schedule = {'lag': self.schedule_lag.to_dict(), 'chainLatency': self.chain_latency.to_dict()}
+        return {'chains': chains, 'userIds': user_ids, 'schedule': schedule, 'results': self.sink.to_dict()}
+
+    def merge_dict(self, data: Dict[str, Any]):
+        """Fold another run's to_dict() (e.g. from a worker process) into these counters."""
+        self.sink.merge_dict(data['results'])
+        with self._lock:
+            self.chains_started += data['chains']['started']
+            self.chains_completed += data['chains']['completed']
+            self.chains_failed += data['chains']['failed']
+            self.user_ids.extend(data['userIds'])
+            self.schedule_lag.merge(LatencyHistogram.from_dict(data['schedule']['lag']))
+            self.chain_latency.merge(LatencyHistogram.from_dict(data['schedule']['chainLatency']))
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            chains = {
+                'started': self.chains_started,
+                'completed': self.chains_completed,
+                'failed': self.chains_failed,
+                'throughput': round(self.chains_completed / elapsed, 2) if elapsed else 0.0
+            }
+            schedule = {}
+            if self.schedule_lag.count:
+                chains['latencyMs'] = self.chain_latency.summary()
+                schedule['scheduleLagMs'] = self.schedule_lag.summary()
+        return {
+            'chains': chains,
+            **schedule,
+            'functions': self.metrics.report(elapsed),
+            'failures': {
+                'total': self.sink.failure_count,
+                'sample': self.sink.failed_summary()
+            }
+        }
+
+
+def run_open_loop(run_chain: Callable[[float], None], rate: float, concurrency: int,
+                  should_start: Callable[[int], bool]):
+    """Start chains on a fixed schedule regardless of how fast earlier chains finish.
+
+    `run_chain` is passed its scheduled start (a time.monotonic()) so it can
+    time itself from when it was due. At most `concurrency` * 4 chains are
+    queued at once; when the system falls behind, submission waits, and the
+    chains it then starts carry their past scheduled times, so the backlog
+    shows up as lag and latency rather than as an unbounded queue.
+    """
+    start = time.monotonic()
+    slots = threading.Semaphore(concurrency * 4)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = 0
+        while True:
+            # Schedule against absolute start times so a slow submit doesn't lower the offered rate
+            scheduled = start + started / rate
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            slots.acquire()
+            if not should_start(started):
+                slots.release()
+                break
+            future = executor.submit(run_chain, scheduled)
+            future.add_done_callback(lambda _: slots.release())
+            started += 1
+
+
+def run_closed_loop(run_chain: Callable[[], None], concurrency: int,
+                    should_start: Callable[[int], bool]):
+    """Keep exactly `concurrency` chains in flight until the run is exhausted."""
+    lock = threading.Lock()
+    started = [0]
+
+    def worker():
+        while True:
+            with lock:
+                if not should_start(started[0]):
+                    return
+                started[0] += 1
+            run_chain()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def check_load_args(users: int, rate: float, concurrency: int, duration: float, engine: str):
+    if users is None and duration is None:
+        raise ValueError("Either users or duration must be provided for a load run")
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    if rate is not None and rate <= 0:
+        raise ValueError("rate must be positive")
+
+    if engine not in ('threads', 'async'):
+        raise ValueError(f"Unknown engine: {engine}")
+
+
+def configure_pool(steps: List[Step], engine: str, concurrency: int, max_in_flight: int = None,
+                   cleanup_workers: int = 16):
+    # Size the shared HTTP connection pool to the invocations that can be outstanding at once
+    # (each threaded chain runs its DAG on up to len(steps) workers), or the extra workers queue on it
+    in_flight = (max_in_flight or concurrency) if engine == 'async' else concurrency * len(steps)
+    get_backend().configure(max_pool_connections=max(in_flight, cleanup_workers))
+
+
+def new_run_id() -> str:
+    return f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def execute_load(stats: LoadStats, steps: List[Step], stage: str, users: int = None, rate: float = None,
+                 concurrency: int = 10, duration: float = None, engine: str = 'threads',
+                 max_in_flight: int = None) -> float:
+    """Drive user chains into `stats` until `users` chains have started or `duration` has passed.
+
+    Returns the elapsed seconds. Created users are left in `stats.user_ids`
+    for the caller to clean up or retain.
+    """
+    start = time.monotonic()
+    deadline = start + duration if duration else None
+
+    def should_start(started: int) -> bool:
+        if users is not None and started >= users:
+            return False
+        return deadline is None or time.monotonic() < deadline
+
+    def run_chain(scheduled: float = None):
+        chain = stats.chain_started(scheduled)
+        try:
+            stats.record_chain(run_dag(steps, stage, {'email': f"{uuid.uuid4()}@email.com"}, invoke_step,
+                                       on_result=lambda result: stats.record_result(result, chain)), scheduled)
+        except Exception as e:
+            log(f"User chain error: {str(e)}")
+            stats.record_chain_error(scheduled)
+
+    verbose = lambda_tester.VERBOSE
+    lambda_tester.VERBOSE = False
+    try:
+        if engine == 'async':
+            from async_engine import drive_load
+            drive_load(stats, steps, stage, rate, concurrency, should_start, max_in_flight or concurrency)
+        elif rate:
+            run_open_loop(run_chain, rate, concurrency, should_start)
+        else:
+            run_closed_loop(run_chain, concurrency, should_start)
+    finally:
+        lambda_tester.VERBOSE = verbose
+    return time.monotonic() - start
+
+
+def release_users(run_id: str, table_name: str, user_ids: List[str], retain_data: bool,
+                  cleanup_workers: int = 16):
+    """Delete a run's users in bulk, or with `retain_data` record them in the run's manifest.
+
+    Users that fail to clean up are recorded in the manifest too.
+    """
+    if retain_data:
+        path = record_run_users(run_id, user_ids)
+        log(f"Retained {len(user_ids)} test users; manifest written to {path}")
+        return
+    log(f"Cleaning up {len(user_ids)} test users...")
+    cleanup = cleanup_users(table_name, user_ids, max_workers=cleanup_workers)
+    if cleanup['failedUsers']:
+        path = record_run_users(run_id, list(cleanup['failedUsers']))
+        log(f"Warning: Failed to clean up {len(cleanup['failedUsers'])} users; manifest written to {path}")
+
+
+def run_load(stage: str = None, table_name: str = None, users: int = None, rate: float = None,
+             concurrency: int = 10, duration: float = None, retain_data: bool = False,
+             engine: str = 'threads', max_in_flight: int = None, chains: List[str] = None,
+             cleanup_workers: int = 16, results_file: str = None) -> dict:
+    """Run independent user chains under load and return per-function throughput, errors and latency.
+
+    With `rate` set, chains are started open-loop at that many chains/sec and
+    `concurrency` caps how many may be in flight. Without it, `concurrency`
+    chains run back to back. The run ends after `users` chains or `duration`
+    seconds, whichever comes first. `chains` selects which test-DAG chains
+    each virtual user runs (default: `['user']`).
+
+    With `results_file`, every invocation result is streamed there as a JSON
+    line ('-' for stdout) tagged with its chain number; only failures are held
+    in memory (a sample is included in the report).
+
+    Created users are deleted in bulk at the end. With `retain_data`, they are
+    recorded under the returned `runId` instead, for `bulk_cleanup.py --run-id`.
+
+    `engine='async'` drives the chains from a single asyncio event loop with
+    at most `max_in_flight` (default: `concurrency`) invocations outstanding
+    at once, instead of one blocked thread per chain.
+    """
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+
+    check_load_args(users, rate, concurrency, duration, engine)
+    get_backend().use_table(table_name)
+
+    mode = 'open-loop' if rate else 'closed-loop'
+    run_id = new_run_id()
+    log(f"Starting {mode} load run {run_id} in stage: {stage} using {engine} engine "
+        f"(users={users}, rate={rate}, concurrency={concurrency}, duration={duration})")
+
+    steps = load_steps(chains=chains or ['user'])
+    configure_pool(steps, engine, concurrency, max_in_flight, cleanup_workers)
+    stats = LoadStats(ResultSink(results_file))
+    try:
+        elapsed = execute_load(stats, steps, stage, users, rate, concurrency, duration, engine, max_in_flight)
+    finally:
+        stats.sink.close()
+        release_users(run_id, table_name, stats.user_ids, retain_data, cleanup_workers)
+
+    report = stats.report(elapsed)
+    log(f"Load run completed. Chains: {report['chains']['completed']}, "
+        f"Failed: {report['chains']['failed']}, Elapsed: {elapsed:.1f}s")
+    return {
+        'runId': run_id,
+        'mode': mode,
+        'engine': engine,
+        'stage': stage,
+        'durationSeconds': round(elapsed, 3),
+        **report
+    }
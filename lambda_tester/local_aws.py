@@ -0,0 +1,595 @@
+"""In-process stand-ins for the AWS services the tester talks to.
+
+These implement the subset of the boto3 Lambda client, DynamoDB resource /
+client and EventBridge client APIs that the tester uses, with the same
+request and response shapes, so the harness can run offline:
+
+- `LocalLambdaService`: registry of Python handlers invoked like Lambda
+  functions (RequestResponse and Event invocations, `LogType='Tail'` REPORT
+  lines, cold starts when a new execution environment is needed, and
+  Get/UpdateFunctionConfiguration and UpdateFunctionCode).
+- `LocalDynamoDB`: pk/sk tables with the `email-sk-index` GSI that
+  GoalTrackerTableStack defines, supporting Query (key conditions,
+  pagination, projections, consumed capacity), GetItem, PutItem, DeleteItem,
+  BatchGetItem and BatchWriteItem.
+- `LocalEventBus`: PutEvents with rules that deliver matching events to
+  local functions asynchronously, like EventBridge. `failure_rate` fails
+  that fraction of entries as throttled, to exercise partial-failure retries.
+
+Items are stored as plain Python values, as the boto3 resource layer
+presents them.
+"""
+import base64
+import bisect
+import copy
+import datetime
+import hashlib
+import io
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+import concurrent.futures
+from types import SimpleNamespace
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+QUERY_PAGE_BYTES = 1024 * 1024
+GOAL_TRACKER_INDEXES = {'email-sk-index': ('email', 'sk')}
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def _item_size(item: Dict[str, Any]) -> int:
+    return len(json.dumps(item, default=str))
+
+
+class _Waiter:
+    """Local resources change synchronously, so every waiter is already satisfied."""
+
+    def wait(self, **kwargs):
+        return None
+
+
+# --- Lambda -----------------------------------------------------------------
+
+class LocalLambdaService:
+    """Lambda-client-shaped registry of Python handlers.
+
+    Handlers are registered under their base name (e.g. `CreateUser`) and are
+    invoked for any stage (`CreateUser-dev`). Each function keeps a pool of
+    idle execution environments: an invocation that finds none is a cold
+    start, and any configuration update discards the pool.
+    """
+
+    def __init__(self, init_duration_ms: float = 0.0, async_workers: int = 16):
+        self._handlers: Dict[str, Callable[[Dict[str, Any], Any], Any]] = {}
+        self._configurations: Dict[str, Dict[str, Any]] = {}
+        self._idle_environments: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._async_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=async_workers, thread_name_prefix='local-lambda')
+        self.init_duration_ms = init_duration_ms
+        self.latency_ms: Dict[str, float] = {}
+        # Reserved concurrency per function: invocations beyond it are throttled, as in Lambda
+        self.concurrency_limits: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+
+    def register(self, name: str, handler: Callable[[Dict[str, Any], Any], Any], memory_size: int = 512):
+        self._handlers[name] = handler
+        self._configurations[name] = {
+            'FunctionName': name,
+            'MemorySize': memory_size,
+            'Timeout': 30,
+            'Runtime': 'java21',
+            'Architectures': ['x86_64'],
+            'Environment': {'Variables': {}},
+            'LastUpdateStatus': 'Successful',
+            'State': 'Active',
+            'CodeSha256': '',
+        }
+
+    def set_environment(self, name: str, value: str):
+        """Set an environment variable on every registered function (as a stack deploy would)."""
+        with self._lock:
+            for configuration in self._configurations.values():
+                configuration['Environment']['Variables'][name] = value
+
+    def _base_name(self, function_name: str) -> str:
+        if function_name in self._handlers:
+            return function_name
+        base_name = function_name.rsplit('-', 1)[0]
+        if base_name not in self._handlers:
+            raise _client_error('ResourceNotFoundException', f"Function not found: {function_name}", 'Invoke')
+        return base_name
+
+    def _checkout_environment(self, name: str) -> Tuple[bool, int]:
+        """Take an idle environment if there is one. Returns (cold, configuration generation)."""
+        with self._lock:
+            generation = self._generations.get(name, 0)
+            if self._idle_environments.get(name, 0) > 0:
+                self._idle_environments[name] -= 1
+                return False, generation
+            return True, generation
+
+    def _checkin_environment(self, name: str, generation: int):
+        with self._lock:
+            # Environments created before a configuration update are retired, not reused
+            if generation == self._generations.get(name, 0):
+                self._idle_environments[name] = self._idle_environments.get(name, 0) + 1
+
+    def _acquire_concurrency(self, name: str):
+        with self._lock:
+            limit = self.concurrency_limits.get(name)
+            if limit is not None and self._in_flight.get(name, 0) >= limit:
+                raise _client_error('TooManyRequestsException', 'Rate Exceeded.', 'Invoke')
+            self._in_flight[name] = self._in_flight.get(name, 0) + 1
+
+    def _release_concurrency(self, name: str):
+        with self._lock:
+            self._in_flight[name] -= 1
+
+    def _run(self, function_name: str, event: Any) -> Tuple[Any, Optional[str], str]:
+        name = self._base_name(function_name)
+        self._acquire_concurrency(name)
+        try:
+            return self._run_in_environment(name, function_name, event)
+        finally:
+            self._release_concurrency(name)
+
+    def _run_in_environment(self, name: str, function_name: str, event: Any) -> Tuple[Any, Optional[str], str]:
+        configuration = self._configurations[name]
+        request_id = str(uuid.uuid4())
+        cold, generation = self._checkout_environment(name)
+
+        init_ms = None
+        if cold:
+            init_start = time.perf_counter()
+            if self.init_duration_ms:
+                time.sleep(self.init_duration_ms / 1000)
+            init_ms = (time.perf_counter() - init_start) * 1000
+
+        context = SimpleNamespace(
+            function_name=function_name,
+            aws_request_id=request_id,
+            memory_limit_in_mb=configuration['MemorySize'],
+            get_remaining_time_in_millis=lambda: configuration['Timeout'] * 1000,
+            # In-process handlers can't each have their own os.environ, so they read it from here
+            environment=dict(configuration['Environment']['Variables']),
+        )
+        start = time.perf_counter()
+        function_error = None
+        try:
+            if self.latency_ms.get(name):
+                time.sleep(self.latency_ms[name] / 1000)
+            payload = self._handlers[name](event, context)
+        except Exception as e:
+            function_error = 'Unhandled'
+            payload = {'errorMessage': str(e), 'errorType': type(e).__name__}
+        duration_ms = (time.perf_counter() - start) * 1000
+        self._checkin_environment(name, generation)
+
+        report = (f"REPORT RequestId: {request_id}\tDuration: {duration_ms:.2f} ms\t"
+                  f"Billed Duration: {max(1, math.ceil(duration_ms))} ms\t"
+                  f"Memory Size: {configuration['MemorySize']} MB\tMax Memory Used: 128 MB\t")
+        if init_ms is not None:
+            report += f"Init Duration: {init_ms:.2f} ms\t"
+        log_tail = f"START RequestId: {request_id} Version: $LATEST\nEND RequestId: {request_id}\n{report}\n"
+        return payload, function_error, log_tail
+
+    def _run_async(self, function_name: str, event: Any):
+        # Lambda's internal queue keeps retrying throttled asynchronous invocations
+        while True:
+            try:
+                return self._run(function_name, event)
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TooManyRequestsException':
+                    raise
+                time.sleep(0.01)
+
+    def invoke(self, FunctionName: str, InvocationType: str = 'RequestResponse', Payload: Any = b'{}',
+               LogType: str = 'None', **kwargs) -> Dict[str, Any]:
+        event = json.loads(Payload if isinstance(Payload, (str, bytes)) else Payload.read())
+        if InvocationType == 'Event':
+            self._base_name(FunctionName)
+            self._async_executor.submit(self._run_async, FunctionName, event)
+            return {'StatusCode': 202, 'Payload': io.BytesIO(b'')}
+        if InvocationType == 'DryRun':
+            self._base_name(FunctionName)
+            return {'StatusCode': 204, 'Payload': io.BytesIO(b'')}
+
+        payload, function_error, log_tail = self._run(FunctionName, event)
+        response = {
+            'StatusCode': 200,
+            'ExecutedVersion': '$LATEST',
+            'Payload': io.BytesIO(json.dumps(payload).encode()),
+        }
+        if function_error:
+            response['FunctionError'] = function_error
+        if LogType == 'Tail':
+            response['LogResult'] = base64.b64encode(log_tail.encode()[-4096:]).decode()
+        return response
+
+    def get_function_configuration(self, FunctionName: str, **kwargs) -> Dict[str, Any]:
+        return copy.deepcopy(self._configurations[self._base_name(FunctionName)])
+
+    def update_function_configuration(self, FunctionName: str, **configuration) -> Dict[str, Any]:
+        name = self._base_name(FunctionName)
+        with self._lock:
+            self._configurations[name].update(copy.deepcopy(configuration))
+            # Lambda replaces every execution environment after a configuration change
+            self._idle_environments[name] = 0
+            self._generations[name] = self._generations.get(name, 0) + 1
+        return self.get_function_configuration(FunctionName)
+
+    def update_function_code(self, FunctionName: str, ZipFile: bytes, **kwargs) -> Dict[str, Any]:
+        name = self._base_name(FunctionName)
+        with self._lock:
+            self._configurations[name].update({
+                'CodeSha256': base64.b64encode(hashlib.sha256(ZipFile).digest()).decode(),
+                'CodeSize': len(ZipFile),
+                'LastUpdateStatus': 'Successful'
+            })
+            # New code means new execution environments, as with a configuration change
+            self._idle_environments[name] = 0
+            self._generations[name] = self._generations.get(name, 0) + 1
+        return self.get_function_configuration(FunctionName)
+
+    def get_waiter(self, waiter_name: str) -> _Waiter:
+        return _Waiter()
+
+
+# --- DynamoDB ---------------------------------------------------------------
+
+_KEY_CONDITION = re.compile(r'^\s*(?P<name>[#\w]+)\s*=\s*(?P<value>:\w+)\s*(?:AND\s+(?P<sort>.+?))?\s*$',
+                            re.IGNORECASE)
+_BEGINS_WITH = re.compile(r'^begins_with\s*\(\s*(?P<name>[#\w]+)\s*,\s*(?P<value>:\w+)\s*\)$', re.IGNORECASE)
+_BETWEEN = re.compile(r'^(?P<name>[#\w]+)\s+BETWEEN\s+(?P<low>:\w+)\s+AND\s+(?P<high>:\w+)$', re.IGNORECASE)
+_COMPARISON = re.compile(r'^(?P<name>[#\w]+)\s*(?P<op><=|>=|=|<|>)\s*(?P<value>:\w+)$')
+
+
+def _sort_key_bounds(sort_keys: List[Any], condition: Optional[str], values: Dict[str, Any],
+                     key: Callable[[Any], Any] = None) -> Tuple[int, int]:
+    """Return the [start, end) slice of an ordered key list that satisfies a sort key condition."""
+    if not condition:
+        return 0, len(sort_keys)
+    match = _BEGINS_WITH.match(condition)
+    if match:
+        prefix = values[match.group('value')]
+        return (bisect.bisect_left(sort_keys, prefix, key=key),
+                bisect.bisect_left(sort_keys, prefix + '\uffff', key=key))
+    match = _BETWEEN.match(condition)
+    if match:
+        return (bisect.bisect_left(sort_keys, values[match.group('low')], key=key),
+                bisect.bisect_right(sort_keys, values[match.group('high')], key=key))
+    match = _COMPARISON.match(condition)
+    if match:
+        value = values[match.group('value')]
+        low, high = bisect.bisect_left(sort_keys, value, key=key), bisect.bisect_right(sort_keys, value, key=key)
+        return {
+            '=': (low, high),
+            '<': (0, low),
+            '<=': (0, high),
+            '>': (high, len(sort_keys)),
+            '>=': (low, len(sort_keys)),
+        }[match.group('op')]
+    raise _client_error('ValidationException', f"Unsupported key condition: {condition}", 'Query')
+
+
+def _project(item: Dict[str, Any], projection: Optional[str], names: Dict[str, str]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(item)
+    attributes = [names.get(attribute.strip(), attribute.strip()) for attribute in projection.split(',')]
+    return {attribute: copy.deepcopy(item[attribute]) for attribute in attributes if attribute in item}
+
+
+class LocalTable:
+    """One pk/sk table plus its GSIs. Partitions keep their sort keys ordered for range queries."""
+
+    def __init__(self, name: str, indexes: Dict[str, Tuple[str, str]] = None):
+        self.name = name
+        self.indexes = dict(indexes or {})
+        self._lock = threading.RLock()
+        self._partitions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._sort_keys: Dict[str, List[str]] = {}
+        # index name -> partition value -> ordered list of (index sort key, pk, sk)
+        self._index_entries: Dict[str, Dict[Any, List[Tuple[Any, str, str]]]] = {name: {} for name in self.indexes}
+
+    def _index_key(self, index_name: str, item: Dict[str, Any]) -> Optional[Tuple[Any, Tuple[Any, str, str]]]:
+        partition_attribute, sort_attribute = self.indexes[index_name]
+        if partition_attribute not in item or sort_attribute not in item:
+            return None
+        return item[partition_attribute], (item[sort_attribute], item['pk'], item['sk'])
+
+    def put(self, item: Dict[str, Any]):
+        with self._lock:
+            self.delete({'pk': item['pk'], 'sk': item['sk']})
+            partition = self._partitions.setdefault(item['pk'], {})
+            partition[item['sk']] = copy.deepcopy(item)
+            bisect.insort(self._sort_keys.setdefault(item['pk'], []), item['sk'])
+            for index_name in self.indexes:
+                key = self._index_key(index_name, item)
+                if key:
+                    bisect.insort(self._index_entries[index_name].setdefault(key[0], []), key[1])
+
+    def get(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._partitions.get(key['pk'], {}).get(key['sk'])
+            return copy.deepcopy(item) if item is not None else None
+
+    def delete(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            partition = self._partitions.get(key['pk'])
+            if not partition or key['sk'] not in partition:
+                return None
+            item = partition.pop(key['sk'])
+            sort_keys = self._sort_keys[key['pk']]
+            del sort_keys[bisect.bisect_left(sort_keys, key['sk'])]
+            if not partition:
+                del self._partitions[key['pk']]
+                del self._sort_keys[key['pk']]
+            for index_name in self.indexes:
+                index_key = self._index_key(index_name, item)
+                if index_key:
+                    entries = self._index_entries[index_name][index_key[0]]
+                    entries.remove(index_key[1])
+                    if not entries:
+                        del self._index_entries[index_name][index_key[0]]
+            return item
+
+    def query(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        names = params.get('ExpressionAttributeNames', {})
+        values = params.get('ExpressionAttributeValues', {})
+        match = _KEY_CONDITION.match(params['KeyConditionExpression'])
+        if not match:
+            raise _client_error('ValidationException', f"Unsupported key condition: {params['KeyConditionExpression']}", 'Query')
+        partition_value = values[match.group('value')]
+        sort_condition = match.group('sort')
+        if sort_condition:
+            # Resolve #name placeholders so the predicate parsers only see attribute names
+            for placeholder in sorted(names, key=len, reverse=True):
+                sort_condition = sort_condition.replace(placeholder, names[placeholder])
+        index_name = params.get('IndexName')
+        forward = params.get('ScanIndexForward', True)
+        limit = params.get('Limit')
+        start_key = params.get('ExclusiveStartKey')
+
+        with self._lock:
+            # Key conditions select a contiguous range of the ordered partition, as in DynamoDB
+            if index_name:
+                if index_name not in self.indexes:
+                    raise _client_error('ValidationException', f"Unknown index {index_name}", 'Query')
+                partition_attribute, sort_attribute = self.indexes[index_name]
+                entries = self._index_entries[index_name].get(partition_value, [])
+                start, end = _sort_key_bounds(entries, sort_condition, values, key=lambda entry: entry[0])
+                positions = entries[start:end]
+                if start_key:
+                    position = (start_key[sort_attribute], start_key['pk'], start_key['sk'])
+                    positions = [p for p in positions if (p > position if forward else p < position)]
+                candidates = [self._partitions[pk][sk] for _, pk, sk in positions]
+            else:
+                sort_keys = self._sort_keys.get(partition_value, [])
+                start, end = _sort_key_bounds(sort_keys, sort_condition, values)
+                if start_key:
+                    if forward:
+                        start = max(start, bisect.bisect_right(sort_keys, start_key['sk']))
+                    else:
+                        end = min(end, bisect.bisect_left(sort_keys, start_key['sk']))
+                partition = self._partitions.get(partition_value, {})
+                candidates = [partition[sk] for sk in sort_keys[start:end]]
+            if not forward:
+                candidates.reverse()
+
+            items, size = [], 0
+            for item in candidates:
+                if (limit is not None and len(items) >= limit) or size >= QUERY_PAGE_BYTES:
+                    break
+                size += _item_size(item)
+                items.append(item)
+
+            last_key = None
+            if len(items) < len(candidates):
+                last_key = {'pk': items[-1]['pk'], 'sk': items[-1]['sk']}
+                if index_name:
+                    last_key[partition_attribute] = partition_value
+                    last_key[sort_attribute] = items[-1][sort_attribute]
+            scanned = len(items)
+            items = [_project(item, params.get('ProjectionExpression'), names) for item in items]
+
+        response = {'Items': items, 'Count': len(items), 'ScannedCount': scanned}
+        if last_key:
+            response['LastEvaluatedKey'] = last_key
+        if params.get('ReturnConsumedCapacity', 'NONE') != 'NONE':
+            units = max(1, math.ceil(size / 4096)) * (1.0 if params.get('ConsistentRead') else 0.5)
+            response['ConsumedCapacity'] = {'TableName': self.name, 'CapacityUnits': units}
+        return response
+
+
+class LocalDynamoDBClient:
+    """DynamoDB-client-shaped facade over LocalTables (high-level, already-deserialized values)."""
+
+    def __init__(self, database: 'LocalDynamoDB'):
+        self._database = database
+
+    def query(self, TableName: str, **params) -> Dict[str, Any]:
+        return self._database.table(TableName).query(params)
+
+    def get_item(self, TableName: str, Key: Dict[str, Any], ProjectionExpression: str = None,
+                 ExpressionAttributeNames: Dict[str, str] = None, ReturnConsumedCapacity: str = 'NONE',
+                 ConsistentRead: bool = False, **kwargs) -> Dict[str, Any]:
+        item = self._database.table(TableName).get(Key)
+        response = {}
+        if item is not None:
+            response['Item'] = _project(item, ProjectionExpression, ExpressionAttributeNames or {})
+        if ReturnConsumedCapacity != 'NONE':
+            units = max(1, math.ceil(_item_size(item or {}) / 4096)) * (1.0 if ConsistentRead else 0.5)
+            response['ConsumedCapacity'] = {'TableName': TableName, 'CapacityUnits': units}
+        return response
+
+    def put_item(self, TableName: str, Item: Dict[str, Any], ReturnConsumedCapacity: str = 'NONE',
+                 **kwargs) -> Dict[str, Any]:
+        self._database.table(TableName).put(Item)
+        response = {}
+        if ReturnConsumedCapacity != 'NONE':
+            response['ConsumedCapacity'] = {'TableName': TableName,
+                                            'CapacityUnits': float(max(1, math.ceil(_item_size(Item) / 1024)))}
+        return response
+
+    def delete_item(self, TableName: str, Key: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        self._database.table(TableName).delete(Key)
+        return {}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]], **kwargs) -> Dict[str, Any]:
+        if sum(len(requests) for requests in RequestItems.values()) > 25:
+            raise _client_error('ValidationException', 'Too many items requested for the BatchWriteItem call',
+                                'BatchWriteItem')
+        for table_name, requests in RequestItems.items():
+            table = self._database.table(table_name)
+            for request in requests:
+                if 'PutRequest' in request:
+                    table.put(request['PutRequest']['Item'])
+                else:
+                    table.delete(request['DeleteRequest']['Key'])
+        return {'UnprocessedItems': {}}
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]], ReturnConsumedCapacity: str = 'NONE',
+                       **kwargs) -> Dict[str, Any]:
+        if sum(len(request['Keys']) for request in RequestItems.values()) > 100:
+            raise _client_error('ValidationException', 'Too many items requested for the BatchGetItem call',
+                                'BatchGetItem')
+        responses, consumed = {}, []
+        for table_name, request in RequestItems.items():
+            table = self._database.table(table_name)
+            names = request.get('ExpressionAttributeNames', {})
+            items = [table.get(key) for key in request['Keys']]
+            responses[table_name] = [_project(item, request.get('ProjectionExpression'), names)
+                                     for item in items if item is not None]
+            units = sum(max(1, math.ceil(_item_size(item or {}) / 4096)) for item in items) * \
+                (1.0 if request.get('ConsistentRead') else 0.5)
+            consumed.append({'TableName': table_name, 'CapacityUnits': units})
+        response = {'Responses': responses, 'UnprocessedKeys': {}}
+        if ReturnConsumedCapacity != 'NONE':
+            response['ConsumedCapacity'] = consumed
+        return response
+
+    def get_waiter(self, waiter_name: str) -> _Waiter:
+        return _Waiter()
+
+
+class _LocalBatchWriter:
+    def __init__(self, client: LocalDynamoDBClient, table_name: str):
+        self._client = client
+        self._table_name = table_name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def put_item(self, Item: Dict[str, Any]):
+        self._client.put_item(TableName=self._table_name, Item=Item)
+
+    def delete_item(self, Key: Dict[str, Any]):
+        self._client.delete_item(TableName=self._table_name, Key=Key)
+
+
+class LocalTableResource:
+    """boto3 `Table`-shaped wrapper around one LocalTable."""
+
+    def __init__(self, client: LocalDynamoDBClient, name: str):
+        self.name = name
+        self.table_name = name
+        self.meta = SimpleNamespace(client=client)
+        self._client = client
+
+    def query(self, **params):
+        return self._client.query(TableName=self.name, **params)
+
+    def get_item(self, **params):
+        return self._client.get_item(TableName=self.name, **params)
+
+    def put_item(self, **params):
+        return self._client.put_item(TableName=self.name, **params)
+
+    def delete_item(self, **params):
+        return self._client.delete_item(TableName=self.name, **params)
+
+    def batch_writer(self, **kwargs) -> _LocalBatchWriter:
+        return _LocalBatchWriter(self._client, self.name)
+
+
+class LocalDynamoDB:
+    """DynamoDB-resource-shaped container. Tables are created on first use with the GoalTracker schema."""
+
+    def __init__(self, indexes: Dict[str, Tuple[str, str]] = None):
+        self._indexes = GOAL_TRACKER_INDEXES if indexes is None else indexes
+        self._tables: Dict[str, LocalTable] = {}
+        self._lock = threading.Lock()
+        self.meta = SimpleNamespace(client=LocalDynamoDBClient(self))
+
+    def table(self, name: str) -> LocalTable:
+        with self._lock:
+            if name not in self._tables:
+                self._tables[name] = LocalTable(name, self._indexes)
+            return self._tables[name]
+
+    def Table(self, name: str) -> LocalTableResource:
+        self.table(name)
+        return LocalTableResource(self.meta.client, name)
+
+
+# --- EventBridge ------------------------------------------------------------
+
+class LocalEventBus:
+    """EventBridge-client-shaped bus. Rules route events by detail-type to local functions asynchronously."""
+
+    def __init__(self, lambda_service: LocalLambdaService, account: str = '123456789012', region: str = 'us-west-2'):
+        self._lambda_service = lambda_service
+        self._rules: List[Tuple[str, str]] = []
+        self.account = account
+        self.region = region
+        # Fraction of entries rejected with ThrottlingException, as EventBridge does past its PutEvents quota
+        self.failure_rate = 0.0
+
+    def add_rule(self, detail_type: str, function_name: str):
+        """Deliver events with this detail-type on any `goal-event-bus-<stage>` to `<function_name>-<stage>`."""
+        self._rules.append((detail_type, function_name))
+
+    def put_events(self, Entries: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        if len(Entries) > 10:
+            raise _client_error('ValidationException', 'PutEvents accepts at most 10 entries', 'PutEvents')
+        results = []
+        failed = 0
+        for entry in Entries:
+            if self.failure_rate and random.random() < self.failure_rate:
+                failed += 1
+                results.append({'ErrorCode': 'ThrottlingException', 'ErrorMessage': 'Rate exceeded'})
+                continue
+            event_id = str(uuid.uuid4())
+            bus_name = entry.get('EventBusName', 'default')
+            stage = bus_name.rsplit('-', 1)[-1]
+            event = {
+                'version': '0',
+                'id': event_id,
+                'detail-type': entry['DetailType'],
+                'source': entry['Source'],
+                'account': self.account,
+                'time': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'region': self.region,
+                'resources': entry.get('Resources', []),
+                'detail': json.loads(entry['Detail']),
+            }
+            for detail_type, function_name in self._rules:
+                if detail_type == entry['DetailType']:
+                    self._lambda_service.invoke(FunctionName=f"{function_name}-{stage}", InvocationType='Event',
+                                                Payload=json.dumps(event))
+            results.append({'EventId': event_id})
+        return {'FailedEntryCount': failed, 'Entries': results}
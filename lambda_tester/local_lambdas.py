@@ -0,0 +1,196 @@
+"""Python emulations of the OSRS Goal Tracker Lambdas for the local backend.
+
+Each handler takes the same event the real function receives (an API
+Gateway proxy event, or an EventBridge event for the bus consumers) and
+returns the same shape of response, reading and writing the GoalTracker
+single-table layout:
+
+    USER#<userId> / METADATA                                user profile (email for email-sk-index)
+    USER#<userId> / CHARACTER#<name>                        character added to the user
+    USER#<userId> / NOTIFICATION_CHANNEL#<type>#<id>        notification channel
+    USER#<userId> / CHARACTER#<name>#GOAL#<goalId>          goal
+    USER#<userId> / CHARACTER#<name>#GOAL#<goalId>#PROGRESS#<timestamp>   goal progress entry
+
+They are behavioural stand-ins for exercising the harness, not ports of the
+Java services.
+"""
+import datetime
+import hashlib
+import json
+import uuid
+from typing import Dict, Any, Callable
+
+GOAL_CREATION_REQUEST_EVENT_DETAIL_TYPE = 'GoalCreationRequestEvent'
+GOAL_PROGRESS_UPDATE_EVENT_DETAIL_TYPE = 'GoalProgressUpdateEvent'
+EVENT_SOURCE = 'com.osrsGoalTracker.orchestration'
+HISCORES_SKILLS = ('Overall', 'Attack', 'Defence', 'Strength', 'Hitpoints', 'Ranged', 'Prayer', 'Magic',
+                   'Cooking', 'Woodcutting', 'Fletching', 'Fishing', 'Firemaking', 'Crafting', 'Smithing',
+                   'Mining', 'Herblore', 'Agility', 'Thieving', 'Slayer', 'Farming', 'Runecraft', 'Hunter',
+                   'Construction')
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _response(status_code: int, body: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps(body),
+    }
+
+
+def _error(status_code: int, message: str) -> Dict[str, Any]:
+    return _response(status_code, {'message': message})
+
+
+def _table_name(context) -> str:
+    # DYNAMODB_TABLE as the stack sets it, else GoalTracker-<stage> from the <Name>-<stage> function name
+    return context.environment.get('DYNAMODB_TABLE') or f"GoalTracker-{context.function_name.rsplit('-', 1)[-1]}"
+
+
+def build_handlers(dynamodb, events) -> Dict[str, Callable[[Dict[str, Any], Any], Any]]:
+    """Return handlers keyed by function name, backed by a (local) DynamoDB resource and events client."""
+    client = dynamodb.meta.client
+
+    def user_exists(table_name: str, user_id: str) -> bool:
+        return 'Item' in client.get_item(TableName=table_name, Key={'pk': f"USER#{user_id}", 'sk': 'METADATA'})
+
+    def list_items(table_name: str, user_id: str, prefix: str):
+        return client.query(
+            TableName=table_name,
+            KeyConditionExpression='pk = :pk AND begins_with(sk, :prefix)',
+            ExpressionAttributeValues={':pk': f"USER#{user_id}", ':prefix': prefix}
+        )['Items']
+
+    def create_user(event, context):
+        body = json.loads(event.get('body') or '{}')
+        email = body.get('email')
+        if not email:
+            return _error(400, 'email is required')
+        table_name = _table_name(context)
+        existing = client.query(
+            TableName=table_name,
+            IndexName='email-sk-index',
+            KeyConditionExpression='email = :email AND sk = :sk',
+            ExpressionAttributeValues={':email': email, ':sk': 'METADATA'}
+        )['Items']
+        if existing:
+            return _error(409, f"User with email {email} already exists")
+        user = {'userId': str(uuid.uuid4()), 'email': email, 'createdAt': _now()}
+        client.put_item(TableName=table_name, Item={'pk': f"USER#{user['userId']}", 'sk': 'METADATA', **user})
+        return _response(200, user)
+
+    def get_user(event, context):
+        user_id = (event.get('pathParameters') or {}).get('userId')
+        item = client.get_item(TableName=_table_name(context), Key={'pk': f"USER#{user_id}", 'sk': 'METADATA'})
+        if 'Item' not in item:
+            return _error(404, f"User {user_id} not found")
+        return _response(200, {key: item['Item'][key] for key in ('userId', 'email', 'createdAt')})
+
+    def add_character_to_user(event, context):
+        path = event.get('pathParameters') or {}
+        table_name = _table_name(context)
+        if not user_exists(table_name, path.get('userId')):
+            return _error(404, f"User {path.get('userId')} not found")
+        character = {'userId': path['userId'], 'name': path['name'], 'createdAt': _now()}
+        client.put_item(TableName=table_name,
+                        Item={'pk': f"USER#{path['userId']}", 'sk': f"CHARACTER#{path['name']}", **character})
+        return _response(200, character)
+
+    def get_characters_for_user(event, context):
+        user_id = (event.get('pathParameters') or {}).get('userId')
+        items = list_items(_table_name(context), user_id, 'CHARACTER#')
+        characters = [{'name': item['name'], 'createdAt': item['createdAt']}
+                      for item in items if '#GOAL#' not in item['sk']]
+        return _response(200, {'userId': user_id, 'characters': characters})
+
+    def create_notification_channel_for_user(event, context):
+        user_id = (event.get('pathParameters') or {}).get('userId')
+        body = json.loads(event.get('body') or '{}')
+        table_name = _table_name(context)
+        if not user_exists(table_name, user_id):
+            return _error(404, f"User {user_id} not found")
+        channel = {'userId': user_id, 'channelId': str(uuid.uuid4()), 'channelType': body.get('channelType'),
+                   'identifier': body.get('identifier'), 'isActive': True}
+        client.put_item(TableName=table_name, Item={
+            'pk': f"USER#{user_id}",
+            'sk': f"NOTIFICATION_CHANNEL#{channel['channelType']}#{channel['channelId']}",
+            **channel
+        })
+        return _response(200, channel)
+
+    def get_notification_channels_for_user(event, context):
+        user_id = (event.get('pathParameters') or {}).get('userId')
+        items = list_items(_table_name(context), user_id, 'NOTIFICATION_CHANNEL#')
+        channels = [{key: item[key] for key in ('channelId', 'channelType', 'identifier', 'isActive')}
+                    for item in items]
+        return _response(200, {'userId': user_id, 'notificationChannels': channels})
+
+    def get_character_hiscores(event, context):
+        name = (event.get('pathParameters') or {}).get('name')
+        if not name:
+            return _error(400, 'name is required')
+        # Deterministic per-name stats so repeated lookups are comparable
+        seed = hashlib.sha256(name.encode()).digest()
+        skills = {}
+        for i, skill in enumerate(HISCORES_SKILLS[1:]):
+            level = 1 + seed[i % len(seed)] % 99
+            skills[skill] = {'level': level, 'experience': level * level * 100, 'rank': 1 + seed[-1 - i] * 1000}
+        skills[HISCORES_SKILLS[0]] = {
+            'level': sum(skill['level'] for skill in skills.values()),
+            'experience': sum(skill['experience'] for skill in skills.values()),
+            'rank': 1 + int.from_bytes(seed[:3], 'big'),
+        }
+        return _response(200, {'characterName': name, 'skills': skills})
+
+    def goal_creation_request_event_producer(event, context):
+        path = event.get('pathParameters') or {}
+        body = json.loads(event.get('body') or '{}')
+        stage = context.function_name.rsplit('-', 1)[-1]
+        detail = {'userId': path.get('userId'), 'characterName': path.get('name'), **body}
+        response = events.put_events(Entries=[{
+            'Source': EVENT_SOURCE,
+            'DetailType': GOAL_CREATION_REQUEST_EVENT_DETAIL_TYPE,
+            'Detail': json.dumps(detail),
+            'EventBusName': f"goal-event-bus-{stage}",
+        }])
+        if response['FailedEntryCount']:
+            return _error(500, 'Failed to publish goal creation request')
+        return _response(200, {'success': True, 'message': 'Goal creation request submitted'})
+
+    def create_goal_from_goal_creation_request_event(event, context):
+        detail = event['detail']
+        goal_id = str(uuid.uuid4())
+        goal = {**detail, 'goalId': goal_id, 'createdAt': _now()}
+        client.put_item(TableName=_table_name(context), Item={
+            'pk': f"USER#{detail['userId']}",
+            'sk': f"CHARACTER#{detail['characterName']}#GOAL#{goal_id}",
+            **goal
+        })
+        return goal
+
+    def goal_progress_creator(event, context):
+        detail = event['detail']
+        timestamp = detail.get('timestamp') or event.get('time') or _now()
+        progress = {**detail, 'timestamp': timestamp}
+        client.put_item(TableName=_table_name(context), Item={
+            'pk': f"USER#{detail['userId']}",
+            'sk': f"CHARACTER#{detail['characterName']}#GOAL#{detail['goalId']}#PROGRESS#{timestamp}",
+            **progress
+        })
+        return _response(200, progress)
+
+    return {
+        'CreateUser': create_user,
+        'GetUser': get_user,
+        'AddCharacterToUser': add_character_to_user,
+        'GetCharactersForUser': get_characters_for_user,
+        'CreateNotificationChannelForUser': create_notification_channel_for_user,
+        'GetNotificationChannelsForUser': get_notification_channels_for_user,
+        'GetCharacterHiscores': get_character_hiscores,
+        'GoalCreationRequestEventProducer': goal_creation_request_event_producer,
+        'CreateGoalFromGoalCreationRequestEvent': create_goal_from_goal_creation_request_event,
+        'GoalProgressCreator': goal_progress_creator,
+    }
@@ -0,0 +1,180 @@
+"""Memory-size sweep (power tuning) for one Lambda from config.json.
+
+For each memory size: apply the setting and wait for the update, record the
+first (cold) invocation's init time, warm the function, then run a fixed
+number of invocations with the function's test (or benchmark) payload. Durations come from
+the platform REPORT line, so the cost figures match what Lambda bills.
+
+Each call gets a fresh payload filled with real IDs from one setup pass of the
+test DAG (see lambda_reports.BenchmarkData). Calls that error or answer with a
+statusCode other than 200 count as `failed`, and the users the sweep creates
+are deleted afterwards unless `--retain-data` is given.
+
+    python3 memory_tuning.py --function GetCharacterHiscores --table-name GoalTracker-dev --memory 256,512,1024,2048 --invocations 50
+"""
+import json
+import os
+from typing import List, Dict, Any, Optional
+
+import lambda_tester
+from lambda_reports import BenchmarkData, invoke_with_report, update_configuration_and_wait
+from lambda_tester import log
+from metrics import LatencyHistogram
+
+# On-demand Lambda pricing (USD), us-west-2
+PRICE_PER_GB_SECOND = {'x86_64': 0.0000166667, 'arm64': 0.0000133334}
+PRICE_PER_REQUEST = 0.20 / 1_000_000
+
+
+def invocation_cost(billed_duration_ms: float, memory_mb: int, architecture: str = 'x86_64') -> float:
+    """Cost in USD of one invocation with the given billed duration and memory size."""
+    gb_seconds = (memory_mb / 1024) * (billed_duration_ms / 1000)
+    return gb_seconds * PRICE_PER_GB_SECOND[architecture] + PRICE_PER_REQUEST
+
+
+def measure_memory_size(function_name: str, stage: str, data: BenchmarkData, memory_mb: int, warmup: int,
+                        invocations: int, architecture: str) -> Dict[str, Any]:
+    """Apply one memory size and measure cold init, durations and cost."""
+    full_function_name = f"{function_name}-{stage}"
+
+    def invoke():
+        sample = invoke_with_report(full_function_name, data.payload(function_name))
+        data.observe(function_name, sample)
+        return sample
+
+    log(f"{full_function_name}: {memory_mb} MB")
+    update_configuration_and_wait(full_function_name, MemorySize=memory_mb)
+
+    # A configuration update always discards warm environments, so the first call is cold
+    cold = invoke()
+    for _ in range(max(0, warmup - 1)):
+        invoke()
+
+    durations = LatencyHistogram()
+    billed = LatencyHistogram()
+    client_latency = LatencyHistogram()
+    failed = 0
+    total_cost = 0.0
+    for _ in range(invocations):
+        sample = invoke()
+        client_latency.record(sample['clientLatencyMs'])
+        if sample['failed']:
+            failed += 1
+        report = sample['report'] or {}
+        if 'durationMs' in report:
+            durations.record(report['durationMs'])
+        if 'billedDurationMs' in report:
+            billed.record(report['billedDurationMs'])
+            total_cost += invocation_cost(report['billedDurationMs'], memory_mb, architecture)
+
+    cold_report = cold['report'] or {}
+    return {
+        'memoryMb': memory_mb,
+        'initDurationMs': cold_report.get('initDurationMs'),
+        'coldDurationMs': cold_report.get('durationMs'),
+        'durationMs': durations.summary(),
+        'billedDurationMs': billed.summary(),
+        'clientLatencyMs': client_latency.summary(),
+        'coldFailed': cold['failed'],
+        'failed': failed,
+        'costPerMillionUsd': round(total_cost / billed.count * 1_000_000, 4) if billed.count else None
+    }
+
+
+def recommend(results: List[Dict[str, Any]], latency_target_ms: float = None) -> Optional[int]:
+    """Pick the cheapest memory size with no failed calls whose p99 duration meets the target (if any)."""
+    candidates = [r for r in results
+                  if r['costPerMillionUsd'] is not None and r['durationMs'].get('count') and not r['failed']]
+    if latency_target_ms is not None:
+        candidates = [r for r in candidates if r['durationMs']['p99'] <= latency_target_ms]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda r: (r['costPerMillionUsd'], r['durationMs']['p99']))['memoryMb']
+
+
+def run_memory_sweep(function_name: str, memory_sizes: List[int], stage: str = None, invocations: int = 50,
+                     warmup: int = 3, latency_target_ms: float = None, payload_path: str = None,
+                     table_name: str = None, retain_data: bool = False) -> Dict[str, Any]:
+    """Sweep `memory_sizes` for one function, restoring its original memory size afterwards."""
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+    full_function_name = f"{function_name}-{stage}"
+    data = BenchmarkData(stage, table_name, payload_path, retain_data)
+    data.check(function_name)
+    configuration = lambda_tester.get_lambda_client().get_function_configuration(FunctionName=full_function_name)
+    original_memory = configuration['MemorySize']
+    architecture = configuration.get('Architectures', ['x86_64'])[0]
+
+    results = []
+    try:
+        for memory_mb in memory_sizes:
+            results.append(measure_memory_size(
+                function_name, stage, data, memory_mb, warmup, invocations, architecture))
+    finally:
+        log(f"Restoring {full_function_name} to {original_memory} MB")
+        update_configuration_and_wait(full_function_name, MemorySize=original_memory)
+        data.close()
+
+    return {
+        'function': function_name,
+        'stage': stage,
+        'architecture': architecture,
+        'originalMemoryMb': original_memory,
+        'invocationsPerSize': invocations,
+        'latencyTargetMs': latency_target_ms,
+        'recommendedMemoryMb': recommend(results, latency_target_ms),
+        'results': results
+    }
+
+
+def format_table(sweep: Dict[str, Any]) -> str:
+    """Render a sweep as a fixed-width table."""
+    header = f"{'Memory':>7} {'Init':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'Billed p50':>11} {'$/1M':>10} {'Failed':>7}"
+    lines = [f"{sweep['function']} ({sweep['architecture']}, {sweep['invocationsPerSize']} invocations per size)",
+             header, '-' * len(header)]
+    for r in sweep['results']:
+        duration = r['durationMs']
+        init = f"{r['initDurationMs']:.0f}" if r['initDurationMs'] is not None else '-'
+        lines.append(
+            f"{r['memoryMb']:>7} {init:>8} {duration.get('p50', 0):>8.1f} {duration.get('p90', 0):>8.1f} "
+            f"{duration.get('p99', 0):>8.1f} {r['billedDurationMs'].get('p50', 0):>11.0f} "
+            f"{r['costPerMillionUsd'] or 0:>10.4f} {r['failed']:>7}")
+    lines.append(f"Recommended: {sweep['recommendedMemoryMb'] or '-'} MB")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Sweep Lambda memory sizes and report duration and cost per size')
+    parser.add_argument('--function', required=True, help='Function name from config.json (e.g. GetCharacterHiscores)')
+    parser.add_argument('--memory', default='256,512,1024,1536,2048',
+                        help='Comma-separated memory sizes in MB (default: 256,512,1024,1536,2048)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--table-name', help='DynamoDB table name (defaults to DYNAMODB_TABLE environment variable)')
+    parser.add_argument('--invocations', type=int, default=50, help='Measured invocations per size (default: 50)')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured invocations per size, including the cold one (default: 3)')
+    parser.add_argument('--latency-target-ms', type=float, help='Only recommend sizes whose p99 duration is at most this')
+    parser.add_argument('--payload', help='JSON file to invoke with instead of the config.json test/benchmark event')
+    parser.add_argument('--retain-data', action='store_true', help='Keep the users created while measuring')
+    parser.add_argument('--json', action='store_true', help='Print the full JSON results instead of the table')
+    args = parser.parse_args()
+
+    load_env()
+    sweep = run_memory_sweep(
+        args.function,
+        [int(size) for size in args.memory.split(',')],
+        stage=args.stage,
+        invocations=args.invocations,
+        warmup=args.warmup,
+        latency_target_ms=args.latency_target_ms,
+        payload_path=args.payload,
+        table_name=args.table_name,
+        retain_data=args.retain_data
+    )
+    print(json.dumps(sweep, indent=2) if args.json else format_table(sweep))
@@ -0,0 +1,222 @@
+"""Latency histograms and per-function invocation metrics.
+
+`LatencyHistogram` is a log-linear (HDR-style) histogram over integer
+microseconds: values below 128us are recorded exactly and larger values land
+in buckets whose width is at most 1/64 of their value, so every percentile is
+accurate to within ~1.6% no matter how many samples are recorded. Histograms
+are cheap to merge and serialize, so partial results from several workers can
+be combined into one report.
+"""
+import math
+import threading
+from typing import Dict, Any, Optional
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_MASK = SUB_BUCKET_COUNT - 1
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < SUB_BUCKET_COUNT:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return (shift << SUB_BUCKET_BITS) + (value_us >> shift)
+
+
+def _bucket_midpoint(index: int) -> float:
+    shift = index >> SUB_BUCKET_BITS
+    if shift == 0:
+        return float(index)
+    lower = (index & SUB_BUCKET_MASK) << shift
+    return lower + ((1 << shift) - 1) / 2
+
+
+class LatencyHistogram:
+    """Mergeable latency histogram with bounded relative error. Values are recorded in milliseconds."""
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    def record(self, value_ms: float):
+        value_us = max(0, int(round(value_ms * 1000)))
+        index = _bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+        if self.max_us is None or value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        if other.max_us is not None and (self.max_us is None or other.max_us > self.max_us):
+            self.max_us = other.max_us
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Return the value (ms) at the given percentile (0-100), or None if empty."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # Clamp to the exact extremes so p0/p100 never drift outside the observed range
+                value_us = min(max(_bucket_midpoint(index), self.min_us), self.max_us)
+                return value_us / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> Dict[str, Any]:
+        """Return count, mean, p50/p90/p99 and max in milliseconds, rounded for reporting."""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': round(self.total_us / self.count / 1000, 3),
+            'p50': round(self.percentile(50), 3),
+            'p90': round(self.percentile(90), 3),
+            'p99': round(self.percentile(99), 3),
+            'max': round(self.max_us / 1000, 3)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'counts': {str(index): count for index, count in self.counts.items()},
+            'count': self.count,
+            'totalUs': self.total_us,
+            'minUs': self.min_us,
+            'maxUs': self.max_us
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencyHistogram':
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data['counts'].items()}
+        histogram.count = data['count']
+        histogram.total_us = data['totalUs']
+        histogram.min_us = data['minUs']
+        histogram.max_us = data['maxUs']
+        return histogram
+
+
+class FunctionMetrics:
+    """Outcome counters and a latency histogram for one Lambda function."""
+
+    def __init__(self):
+        self.invocations = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.latency = LatencyHistogram()
+
+    def record(self, result: Dict[str, Any]):
+        self.invocations += 1
+        if result['status'] == 'PASS':
+            self.passed += 1
+        elif result['status'] == 'FAIL':
+            self.failed += 1
+        else:
+            self.errors += 1
+        # Throttled attempts that were retried, and invocations still throttled after the last retry
+        self.retries += result.get('retries', 0)
+        if result.get('throttled'):
+            self.throttled += 1
+        if result.get('latencyMs') is not None:
+            self.latency.record(result['latencyMs'])
+
+    def merge(self, other: 'FunctionMetrics'):
+        self.invocations += other.invocations
+        self.passed += other.passed
+        self.failed += other.failed
+        self.errors += other.errors
+        self.retries += other.retries
+        self.throttled += other.throttled
+        self.latency.merge(other.latency)
+
+    def report(self, elapsed: float = None) -> Dict[str, Any]:
+        report = {
+            'invocations': self.invocations,
+            'passed': self.passed,
+            'failed': self.failed,
+            'errors': self.errors,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'errorRate': round((self.invocations - self.passed) / self.invocations, 4) if self.invocations else 0.0,
+            'latencyMs': self.latency.summary()
+        }
+        if elapsed is not None:
+            report['throughput'] = round(self.invocations / elapsed, 2) if elapsed else 0.0
+        return report
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'invocations': self.invocations,
+            'passed': self.passed,
+            'failed': self.failed,
+            'errors': self.errors,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'latency': self.latency.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'FunctionMetrics':
+        metrics = cls()
+        for counter in ('invocations', 'passed', 'failed', 'errors', 'retries', 'throttled'):
+            setattr(metrics, counter, data[counter])
+        metrics.latency = LatencyHistogram.from_dict(data['latency'])
+        return metrics
+
+
+class MetricsRegistry:
+    """Thread-safe collection of FunctionMetrics keyed by function name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.functions: Dict[str, FunctionMetrics] = {}
+
+    def record(self, result: Dict[str, Any]):
+        """Record one invocation result dict as returned by invoke_lambda/invoke_lambda_direct."""
+        with self._lock:
+            metrics = self.functions.get(result['function'])
+            if metrics is None:
+                metrics = self.functions[result['function']] = FunctionMetrics()
+            metrics.record(result)
+
+    def latency_summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: metrics.latency.summary() for name, metrics in sorted(self.functions.items())}
+
+    def report(self, elapsed: float = None) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: metrics.report(elapsed) for name, metrics in sorted(self.functions.items())}
+
+    def merge(self, other: 'MetricsRegistry'):
+        with self._lock:
+            for name, metrics in other.functions.items():
+                if name not in self.functions:
+                    self.functions[name] = FunctionMetrics()
+                self.functions[name].merge(metrics)
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Lossless, JSON-serializable form, for shipping a worker's metrics to the process that merges them."""
+        with self._lock:
+            return {name: metrics.to_dict() for name, metrics in self.functions.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, Any]]) -> 'MetricsRegistry':
+        registry = cls()
+        registry.functions = {name: FunctionMetrics.from_dict(metrics) for name, metrics in data.items()}
+        return registry
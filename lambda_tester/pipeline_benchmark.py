@@ -0,0 +1,260 @@
+"""End-to-end benchmark of the goal creation pipeline.
+
+GoalCreationRequestEventProducer returns as soon as it has put a
+GoalCreationRequestEvent on `goal-event-bus-{stage}`; the goal is only
+written later, when EventBridge delivers the event to
+CreateGoalFromGoalCreationRequestEvent. This fires N producer requests
+concurrently (each for its own character name) and polls the GoalTracker
+table until every expected goal item appears, reporting the
+producer -> persisted latency distribution and pipeline throughput.
+
+Polling is batched: each round reads every benchmark user's partition with
+one paginated, key-only Query on the goal sort-key prefix, instead of one
+read per outstanding request. Latencies are therefore measured to within
+one poll interval.
+
+    python3 pipeline_benchmark.py --table-name GoalTracker-dev --requests 200 --concurrency 25
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import concurrent.futures
+from typing import List, Dict, Any, Tuple
+
+import lambda_tester
+from chain_dag import load_steps
+from lambda_tester import log, invoke_lambda, extract_user_id
+from load_generator import new_run_id, release_users
+from metrics import LatencyHistogram
+
+# Sort key of the goal item CreateGoalFromGoalCreationRequestEvent writes in the user's partition
+DEFAULT_GOAL_SK_TEMPLATE = 'CHARACTER#{characterName}#GOAL#'
+
+
+def _goal_sk_pattern(template: str) -> Tuple[str, 're.Pattern']:
+    """Return the sort-key prefix shared by all goals and a regex that captures the character name."""
+    head, _, tail = template.partition('{characterName}')
+    return head, re.compile(re.escape(head) + r'(?P<name>[^#]+)' + re.escape(tail))
+
+
+def query_goal_keys(table_name: str, user_id: str, prefix: str) -> Tuple[List[str], int]:
+    """Return the sort keys under `prefix` in the user's partition, and how many Query pages that took."""
+    client = lambda_tester.get_dynamodb_client()
+    query = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'pk = :pk AND begins_with(sk, :prefix)',
+        'ExpressionAttributeValues': {':pk': f"USER#{user_id}", ':prefix': prefix},
+        'ProjectionExpression': 'sk',
+    }
+    sort_keys, pages = [], 0
+    while True:
+        response = client.query(**query)
+        pages += 1
+        sort_keys.extend(item['sk'] for item in response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return sort_keys, pages
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+class PipelineTracker:
+    """Send times of requests still waiting for their goal item, and the resulting latencies."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pending: Dict[str, Dict[str, float]] = {}
+        self.end_to_end = LatencyHistogram()
+        self.producer = LatencyHistogram()
+        self.producer_failures: List[Dict[str, Any]] = []
+        self.persisted = 0
+        self.first_sent = None
+        self.last_persisted = None
+
+    def sending(self, user_id: str, name: str):
+        now = time.monotonic()
+        with self._lock:
+            self.pending.setdefault(user_id, {})[name] = now
+            if self.first_sent is None:
+                self.first_sent = now
+
+    def produced(self, user_id: str, name: str, result: Dict[str, Any]):
+        self.producer.record(result['latencyMs'])
+        if result['status'] != 'PASS':
+            with self._lock:
+                self.pending.get(user_id, {}).pop(name, None)
+                self.producer_failures.append({'characterName': name, 'status': result['status'],
+                                               'statusCode': result.get('statusCode'), 'error': result.get('error')})
+
+    def found(self, user_id: str, name: str, seen_at: float):
+        with self._lock:
+            sent_at = self.pending.get(user_id, {}).pop(name, None)
+            if sent_at is None:
+                return
+            self.persisted += 1
+            self.last_persisted = seen_at
+        self.end_to_end.record((seen_at - sent_at) * 1000)
+
+    def outstanding(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {user_id: list(names) for user_id, names in self.pending.items() if names}
+
+
+def _poll(tracker: PipelineTracker, table_name: str, template: str, poll_interval: float,
+          producers_done: threading.Event, deadline: float, workers: int) -> Dict[str, int]:
+    """Poll until every successfully produced request has a goal item or the deadline passes."""
+    prefix, pattern = _goal_sk_pattern(template)
+    rounds = pages = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            outstanding = tracker.outstanding()
+            if not outstanding and producers_done.is_set():
+                break
+            if time.monotonic() >= deadline:
+                break
+            round_start = time.monotonic()
+            queries = {executor.submit(query_goal_keys, table_name, user_id, prefix): user_id
+                       for user_id in outstanding}
+            for future in concurrent.futures.as_completed(queries):
+                seen_at = time.monotonic()
+                try:
+                    sort_keys, query_pages = future.result()
+                except Exception as e:
+                    log(f"Poll error: {str(e)}")
+                    continue
+                pages += query_pages
+                for sk in sort_keys:
+                    match = pattern.match(sk)
+                    if match:
+                        tracker.found(queries[future], match.group('name'), seen_at)
+            rounds += 1
+            time.sleep(max(0.0, poll_interval - (time.monotonic() - round_start)))
+    return {'rounds': rounds, 'queryPages': pages}
+
+
+def _create_users(steps: Dict[str, Any], stage: str, count: int) -> List[str]:
+    user_ids = []
+    for _ in range(count):
+        event = steps['CreateUser'].build_event({'email': f"{uuid.uuid4()}@email.com"})
+        user_id = extract_user_id([invoke_lambda('CreateUser', event, stage)])
+        if not user_id:
+            raise RuntimeError("CreateUser failed; cannot set up the pipeline benchmark")
+        user_ids.append(user_id)
+    return user_ids
+
+
+def run_pipeline_benchmark(stage: str = None, table_name: str = None, requests: int = 100, users: int = 1,
+                           concurrency: int = 20, poll_interval: float = 0.25, timeout: float = 60.0,
+                           goal_sk_template: str = DEFAULT_GOAL_SK_TEMPLATE,
+                           retain_data: bool = False) -> Dict[str, Any]:
+    """Fire `requests` goal creation requests and measure how long each takes to land as a goal item.
+
+    Requests are spread round-robin over `users` freshly created users, each
+    with a unique character name. `timeout` bounds the whole run; requests
+    whose goal never appears are reported as lost.
+    """
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+    if '{characterName}' not in goal_sk_template:
+        raise ValueError("goal_sk_template must contain {characterName}")
+
+    steps = {step.function: step for step in load_steps()}
+    producer_step = steps['GoalCreationRequestEventProducer']
+    run_id = new_run_id()
+    lambda_tester.get_backend().configure(max_pool_connections=concurrency + users)
+    lambda_tester.get_backend().use_table(table_name)
+
+    log(f"Pipeline benchmark run {run_id}: creating {users} benchmark users in stage: {stage}")
+    user_ids = _create_users(steps, stage, users)
+    tracker = PipelineTracker()
+    producers_done = threading.Event()
+    start = time.monotonic()
+    deadline = start + timeout
+
+    def produce(i: int):
+        user_id = user_ids[i % len(user_ids)]
+        name = f"bench-{i}"
+        event = producer_step.build_event({'userId': user_id})
+        event['pathParameters'] = {**event.get('pathParameters', {}), 'userId': user_id, 'name': name}
+        tracker.sending(user_id, name)
+        tracker.produced(user_id, name, invoke_lambda(producer_step.function, event, stage))
+
+    log(f"Sending {requests} goal creation requests ({concurrency} concurrent), polling every {poll_interval}s")
+    verbose = lambda_tester.VERBOSE
+    lambda_tester.VERBOSE = False
+    poll_result = {}
+    poller = threading.Thread(target=lambda: poll_result.update(_poll(
+        tracker, table_name, goal_sk_template, poll_interval, producers_done, deadline, max(1, min(users, 16)))))
+    try:
+        poller.start()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(produce, range(requests)))
+        producers_done.set()
+        poller.join()
+    finally:
+        producers_done.set()
+        lambda_tester.VERBOSE = verbose
+        release_users(run_id, table_name, user_ids, retain_data)
+
+    lost = sum(len(names) for names in tracker.outstanding().values())
+    window = (tracker.last_persisted - tracker.first_sent) if tracker.persisted else 0.0
+    log(f"Pipeline benchmark completed. Persisted: {tracker.persisted}/{requests}, "
+        f"Producer failures: {len(tracker.producer_failures)}, Lost: {lost}")
+    return {
+        'runId': run_id,
+        'stage': stage,
+        'requests': requests,
+        'users': users,
+        'concurrency': concurrency,
+        'pollIntervalSeconds': poll_interval,
+        'persisted': tracker.persisted,
+        'producerFailures': tracker.producer_failures[:20],
+        'producerFailureCount': len(tracker.producer_failures),
+        'lost': lost,
+        'durationSeconds': round(time.monotonic() - start, 3),
+        'throughput': round(tracker.persisted / window, 2) if window else 0.0,
+        'producerLatencyMs': tracker.producer.summary(),
+        'endToEndLatencyMs': tracker.end_to_end.summary(),
+        'polling': poll_result
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    from backends import use_backend
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Measure producer -> persisted latency of the goal creation pipeline')
+    parser.add_argument('--table-name', required=True, help='DynamoDB table name (required)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--backend', choices=['aws', 'local'],
+                        help='Run against AWS or the offline in-process stand-ins (defaults to LAMBDA_TESTER_BACKEND, else aws)')
+    parser.add_argument('--requests', type=int, default=100, help='Goal creation requests to send (default: 100)')
+    parser.add_argument('--users', type=int, default=1, help='Users to spread the requests over (default: 1)')
+    parser.add_argument('--concurrency', type=int, default=20, help='Producer requests in flight (default: 20)')
+    parser.add_argument('--poll-interval', type=float, default=0.25, help='Seconds between table polls (default: 0.25)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Give up on missing goals after this many seconds (default: 60)')
+    parser.add_argument('--goal-sk-template', default=DEFAULT_GOAL_SK_TEMPLATE,
+                        help=f"Sort-key prefix of a persisted goal (default: {DEFAULT_GOAL_SK_TEMPLATE})")
+    parser.add_argument('--retain-data', action='store_true', help='Keep the benchmark users and goals (recorded for bulk_cleanup.py --run-id)')
+    args = parser.parse_args()
+
+    load_env()
+    if args.backend:
+        use_backend(args.backend)
+    print(json.dumps(run_pipeline_benchmark(
+        stage=args.stage,
+        table_name=args.table_name,
+        requests=args.requests,
+        users=args.users,
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        timeout=args.timeout,
+        goal_sk_template=args.goal_sk_template,
+        retain_data=args.retain_data
+    ), indent=2))
@@ -0,0 +1,197 @@
+"""Multi-process load driver, for load runs one tester process can't drive.
+
+Encoding and decoding payloads is CPU work done under the GIL, so a single
+process saturates a core long before the account's Lambda concurrency is
+reached. `run_load_processes` splits a load run into shards, one per worker
+process: users, the open-loop rate, the concurrency and the async in-flight
+limit are divided evenly, and each worker drives its shard with its own
+invocation engine and connection pool. Workers clean up their own users and
+send back only compact partial aggregates (chain counters and the lossless
+latency histograms from metrics.py, as plain dicts), which the parent merges
+into one report shaped like `run_load`'s. Users that were retained or
+failed to clean up are listed in the report's `userIds` as well as the
+run's manifest, since a manifest written inside a Lambda doesn't outlive it.
+
+    python3 lambda_tester.py --table-name GoalTracker-dev --load --processes 8 --rate 400 --concurrency 400 --duration 60
+"""
+import multiprocessing
+import os
+import concurrent.futures
+from typing import List, Dict, Any, Callable, Tuple
+
+from backends import get_backend, use_backend
+from bulk_cleanup import cleanup_users, record_run_users
+from chain_dag import load_steps
+from lambda_tester import log
+from load_generator import LoadStats, check_load_args, configure_pool, execute_load, new_run_id
+from result_sink import ResultSink
+
+
+def split_evenly(total: int, parts: int) -> List[int]:
+    """Split `total` into `parts` integers that differ by at most one."""
+    share, remainder = divmod(total, parts)
+    return [share + (1 if i < remainder else 0) for i in range(parts)]
+
+
+def plan_shards(processes: int, users: int = None, rate: float = None, concurrency: int = 10,
+                max_in_flight: int = None) -> List[Dict[str, Any]]:
+    """Divide a load run between at most `processes` workers, each getting at least one chain slot."""
+    processes = min(processes, concurrency, *(limit for limit in (users, max_in_flight) if limit))
+    concurrencies = split_evenly(concurrency, processes)
+    users_per_shard = split_evenly(users, processes) if users is not None else [None] * processes
+    in_flight = split_evenly(max_in_flight, processes) if max_in_flight else [None] * processes
+    return [{
+        'shard': i,
+        'users': users_per_shard[i],
+        'rate': rate / processes if rate else None,
+        'concurrency': concurrencies[i],
+        'max_in_flight': in_flight[i]
+    } for i in range(processes)]
+
+
+def shard_results_file(results_file: str, shard: int) -> str:
+    """Per-shard JSONL path: results.jsonl -> results.3.jsonl."""
+    if results_file is None:
+        return None
+    if results_file == '-':
+        raise ValueError("Streaming results to stdout ('-') is not supported with several processes")
+    root, ext = os.path.splitext(results_file)
+    return f"{root}.{shard}{ext}"
+
+
+def run_shard(shard: Dict[str, Any]) -> Dict[str, Any]:
+    """Worker entry point: drive one shard and return its partial aggregates (LoadStats.to_dict()).
+
+    Unless `retain_data` is set, the shard's users are cleaned up here, so
+    the returned `userIds` are only the ones the parent still has to record
+    in the run's manifest. A shard whose run raises returns
+    {'shard', 'error', 'userIds'}, so its users aren't lost with it.
+    """
+    if shard.get('backend'):
+        use_backend(shard['backend'])
+    get_backend().use_table(shard['table_name'])
+    steps = load_steps(chains=shard['chains'])
+    configure_pool(steps, shard['engine'], shard['concurrency'], shard['max_in_flight'], shard['cleanup_workers'])
+    stats = LoadStats(ResultSink(shard['results_file']))
+    error = None
+    try:
+        elapsed = execute_load(stats, steps, shard['stage'], shard['users'], shard['rate'], shard['concurrency'],
+                               shard['duration'], shard['engine'], shard['max_in_flight'])
+    except Exception as e:
+        error = str(e)
+    finally:
+        stats.sink.close()
+        if not shard['retain_data']:
+            cleanup = cleanup_users(shard['table_name'], stats.user_ids, max_workers=shard['cleanup_workers'])
+            stats.user_ids = list(cleanup['failedUsers'])
+    if error:
+        return {'shard': shard['shard'], 'error': error, 'userIds': stats.user_ids}
+    return {'durationSeconds': elapsed, **stats.to_dict()}
+
+
+def run_shards_in_processes(shards: List[Dict[str, Any]],
+                           target: Callable[[Dict[str, Any]], Dict[str, Any]] = run_shard) -> List[Dict[str, Any]]:
+    """Run `target` (default run_shard) on each shard in its own worker process.
+
+    A shard that raises yields {'shard', 'error'} instead of a partial
+    (run_shard itself reports a failed run with its `userIds`).
+    """
+    # Spawn rather than fork: the parent may already hold threads and open connections
+    context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+        futures = [executor.submit(target, shard) for shard in shards]
+        partials = []
+        for shard, future in zip(shards, futures):
+            try:
+                partials.append(future.result())
+            except Exception as e:
+                partials.append({'shard': shard['shard'], 'error': str(e)})
+        return partials
+
+
+def merge_partials(partials: List[Dict[str, Any]]) -> Tuple[LoadStats, float]:
+    """Merge shard partials (skipping failed shards) into one LoadStats; the elapsed time is the slowest shard's."""
+    stats = LoadStats()
+    completed = [partial for partial in partials if 'error' not in partial]
+    for partial in completed:
+        stats.merge_dict(partial)
+    return stats, max((partial['durationSeconds'] for partial in completed), default=0.0)
+
+
+def run_load_processes(stage: str = None, table_name: str = None, processes: int = None, users: int = None,
+                       rate: float = None, concurrency: int = 10, duration: float = None,
+                       retain_data: bool = False, engine: str = 'threads', max_in_flight: int = None,
+                       chains: List[str] = None, cleanup_workers: int = 16, results_file: str = None,
+                       run_shards: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]] = None) -> dict:
+    """Run a load run (see load_generator.run_load) split across `processes` worker processes.
+
+    `processes` defaults to the number of CPUs. With `results_file`, each
+    shard streams to its own file (results.jsonl -> results.0.jsonl, ...).
+    `run_shards` replaces how the shards are executed (default:
+    run_shards_in_processes); it must return one run_shard() partial, or a
+    dict with an `error` (and the shard's remaining `userIds`, if known)
+    per shard. Failed shards are listed under `shardErrors` and left out of
+    the merged metrics, but their users are still recorded.
+    """
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+
+    check_load_args(users, rate, concurrency, duration, engine)
+    if processes is not None and processes < 1:
+        raise ValueError("processes must be at least 1")
+
+    mode = 'open-loop' if rate else 'closed-loop'
+    run_id = new_run_id()
+    shards = plan_shards(processes or os.cpu_count() or 1, users, rate, concurrency, max_in_flight)
+    for shard in shards:
+        shard.update({
+            'stage': stage,
+            'table_name': table_name,
+            'duration': duration,
+            'engine': engine,
+            'chains': chains or ['user'],
+            'retain_data': retain_data,
+            'cleanup_workers': max(1, cleanup_workers // len(shards)),
+            'results_file': shard_results_file(results_file, shard['shard']),
+            # Workers build their own backend; they inherit the environment, not the parent's clients
+            'backend': get_backend().name
+        })
+    log(f"Starting {mode} load run {run_id} in stage: {stage} using {engine} engine across {len(shards)} shards "
+        f"(users={users}, rate={rate}, concurrency={concurrency}, duration={duration})")
+
+    partials = (run_shards or run_shards_in_processes)(shards)
+    shard_errors = [{'shard': partial['shard'], 'error': partial['error']} for partial in partials if 'error' in partial]
+    for error in shard_errors:
+        log(f"Warning: Shard {error['shard']} failed: {error['error']}")
+
+    stats, elapsed = merge_partials(partials)
+    for partial in partials:
+        if 'error' in partial:
+            stats.user_ids.extend(partial.get('userIds', []))
+    if retain_data:
+        path = record_run_users(run_id, stats.user_ids)
+        log(f"Retained {len(stats.user_ids)} test users; manifest written to {path}")
+    elif stats.user_ids:
+        path = record_run_users(run_id, stats.user_ids)
+        log(f"Warning: Failed to clean up {len(stats.user_ids)} users; manifest written to {path}")
+
+    report = stats.report(elapsed)
+    log(f"Load run completed. Chains: {report['chains']['completed']}, "
+        f"Failed: {report['chains']['failed']}, Elapsed: {elapsed:.1f}s")
+    return {
+        'runId': run_id,
+        'mode': mode,
+        'engine': engine,
+        'shards': len(shards),
+        'stage': stage,
+        'durationSeconds': round(elapsed, 3),
+        **report,
+        **({'shardErrors': shard_errors} if shard_errors else {}),
+        **({'userIds': stats.user_ids} if stats.user_ids else {})
+    }
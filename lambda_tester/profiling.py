@@ -0,0 +1,141 @@
+"""Where the tester's own time goes: per-phase invocation timings and whole-run cProfile.
+
+`PhaseProfiler`, installed as `lambda_tester.PROFILER`, splits every
+invocation into phases and keeps a latency histogram per function and phase:
+
+- `build`: rendering the event payload (API Gateway template or dumps)
+- `invoke`: the Lambda Invoke call, including throttle retries
+- `read`: `response['Payload'].read()`
+- `decode`: `json.loads` of the payload
+
+If `build`, `read` and `decode` are a large share of an invocation, the
+harness rather than the Lambda is the bottleneck. With no profiler
+installed, each phase boundary costs one no-op method call.
+
+`RunProfile` runs cProfile on every thread for the whole run (worker
+threads included, which `python -m cProfile` misses) and writes the merged
+stats to a file for `pstats` or snakeviz.
+
+    python3 lambda_tester.py --table-name GoalTracker-dev --load --users 500 --profile-phases --cprofile run.prof
+"""
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from typing import List, Dict, Any
+
+from metrics import LatencyHistogram
+
+PHASES = ('build', 'invoke', 'read', 'decode')
+HARNESS_PHASES = ('build', 'read', 'decode')
+
+
+class PhaseTimer:
+    """Times consecutive phases of one invocation; `mark(phase)` closes the phase that just ran."""
+
+    def __init__(self, profiler: 'PhaseProfiler', function_name: str):
+        self._profiler = profiler
+        self._function = function_name
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self._profiler.record(self._function, phase, (now - self._last) * 1000)
+        self._last = now
+
+
+class NullTimer:
+    """Stands in for PhaseTimer when profiling is off."""
+
+    def mark(self, phase: str):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class PhaseProfiler:
+    """Thread-safe per-function, per-phase latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases: Dict[str, Dict[str, LatencyHistogram]] = {}
+
+    def timer(self, function_name: str) -> PhaseTimer:
+        return PhaseTimer(self, function_name)
+
+    def record(self, function_name: str, phase: str, elapsed_ms: float):
+        with self._lock:
+            phases = self.phases.get(function_name)
+            if phases is None:
+                phases = self.phases[function_name] = {}
+            histogram = phases.get(phase)
+            if histogram is None:
+                histogram = phases[phase] = LatencyHistogram()
+            histogram.record(elapsed_ms)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per function: each phase's latency summary and the share of time spent in the harness itself."""
+        report = {}
+        with self._lock:
+            for name, phases in sorted(self.phases.items()):
+                total_us = sum(histogram.total_us for histogram in phases.values())
+                harness_us = sum(phases[phase].total_us for phase in HARNESS_PHASES if phase in phases)
+                report[name] = {
+                    'phasesMs': {phase: phases[phase].summary() for phase in PHASES if phase in phases},
+                    'harnessShare': round(harness_us / total_us, 4) if total_us else 0.0
+                }
+        return report
+
+
+def phase_timer(profiler: PhaseProfiler, function_name: str):
+    """A PhaseTimer for `function_name`, or the shared no-op timer when `profiler` is None."""
+    return profiler.timer(function_name) if profiler else NULL_TIMER
+
+
+class RunProfile:
+    """cProfile across all threads started while it is active. Use as a context manager, or start()/stop()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+
+    def _profile_thread(self, *_):
+        # Called by threading.setprofile on a new thread's first event; hand the thread over to cProfile
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        threading.setprofile(self._profile_thread)
+        self._profile_thread()
+        return self
+
+    def stop(self):
+        """Stop profiling and write the merged stats of every profiled thread to `path`."""
+        threading.setprofile(None)
+        sys.setprofile(None)
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            profile.disable()
+        self.stats = pstats.Stats(*profiles)
+        self.stats.dump_stats(self.path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def top(self, limit: int = 25) -> str:
+        """The `limit` functions with the most cumulative time, as pstats prints them."""
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
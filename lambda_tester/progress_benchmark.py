@@ -0,0 +1,338 @@
+"""Goal progress time-series benchmark for GoalProgressCreator.
+
+Progress items are the table's highest-volume data, written by
+GoalProgressCreator as it consumes GoalProgressUpdateEvents from
+`goal-event-bus-{stage}`, one item per snapshot under the goal:
+
+    USER#<userId> / CHARACTER#<name>#GOAL#<goalId>#PROGRESS#<timestamp>
+
+Write phase: seed goals for synthetic users, then generate `snapshots_per_day`
+progress events per goal over `weeks` of simulated history, in time order,
+and publish them with `event_publisher.EventPublisher` in stages (the first
+week, month, ... of history). After each stage the table is polled until
+every progress item has landed, which gives end-to-end write throughput
+(publish -> last item persisted, to within one poll interval, summed over
+the stages).
+
+Partition sweep: after each stage, time the same read, the latest
+`sweep_window_days` of goal histories, so only the partition's population
+changes between stages. `kneePartitionItems` is the progress items per
+partition at the first stage whose p50 is more than twice that of the
+first, i.e. where item count per partition starts to hurt.
+
+Read phase: read the full histories as range queries on `sk`
+(`BETWEEN <prefix><first> AND <prefix><last>`) for growing windows (a week,
+a month, ...), which shows how latency, pages and RCU scale with result size.
+
+    python3 progress_benchmark.py --table-name GoalTracker-dev --users 10 --goals-per-user 3 --weeks 12
+    python3 progress_benchmark.py --backend local --table-name GoalTracker-dev --weeks 52 --snapshots-per-day 4
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import concurrent.futures
+from collections import Counter
+from typing import List, Dict, Any
+
+import lambda_tester
+from bulk_cleanup import BATCH_WRITE_LIMIT, batch_put
+from event_publisher import EventPublisher
+from lambda_tester import log
+from load_generator import new_run_id, release_users
+from local_lambdas import EVENT_SOURCE, GOAL_PROGRESS_UPDATE_EVENT_DETAIL_TYPE
+from metrics import LatencyHistogram
+from table_benchmark import query_all, user_items
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+READ_WINDOWS_DAYS = (7, 30, 90, 180, 365, 730)
+
+
+def seed_goals(table_name: str, users: int, goals_per_user: int,
+               goals: List[Dict[str, str]] = None) -> List[Dict[str, str]]:
+    """Write users with one character and `goals_per_user` goals each; returns the goals.
+
+    Each user's goals are appended to `goals` (if given) before its writes
+    start, so a caller can clean up a partially seeded table if seeding fails.
+    """
+    if goals is None:
+        goals = []
+    for _ in range(users):
+        user_id = str(uuid.uuid4())
+        items, progress_prefixes = user_items(user_id, f"{user_id}@email.com", characters=1, channels=0,
+                                              goals_per_character=goals_per_user, progress_per_goal=0,
+                                              start=time.time())
+        for prefix in progress_prefixes:
+            # CHARACTER#<name>#GOAL#<goalId>#PROGRESS#
+            _, name, _, goal_id, _, _ = prefix.split('#')
+            goals.append({'userId': user_id, 'characterName': name, 'goalId': goal_id, 'prefix': prefix})
+        for j in range(0, len(items), BATCH_WRITE_LIMIT):
+            batch_put(table_name, items[j:j + BATCH_WRITE_LIMIT])
+    return goals
+
+
+def progress_entries(goals: List[Dict[str, str]], stage: str, start: float, weeks: int, snapshots_per_day: int,
+                     seed: int = 42) -> List[Dict[str, Any]]:
+    """PutEvents entries for every goal's snapshots over `weeks` of history from `start`, in simulated time order."""
+    rng = random.Random(seed)
+    interval = 86400 / snapshots_per_day
+    values = {goal['goalId']: rng.randint(0, 1_000_000) for goal in goals}
+    entries = []
+    for tick in range(weeks * 7 * snapshots_per_day):
+        timestamp = time.strftime(TIMESTAMP_FORMAT, time.gmtime(start + tick * interval))
+        for goal in goals:
+            values[goal['goalId']] += rng.randint(0, 5000)
+            entries.append({
+                'Source': EVENT_SOURCE,
+                'DetailType': GOAL_PROGRESS_UPDATE_EVENT_DETAIL_TYPE,
+                'Detail': json.dumps({'userId': goal['userId'], 'characterName': goal['characterName'],
+                                      'goalId': goal['goalId'], 'currentValue': values[goal['goalId']],
+                                      'timestamp': timestamp}),
+                'EventBusName': f"goal-event-bus-{stage}"
+            })
+    return entries
+
+
+def count_progress(table_name: str, goal: Dict[str, str]) -> int:
+    """Number of progress items persisted for one goal."""
+    client = lambda_tester.get_dynamodb_client()
+    query = {
+        'TableName': table_name,
+        'KeyConditionExpression': 'pk = :pk AND begins_with(sk, :prefix)',
+        'ExpressionAttributeValues': {':pk': f"USER#{goal['userId']}", ':prefix': goal['prefix']},
+        'Select': 'COUNT'
+    }
+    count = 0
+    while True:
+        response = client.query(**query)
+        count += response['Count']
+        if 'LastEvaluatedKey' not in response:
+            return count
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def wait_for_progress(table_name: str, goals: List[Dict[str, str]], expected_per_goal: int, timeout: float,
+                      poll_interval: float = 1.0, workers: int = 16) -> Dict[str, Any]:
+    """Poll until every goal has `expected_per_goal` progress items or `timeout` passes.
+
+    Polls at least once, so the counts are real even when the time is already up.
+    """
+    deadline = time.monotonic() + timeout
+    pending = list(goals)
+    rounds = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            rounds += 1
+            counts = list(executor.map(lambda goal: count_progress(table_name, goal), pending))
+            persisted = sum(min(count, expected_per_goal) for count in counts) + \
+                (len(goals) - len(pending)) * expected_per_goal
+            pending = [goal for goal, count in zip(pending, counts) if count < expected_per_goal]
+            if not pending or time.monotonic() >= deadline:
+                break
+            time.sleep(poll_interval)
+    return {'persisted': persisted, 'incompleteGoals': len(pending), 'pollRounds': rounds,
+            'finishedAt': time.monotonic()}
+
+
+def history_days(total_days: int) -> List[int]:
+    """READ_WINDOWS_DAYS shorter than the history, then the whole history."""
+    return [days for days in READ_WINDOWS_DAYS if days < total_days] + [total_days]
+
+
+def time_reads(table_name: str, goals: List[Dict[str, str]], low: float, high: float, reads: int,
+               concurrency: int, rng: random.Random) -> Dict[str, Any]:
+    """Time `reads` range queries for [low, high] of randomly chosen goals' histories."""
+    low = time.strftime(TIMESTAMP_FORMAT, time.gmtime(low))
+    high = time.strftime(TIMESTAMP_FORMAT, time.gmtime(high))
+    latency = LatencyHistogram()
+    totals = {'items': 0, 'pages': 0, 'capacity': 0.0}
+    lock = threading.Lock()
+
+    def read(goal):
+        start = time.perf_counter()
+        items, pages, capacity = query_all({
+            'TableName': table_name,
+            'KeyConditionExpression': 'pk = :pk AND sk BETWEEN :low AND :high',
+            'ExpressionAttributeValues': {':pk': f"USER#{goal['userId']}",
+                                          ':low': goal['prefix'] + low, ':high': goal['prefix'] + high}
+        })
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            latency.record(elapsed_ms)
+            totals['items'] += items
+            totals['pages'] += pages
+            totals['capacity'] += capacity
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(read, [rng.choice(goals) for _ in range(reads)]))
+    return {
+        'itemsPerRead': round(totals['items'] / latency.count, 1) if latency.count else 0.0,
+        'pagesPerRead': round(totals['pages'] / latency.count, 2) if latency.count else 0.0,
+        'rcuPerRead': round(totals['capacity'] / latency.count, 2) if latency.count else 0.0,
+        'latencyMs': latency.summary()
+    }
+
+
+def read_windows(table_name: str, goals: List[Dict[str, str]], first_timestamp: float, total_days: int,
+                 reads: int, concurrency: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Time range queries over the first N days of goal histories, for growing N."""
+    rng = random.Random(seed)
+    results = []
+    for days in history_days(total_days):
+        window = {'days': days, **time_reads(table_name, goals, first_timestamp,
+                                             first_timestamp + days * 86400 - 1, reads, concurrency, rng)}
+        log(f"History read, {days} days: {window['itemsPerRead']} items, p50 {window['latencyMs'].get('p50')} ms, "
+            f"{window['pagesPerRead']} pages")
+        results.append(window)
+    return results
+
+
+def knee(stages: List[Dict[str, Any]], factor: float = 2.0):
+    """Partition size of the first stage whose p50 exceeds `factor` times the smallest stage's, if any."""
+    if not stages or not stages[0]['latencyMs'].get('count'):
+        return None
+    baseline = stages[0]['latencyMs']['p50']
+    for stage in stages[1:]:
+        if stage['latencyMs'].get('p50', 0) > factor * baseline:
+            return stage['progressItemsPerPartition']
+    return None
+
+
+def run_progress_benchmark(stage: str = None, table_name: str = None, users: int = 10, goals_per_user: int = 3,
+                           weeks: int = 12, snapshots_per_day: int = 4, senders: int = 8, reads: int = 200,
+                           concurrency: int = 10, sweep_window_days: int = 7, timeout: float = 300.0,
+                           retain_data: bool = False) -> Dict[str, Any]:
+    """Grow progress histories through the bus in stages, timing a fixed-window read at each partition size,
+    then time history reads of growing windows over the full history."""
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+
+    run_id = new_run_id()
+    lambda_tester.get_backend().configure(max_pool_connections=max(senders, concurrency, 16))
+    lambda_tester.get_backend().use_table(table_name)
+    goals = []
+    try:
+        seed_goals(table_name, users, goals_per_user, goals)
+        total_days = weeks * 7
+        history_start = int(time.time()) - total_days * 86400
+        entries = progress_entries(goals, stage, history_start, weeks, snapshots_per_day)
+        per_goal = total_days * snapshots_per_day
+        log(f"Progress benchmark run {run_id}: publishing {len(entries)} GoalProgressUpdateEvents "
+            f"for {len(goals)} goals ({per_goal} per goal) with {senders} senders")
+
+        # Entries are in simulated time order, so the first N days of history are a prefix of them
+        entries_per_day = snapshots_per_day * len(goals)
+        publisher = EventPublisher(senders=senders)
+        publish_latency = LatencyHistogram()
+        publishing = Counter()
+        error_codes = Counter()
+        write_seconds = 0.0
+        poll_rounds = 0
+        deadline = time.monotonic() + timeout
+        rng = random.Random(42)
+        stages = []
+        for days in history_days(total_days):
+            chunk = entries[(stages[-1]['days'] if stages else 0) * entries_per_day:days * entries_per_day]
+            start = time.monotonic()
+            report = publisher.publish(chunk)
+            persistence = wait_for_progress(table_name, goals, days * snapshots_per_day,
+                                            max(0.0, deadline - time.monotonic()))
+            write_seconds += persistence.pop('finishedAt') - start
+            poll_rounds += persistence['pollRounds']
+            publish_latency.merge(publisher.latency)
+            error_codes.update(report['errorCodes'])
+            for key in ('entries', 'published', 'failedEntries', 'retriedEntries', 'throttledCalls', 'calls',
+                        'publishSeconds'):
+                publishing[key] += report[key]
+
+            # The same-sized read (the latest `sweep_window_days`) at every partition size
+            window_days = min(sweep_window_days, days)
+            read = time_reads(table_name, goals, history_start + (days - window_days) * 86400,
+                              history_start + days * 86400 - 1, reads, concurrency, rng)
+            stages.append({'days': days, 'progressItemsPerPartition': days * snapshots_per_day * goals_per_user,
+                           'windowDays': window_days, **read})
+            log(f"{stages[-1]['progressItemsPerPartition']} progress items per partition: "
+                f"{window_days}-day read p50 {read['latencyMs'].get('p50')} ms, {read['itemsPerRead']} items")
+        log(f"Persisted {persistence['persisted']}/{len(entries)} progress items in {write_seconds:.1f}s")
+
+        windows = read_windows(table_name, goals, history_start, total_days, reads, concurrency)
+    finally:
+        release_users(run_id, table_name, sorted({goal['userId'] for goal in goals}), retain_data)
+
+    return {
+        'runId': run_id,
+        'stage': stage,
+        'goals': len(goals),
+        'progressItemsPerGoal': per_goal,
+        'progressItemsPerPartition': per_goal * goals_per_user,
+        'write': {
+            **publishing,
+            'publishSeconds': round(publishing['publishSeconds'], 3),
+            'publishThroughput': round(publishing['published'] / publishing['publishSeconds'], 1)
+            if publishing['publishSeconds'] else 0.0,
+            'errorCodes': dict(error_codes),
+            'putEventsLatencyMs': publish_latency.summary(),
+            **persistence,
+            'pollRounds': poll_rounds,
+            'endToEndSeconds': round(write_seconds, 3),
+            'endToEndThroughput': round(persistence['persisted'] / write_seconds, 1) if write_seconds else 0.0
+        },
+        'partitionSweep': {
+            'stages': stages,
+            'kneePartitionItems': knee(stages)
+        },
+        'read': {
+            'windows': windows
+        }
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    from backends import use_backend
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Benchmark GoalProgressCreator writes and goal history reads')
+    parser.add_argument('--table-name', help='DynamoDB table name (defaults to DYNAMODB_TABLE)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--backend', choices=['aws', 'local'],
+                        help='Run against AWS or the offline in-process stand-ins (defaults to LAMBDA_TESTER_BACKEND, else aws)')
+    parser.add_argument('--users', type=int, default=10, help='Synthetic users (default: 10)')
+    parser.add_argument('--goals-per-user', type=int, default=3, help='Goals per user (default: 3)')
+    parser.add_argument('--weeks', type=int, default=12, help='Weeks of simulated history (default: 12)')
+    parser.add_argument('--snapshots-per-day', type=int, default=4, help='Progress events per goal per day (default: 4)')
+    parser.add_argument('--senders', type=int, default=8, help='Parallel PutEvents senders (default: 8)')
+    parser.add_argument('--reads', type=int, default=200, help='Reads per history window and per partition-sweep stage (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=10, help='History reads in flight (default: 10)')
+    parser.add_argument('--sweep-window-days', type=int, default=7,
+                        help='Days of history read at each partition size in the sweep (default: 7)')
+    parser.add_argument('--timeout', type=float, default=300.0,
+                        help='Give up waiting for progress items after this many seconds (default: 300)')
+    parser.add_argument('--retain-data', action='store_true',
+                        help='Keep the benchmark users (recorded for bulk_cleanup.py --run-id)')
+    args = parser.parse_args()
+
+    load_env()
+    if args.backend:
+        use_backend(args.backend)
+    report = run_progress_benchmark(
+        stage=args.stage,
+        table_name=args.table_name,
+        users=args.users,
+        goals_per_user=args.goals_per_user,
+        weeks=args.weeks,
+        snapshots_per_day=args.snapshots_per_day,
+        senders=args.senders,
+        reads=args.reads,
+        concurrency=args.concurrency,
+        sweep_window_days=args.sweep_window_days,
+        timeout=args.timeout,
+        retain_data=args.retain_data
+    )
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,254 @@
+"""AIMD search for the maximum sustainable request rate of each Lambda.
+
+For each function the controller offers open-loop load in fixed windows,
+starting at `--start-rate`. After a clean window it raises the rate
+additively, by `--increase` requests/sec. After a window that breaches a limit
+it multiplies the rate by `--decrease-factor` (AIMD). A window breaches when:
+
+- more than `--max-throttle-ratio` of attempts were throttled
+  (TooManyRequestsException), counting attempts that a retry later got through,
+- invocations errored (not merely FAILed) above `--max-error-ratio`,
+- the p99 latency, measured from each request's scheduled start, exceeded
+  `--latency-slo-ms`, if one is set, or
+- the tester fell behind: fewer than 90% of the offered requests completed
+  within the window.
+
+The search stops after `--max-decreases` breaches or `--max-windows` windows.
+A function's maximum sustainable rate is the highest throughput it achieved
+in a clean window. Events come from config.json, with the variables
+(userId, characterName, ...) produced by one setup pass of the test DAG.
+
+    python3 rate_controller.py --table-name GoalTracker-dev --functions GetUser,GetCharacterHiscores --latency-slo-ms 500
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from typing import List, Dict, Any, Optional
+
+import lambda_tester
+from bulk_cleanup import cleanup_users
+from chain_dag import Step, load_steps
+from lambda_tester import log, invoke_step, extract_user_id, setup_variables
+from load_generator import run_open_loop
+from metrics import FunctionMetrics, LatencyHistogram
+
+BACKLOG_RATIO = 0.9
+
+
+class WindowStats:
+    """Outcomes of the invocations started during one probe window."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = FunctionMetrics()
+        self.user_ids: List[str] = []
+        self.last_completed = None
+        self.schedule_lag = LatencyHistogram()
+
+    def record(self, result: Dict[str, Any], lag_ms: float = 0.0):
+        user_id = extract_user_id([result])
+        with self._lock:
+            self.schedule_lag.record(lag_ms)
+            self.metrics.record(result)
+            self.last_completed = time.monotonic()
+            if user_id:
+                self.user_ids.append(user_id)
+
+
+def probe_window(step: Step, variables: Dict[str, Any], stage: str, rate: float, window_seconds: float,
+                 max_workers: int) -> WindowStats:
+    """Offer `rate` requests/sec of one step's event for `window_seconds`, open-loop.
+
+    Latency is measured from each request's scheduled start, so time spent
+    queued behind a saturated function counts against the latency SLO.
+    """
+    stats = WindowStats()
+    offered = max(1, round(rate * window_seconds))
+
+    def invoke_once(scheduled: float):
+        lag_ms = max(0.0, time.monotonic() - scheduled) * 1000
+        # Every call gets a fresh email so CreateUser probes don't collide
+        event = step.build_event({**variables, 'email': f"{uuid.uuid4()}@email.com"})
+        result = invoke_step(step, event, stage)
+        result['latencyMs'] = (time.monotonic() - scheduled) * 1000
+        stats.record(result, lag_ms)
+
+    run_open_loop(invoke_once, rate, max_workers, lambda started: started < offered)
+    return stats
+
+
+def evaluate_window(stats: WindowStats, rate: float, start: float, window_seconds: float,
+                    max_throttle_ratio: float, max_error_ratio: float,
+                    latency_slo_ms: Optional[float]) -> Dict[str, Any]:
+    """Summarize a window and decide whether it breached a limit."""
+    metrics = stats.metrics
+    attempts = metrics.invocations + metrics.retries
+    elapsed = max(window_seconds, (stats.last_completed or start) - start)
+    achieved = metrics.invocations / elapsed
+    latency = metrics.latency.summary()
+    throttle_ratio = (metrics.retries + metrics.throttled) / attempts if attempts else 0.0
+    error_ratio = metrics.errors / metrics.invocations if metrics.invocations else 0.0
+
+    breaches = []
+    if throttle_ratio > max_throttle_ratio:
+        breaches.append('throttling')
+    if error_ratio > max_error_ratio:
+        breaches.append('errors')
+    if latency_slo_ms is not None and latency.get('p99', 0) > latency_slo_ms:
+        breaches.append('latency')
+    if achieved < rate * BACKLOG_RATIO:
+        breaches.append('backlog')
+    return {
+        'offeredRps': round(rate, 2),
+        'achievedRps': round(achieved, 2),
+        'invocations': metrics.invocations,
+        'failed': metrics.failed,
+        'errors': metrics.errors,
+        'retries': metrics.retries,
+        'throttled': metrics.throttled,
+        'throttleRatio': round(throttle_ratio, 4),
+        'latencyMs': latency,
+        'scheduleLagMs': stats.schedule_lag.summary(),
+        'breaches': breaches
+    }
+
+
+def find_max_rate(step: Step, variables: Dict[str, Any], stage: str, start_rate: float = 5.0,
+                  increase: float = 5.0, decrease_factor: float = 0.5, window_seconds: float = 5.0,
+                  max_windows: int = 20, max_decreases: int = 3, max_throttle_ratio: float = 0.01,
+                  max_error_ratio: float = 0.01, latency_slo_ms: float = None,
+                  max_workers: int = 200) -> Dict[str, Any]:
+    """Run the AIMD search for one step. Returns its max sustainable rate, window history and created users."""
+    rate = start_rate
+    best = 0.0
+    decreases = 0
+    windows = []
+    user_ids = []
+    limited_by = []
+    for _ in range(max_windows):
+        start = time.monotonic()
+        stats = probe_window(step, variables, stage, rate, window_seconds, max_workers)
+        user_ids.extend(stats.user_ids)
+        window = evaluate_window(stats, rate, start, window_seconds, max_throttle_ratio, max_error_ratio,
+                                 latency_slo_ms)
+        windows.append(window)
+        log(f"{step.function}: offered {window['offeredRps']}/s, achieved {window['achievedRps']}/s, "
+            f"p99 {window['latencyMs'].get('p99', 0):.0f} ms, throttled {window['throttleRatio']:.1%}"
+            + (f" -> breach ({', '.join(window['breaches'])})" if window['breaches'] else ''))
+        if window['breaches']:
+            limited_by = window['breaches']
+            decreases += 1
+            if decreases >= max_decreases:
+                break
+            rate = max(start_rate * decrease_factor, rate * decrease_factor)
+        else:
+            best = max(best, window['achievedRps'])
+            rate += increase
+    return {
+        'maxSustainableRps': round(best, 2),
+        'limitedBy': limited_by,
+        'windows': windows,
+        'userIds': user_ids
+    }
+
+
+def run_rate_search(functions: List[str] = None, stage: str = None, table_name: str = None,
+                    retain_data: bool = False, **search) -> Dict[str, Any]:
+    """Find the max sustainable rate of each function (default: every step in config.json), one at a time."""
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+
+    steps = load_steps()
+    by_name = {step.function: step for step in steps}
+    functions = functions or list(by_name)
+    unknown = [name for name in functions if name not in by_name]
+    if unknown:
+        raise ValueError(f"No test block in config.json for: {', '.join(unknown)}")
+
+    lambda_tester.get_backend().configure(max_pool_connections=search.get('max_workers', 200))
+    lambda_tester.get_backend().use_table(table_name)
+    verbose = lambda_tester.VERBOSE
+    lambda_tester.VERBOSE = False
+    results = {}
+    user_ids = []
+    try:
+        variables = setup_variables(steps, stage)
+        if variables.get('userId'):
+            user_ids.append(variables['userId'])
+        for name in functions:
+            missing = by_name[name].inputs - variables.keys()
+            if missing:
+                log(f"Skipping {name}: setup did not produce {', '.join(sorted(missing))}")
+                continue
+            log(f"Searching for the max sustainable rate of {name}")
+            result = find_max_rate(by_name[name], variables, stage, **search)
+            user_ids.extend(result.pop('userIds'))
+            results[name] = result
+    finally:
+        lambda_tester.VERBOSE = verbose
+        if user_ids and not retain_data:
+            cleanup_users(table_name, user_ids)
+
+    return {
+        'stage': stage,
+        'maxSustainableRps': {name: result['maxSustainableRps'] for name, result in results.items()},
+        'functions': results
+    }
+
+
+def format_table(search: Dict[str, Any]) -> str:
+    header = f"{'Function':<40} {'Max RPS':>9} {'Windows':>8} {'Retries':>8}  Limited by"
+    lines = [header, '-' * len(header)]
+    for name, result in search['functions'].items():
+        retries = sum(window['retries'] for window in result['windows'])
+        lines.append(f"{name:<40} {result['maxSustainableRps']:>9.1f} {len(result['windows']):>8} "
+                     f"{retries:>8}  {', '.join(result['limitedBy']) or '-'}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Find the max sustainable request rate of each Lambda (AIMD)')
+    parser.add_argument('--table-name', required=True, help='DynamoDB table name (required)')
+    parser.add_argument('--functions', help='Comma-separated function names (default: every function with a test block)')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--start-rate', type=float, default=5.0, help='First window rate in requests/sec (default: 5)')
+    parser.add_argument('--increase', type=float, default=5.0, help='Additive increase after a clean window (default: 5)')
+    parser.add_argument('--decrease-factor', type=float, default=0.5, help='Multiplicative decrease after a breach (default: 0.5)')
+    parser.add_argument('--window', type=float, default=5.0, help='Seconds per probe window (default: 5)')
+    parser.add_argument('--max-windows', type=int, default=20, help='Windows per function (default: 20)')
+    parser.add_argument('--max-decreases', type=int, default=3, help='Stop after this many breaches (default: 3)')
+    parser.add_argument('--max-throttle-ratio', type=float, default=0.01, help='Throttled share of attempts that counts as a breach (default: 0.01)')
+    parser.add_argument('--max-error-ratio', type=float, default=0.01, help='Errored share of invocations that counts as a breach (default: 0.01)')
+    parser.add_argument('--latency-slo-ms', type=float, help='p99 latency that counts as a breach')
+    parser.add_argument('--max-workers', type=int, default=200, help='Invocations in flight at most (default: 200)')
+    parser.add_argument('--retain-data', action='store_true', help='Keep users created while probing')
+    parser.add_argument('--json', action='store_true', help='Print the full JSON results instead of the table')
+    args = parser.parse_args()
+
+    load_env()
+    search = run_rate_search(
+        functions=args.functions.split(',') if args.functions else None,
+        stage=args.stage,
+        table_name=args.table_name,
+        retain_data=args.retain_data,
+        start_rate=args.start_rate,
+        increase=args.increase,
+        decrease_factor=args.decrease_factor,
+        window_seconds=args.window,
+        max_windows=args.max_windows,
+        max_decreases=args.max_decreases,
+        max_throttle_ratio=args.max_throttle_ratio,
+        max_error_ratio=args.max_error_ratio,
+        latency_slo_ms=args.latency_slo_ms,
+        max_workers=args.max_workers
+    )
+    print(json.dumps(search, indent=2) if args.json else format_table(search))
@@ -0,0 +1,117 @@
+"""Streaming destination for invocation results.
+
+Each result is written as one JSON line (to a file, or stdout with `-`) the
+moment it arrives and folded into running aggregates: per-function counts
+and latency histograms, and which functions have passed. Only failures are
+kept in memory with their full payload, up to `max_failures`, so memory
+stays flat however many invocations a run makes.
+
+    {"time": 1729250000.123, "chain": 17, "function": "GetUser", "status": "PASS", "statusCode": 200, ...}
+"""
+import json
+import sys
+import threading
+import time
+from typing import List, Dict, Any
+
+from metrics import MetricsRegistry
+
+
+class ResultSink:
+    """Thread-safe JSONL writer plus incremental aggregates. Use as a context manager or call close()."""
+
+    def __init__(self, path: str = None, max_failures: int = 100):
+        self.metrics = MetricsRegistry()
+        self.max_failures = max_failures
+        self.passed: Dict[str, int] = {}
+        self.failures: List[Dict[str, Any]] = []
+        self.failure_count = 0
+        self.total = 0
+        self._lock = threading.Lock()
+        self._path = path
+        if path == '-':
+            self._file = sys.stdout
+        elif path:
+            self._file = open(path, 'w')
+        else:
+            self._file = None
+
+    def write(self, result: Dict[str, Any], **context):
+        """Stream one result (plus any context fields, e.g. `chain`) and update the aggregates."""
+        self.metrics.record(result)
+        line = None
+        if self._file:
+            line = json.dumps({'time': round(time.time(), 3), **context, **result}, default=str)
+        with self._lock:
+            self.total += 1
+            if line:
+                self._file.write(line + '\n')
+            if result['status'] == 'PASS':
+                self.passed[result['function']] = self.passed.get(result['function'], 0) + 1
+            else:
+                self.failure_count += 1
+                if len(self.failures) < self.max_failures:
+                    self.failures.append({**context, **result})
+
+    def failed_summary(self) -> List[Dict[str, Any]]:
+        """The retained failures, without response payloads."""
+        with self._lock:
+            return [{
+                **({'chain': failure['chain']} if 'chain' in failure else {}),
+                'function': failure['function'],
+                'status': failure['status'],
+                'statusCode': failure.get('statusCode'),
+                'error': failure.get('error')
+            } for failure in self.failures]
+
+    def summary(self) -> Dict[str, Any]:
+        """The passed/failed/summary report that run_tests returns."""
+        with self._lock:
+            passed = list(self.passed)
+            passed_count = sum(self.passed.values())
+            total = self.total
+        return {
+            'passed': passed,
+            'failed': self.failed_summary(),
+            'summary': {
+                'total': total,
+                'passed': passed_count,
+                'failed': total - passed_count,
+                'latency': self.metrics.latency_summary()
+            }
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The aggregates (not the streamed lines), JSON-serializable, for merging into another sink."""
+        with self._lock:
+            return {
+                'total': self.total,
+                'passed': dict(self.passed),
+                'failureCount': self.failure_count,
+                'failures': list(self.failures),
+                'metrics': self.metrics.to_dict()
+            }
+
+    def merge_dict(self, data: Dict[str, Any]):
+        """Fold another sink's to_dict() into this one's aggregates."""
+        self.metrics.merge(MetricsRegistry.from_dict(data['metrics']))
+        with self._lock:
+            self.total += data['total']
+            for function, count in data['passed'].items():
+                self.passed[function] = self.passed.get(function, 0) + count
+            self.failure_count += data['failureCount']
+            self.failures.extend(data['failures'][:self.max_failures - len(self.failures)])
+
+    def close(self):
+        if self._file and self._file is not sys.stdout:
+            self._file.close()
+        elif self._file:
+            self._file.flush()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,347 @@
+"""Access-pattern benchmark for the GoalTracker single-table design.
+
+Seeds the table with synthetic users laid out the way the services write
+them (see local_lambdas.py), then times each read the services perform:
+
+- `get_user`: GetItem on `USER#<id>` / `METADATA` (GetUser)
+- `user_by_email`: Query on `email-sk-index` for `email` + `METADATA` (CreateUser's duplicate check)
+- `characters`: Query `begins_with(sk, 'CHARACTER#')` (GetCharactersForUser; note it also reads every goal
+  and progress item, since they share the prefix)
+- `notification_channels`: Query `begins_with(sk, 'NOTIFICATION_CHANNEL#')` (GetNotificationChannelsForUser)
+- `goal_progress`: Query one goal's `...#GOAL#<id>#PROGRESS#` range (a goal's history)
+- `batch_get_users`: BatchGetItem of up to 100 METADATA items (duplicate draws are dropped)
+
+Target users are drawn uniformly or Zipf-skewed (`--skew`). For each pattern
+the report gives latency, throughput, items and pages read, consumed read
+capacity, and hot-partition skew: the busiest partition's share of the
+capacity consumed, its ratio to the mean partition, and its peak RCU/s
+against DynamoDB's 3,000 RCU per-partition limit.
+
+Runs against the local stand-in with `--backend local`, or a real table.
+Seeded users are deleted afterwards unless `--retain-data`.
+
+    python3 table_benchmark.py --backend local --table-name GoalTracker-dev --users 500 --progress-per-goal 90
+    python3 table_benchmark.py --table-name GoalTracker-dev --users 2000 --operations 5000 --skew 1.2
+"""
+import os
+import threading
+import time
+import uuid
+import concurrent.futures
+from collections import Counter
+from typing import List, Dict, Any, Callable, Tuple
+
+import lambda_tester
+from backoff import jittered_backoff
+from bulk_cleanup import BATCH_WRITE_LIMIT, MAX_ATTEMPTS, RetryCounter, batch_put
+from hiscores_benchmark import zipf_choices
+from lambda_tester import log
+from load_generator import new_run_id, release_users
+from metrics import LatencyHistogram
+
+PATTERNS = ('get_user', 'user_by_email', 'characters', 'notification_channels', 'goal_progress', 'batch_get_users')
+BATCH_GET_LIMIT = 100
+PARTITION_RCU_LIMIT = 3000
+GOAL_ATTRIBUTES = ('WOODCUTTING', 'FISHING', 'MINING', 'SLAYER', 'AGILITY', 'HERBLORE')
+CHANNEL_TYPES = ('EMAIL', 'SMS', 'DISCORD')
+
+
+def user_items(user_id: str, email: str, characters: int, channels: int, goals_per_character: int,
+               progress_per_goal: int, start: float) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Every item one synthetic user owns, and the progress sort-key prefixes of its goals."""
+    pk = f"USER#{user_id}"
+    created = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(start))
+    items = [{'pk': pk, 'sk': 'METADATA', 'userId': user_id, 'email': email, 'createdAt': created}]
+    progress_prefixes = []
+    for c in range(characters):
+        name = f"bench{c}"
+        items.append({'pk': pk, 'sk': f"CHARACTER#{name}", 'userId': user_id, 'name': name, 'createdAt': created})
+        for g in range(goals_per_character):
+            goal_id = str(uuid.uuid4())
+            goal_sk = f"CHARACTER#{name}#GOAL#{goal_id}"
+            attribute = GOAL_ATTRIBUTES[(c + g) % len(GOAL_ATTRIBUTES)]
+            items.append({'pk': pk, 'sk': goal_sk, 'userId': user_id, 'characterName': name, 'goalId': goal_id,
+                          'targetAttribute': attribute, 'targetType': 'SKILL', 'targetValue': 13034431,
+                          'createdAt': created})
+            progress_prefixes.append(f"{goal_sk}#PROGRESS#")
+            for p in range(progress_per_goal):
+                # One snapshot a day, oldest first
+                timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(start + p * 86400))
+                items.append({'pk': pk, 'sk': f"{goal_sk}#PROGRESS#{timestamp}", 'userId': user_id,
+                              'characterName': name, 'goalId': goal_id, 'currentValue': 1000 * (p + 1),
+                              'timestamp': timestamp})
+    for n in range(channels):
+        channel_type = CHANNEL_TYPES[n % len(CHANNEL_TYPES)]
+        channel_id = str(uuid.uuid4())
+        items.append({'pk': pk, 'sk': f"NOTIFICATION_CHANNEL#{channel_type}#{channel_id}", 'userId': user_id,
+                      'channelId': channel_id, 'channelType': channel_type, 'identifier': email, 'isActive': True})
+    return items, progress_prefixes
+
+
+def populate(table_name: str, users: int, characters: int = 2, channels: int = 2, goals_per_character: int = 2,
+             progress_per_goal: int = 30, workers: int = 16,
+             seeded: List[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Write `users` synthetic users with BatchWriteItem. Returns the users and a summary of the seeding.
+
+    Each user is appended to `seeded` (if given) before its writes start, so
+    a caller can clean up the users already written when seeding fails.
+    """
+    run = uuid.uuid4().hex[:8]
+    start_time = time.time() - progress_per_goal * 86400
+    if seeded is None:
+        seeded = []
+    retries = RetryCounter()
+    written = 0
+    started = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for i in range(users):
+            user_id = str(uuid.uuid4())
+            email = f"bench-{run}-{i}@email.com"
+            items, progress_prefixes = user_items(user_id, email, characters, channels, goals_per_character,
+                                                  progress_per_goal, start_time)
+            seeded.append({'userId': user_id, 'email': email, 'progressPrefixes': progress_prefixes})
+            futures.extend(executor.submit(batch_put, table_name, items[j:j + BATCH_WRITE_LIMIT], retries)
+                           for j in range(0, len(items), BATCH_WRITE_LIMIT))
+        for future in concurrent.futures.as_completed(futures):
+            written += future.result()
+    elapsed = time.monotonic() - started
+    log(f"Seeded {written} items for {users} users in {elapsed:.1f}s")
+    return seeded, {
+        'users': users,
+        'items': written,
+        'itemsPerUser': round(written / users, 1) if users else 0,
+        'durationSeconds': round(elapsed, 3),
+        'writeThroughput': round(written / elapsed, 1) if elapsed else 0.0,
+        'throttledRetries': retries.throttled,
+        'unprocessedRetries': retries.unprocessed
+    }
+
+
+def _capacity(response: Dict[str, Any]) -> float:
+    consumed = response.get('ConsumedCapacity') or {}
+    if isinstance(consumed, list):
+        return sum(entry.get('CapacityUnits', 0.0) for entry in consumed)
+    return consumed.get('CapacityUnits', 0.0)
+
+
+def query_all(query: Dict[str, Any]) -> Tuple[int, int, float]:
+    """Run a Query to exhaustion. Returns (items, pages, capacity units)."""
+    client = lambda_tester.get_dynamodb_client()
+    query = {**query, 'ReturnConsumedCapacity': 'TOTAL'}
+    items = pages = 0
+    capacity = 0.0
+    while True:
+        response = client.query(**query)
+        items += response['Count']
+        pages += 1
+        capacity += _capacity(response)
+        if 'LastEvaluatedKey' not in response:
+            return items, pages, capacity
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def pattern_operations(pattern: str, table_name: str) -> Callable[[List[Dict[str, Any]]], Tuple[List[str], int, int, float]]:
+    """The operation for one pattern: takes its target users, returns (partitions read, items, pages, capacity)."""
+    client = lambda_tester.get_dynamodb_client()
+
+    def get_user(targets):
+        response = client.get_item(TableName=table_name, Key={'pk': f"USER#{targets[0]['userId']}", 'sk': 'METADATA'},
+                                   ReturnConsumedCapacity='TOTAL')
+        return [f"USER#{targets[0]['userId']}"], int('Item' in response), 1, _capacity(response)
+
+    def user_by_email(targets):
+        email = targets[0]['email']
+        items, pages, capacity = query_all({
+            'TableName': table_name,
+            'IndexName': 'email-sk-index',
+            'KeyConditionExpression': 'email = :email AND sk = :sk',
+            'ExpressionAttributeValues': {':email': email, ':sk': 'METADATA'}
+        })
+        return [f"email-sk-index:{email}"], items, pages, capacity
+
+    def prefix_query(prefix: Callable[[Dict[str, Any]], str]):
+        def operation(targets):
+            pk = f"USER#{targets[0]['userId']}"
+            items, pages, capacity = query_all({
+                'TableName': table_name,
+                'KeyConditionExpression': 'pk = :pk AND begins_with(sk, :prefix)',
+                'ExpressionAttributeValues': {':pk': pk, ':prefix': prefix(targets[0])}
+            })
+            return [pk], items, pages, capacity
+        return operation
+
+    def batch_get_users(targets):
+        # BatchGetItem rejects duplicate keys, which skewed draws often contain
+        user_ids = dict.fromkeys(target['userId'] for target in targets)
+        keys = [{'pk': f"USER#{user_id}", 'sk': 'METADATA'} for user_id in user_ids]
+        request = {table_name: {'Keys': keys}}
+        items = pages = 0
+        capacity = 0.0
+        for attempt in range(MAX_ATTEMPTS):
+            response = client.batch_get_item(RequestItems=request, ReturnConsumedCapacity='TOTAL')
+            items += len(response['Responses'].get(table_name, []))
+            pages += 1
+            capacity += _capacity(response)
+            request = response.get('UnprocessedKeys')
+            if not request:
+                return [key['pk'] for key in keys], items, pages, capacity
+            time.sleep(jittered_backoff(attempt))
+        raise RuntimeError(f"{len(request[table_name]['Keys'])} keys still unprocessed after {MAX_ATTEMPTS} attempts")
+
+    operations = {
+        'get_user': get_user,
+        'user_by_email': user_by_email,
+        'characters': prefix_query(lambda user: 'CHARACTER#'),
+        'notification_channels': prefix_query(lambda user: 'NOTIFICATION_CHANNEL#'),
+        'goal_progress': prefix_query(lambda user: user['progressPrefixes'][0]),
+        'batch_get_users': batch_get_users,
+    }
+    if pattern not in operations:
+        raise ValueError(f"Unknown pattern: {pattern} (expected one of {', '.join(PATTERNS)})")
+    return operations[pattern]
+
+
+def partition_skew(partition_capacity: Counter, elapsed: float) -> Dict[str, Any]:
+    """How concentrated consumed capacity is on the busiest partition."""
+    if not partition_capacity:
+        return {'partitions': 0}
+    total = sum(partition_capacity.values())
+    hottest, hottest_units = partition_capacity.most_common(1)[0]
+    mean = total / len(partition_capacity)
+    peak_rcu = hottest_units / elapsed if elapsed else 0.0
+    return {
+        'partitions': len(partition_capacity),
+        'hottestShare': round(hottest_units / total, 4) if total else 0.0,
+        'hottestToMean': round(hottest_units / mean, 2) if mean else 0.0,
+        'hottestRcuPerSecond': round(peak_rcu, 1),
+        'overPartitionLimit': peak_rcu > PARTITION_RCU_LIMIT
+    }
+
+
+def run_pattern(pattern: str, table_name: str, users: List[Dict[str, Any]], operations: int, concurrency: int,
+                skew: float, seed: int) -> Dict[str, Any]:
+    """Time `operations` executions of one access pattern against Zipf- or uniformly-chosen users."""
+    operation = pattern_operations(pattern, table_name)
+    per_operation = BATCH_GET_LIMIT if pattern == 'batch_get_users' else 1
+    draws = zipf_choices(users, operations * per_operation, skew, seed)
+    targets = [draws[i:i + per_operation] for i in range(0, len(draws), per_operation)]
+
+    latency = LatencyHistogram()
+    partition_capacity: Counter = Counter()
+    totals = {'items': 0, 'pages': 0, 'capacity': 0.0}
+    lock = threading.Lock()
+
+    def execute(batch):
+        start = time.perf_counter()
+        partitions, items, pages, capacity = operation(batch)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            latency.record(elapsed_ms)
+            totals['items'] += items
+            totals['pages'] += pages
+            totals['capacity'] += capacity
+            for partition in partitions:
+                partition_capacity[partition] += capacity / len(partitions)
+
+    start = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(execute, targets))
+    elapsed = time.monotonic() - start
+    report = {
+        'operations': latency.count,
+        'throughput': round(latency.count / elapsed, 2) if elapsed else 0.0,
+        'latencyMs': latency.summary(),
+        'itemsPerOperation': round(totals['items'] / latency.count, 2) if latency.count else 0.0,
+        'pagesPerOperation': round(totals['pages'] / latency.count, 2) if latency.count else 0.0,
+        'consumedRcu': round(totals['capacity'], 1),
+        'rcuPerOperation': round(totals['capacity'] / latency.count, 2) if latency.count else 0.0,
+        'skew': partition_skew(partition_capacity, elapsed)
+    }
+    log(f"{pattern}: {report['throughput']} ops/s, p99 {report['latencyMs'].get('p99')} ms, "
+        f"{report['rcuPerOperation']} RCU/op")
+    return report
+
+
+def run_table_benchmark(table_name: str = None, patterns: List[str] = None, users: int = 200, characters: int = 2,
+                        channels: int = 2, goals_per_character: int = 2, progress_per_goal: int = 30,
+                        operations: int = 1000, concurrency: int = 10, skew: float = 0.0, seed: int = 42,
+                        retain_data: bool = False) -> Dict[str, Any]:
+    """Seed synthetic users, time each access pattern, then delete the users (unless `retain_data`)."""
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if not table_name:
+        raise ValueError("DynamoDB table name must be provided either as an argument or DYNAMODB_TABLE environment variable")
+    patterns = patterns or list(PATTERNS)
+    for pattern in patterns:
+        pattern_operations(pattern, table_name)
+    if goals_per_character * characters == 0 and 'goal_progress' in patterns:
+        raise ValueError("goal_progress needs at least one character and one goal per character")
+
+    run_id = new_run_id()
+    lambda_tester.get_backend().configure(max_pool_connections=max(concurrency, 16))
+    log(f"Table benchmark run {run_id} on {table_name}: seeding {users} users")
+    seeded = []
+    try:
+        _, seeding = populate(table_name, users, characters, channels, goals_per_character, progress_per_goal,
+                              seeded=seeded)
+        results = {pattern: run_pattern(pattern, table_name, seeded, operations, concurrency, skew, seed)
+                   for pattern in patterns}
+    finally:
+        release_users(run_id, table_name, [user['userId'] for user in seeded], retain_data)
+    return {
+        'runId': run_id,
+        'tableName': table_name,
+        'seeding': seeding,
+        'operationsPerPattern': operations,
+        'concurrency': concurrency,
+        'skew': skew,
+        'patterns': results
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    from backends import use_backend
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Benchmark the GoalTracker table access patterns')
+    parser.add_argument('--table-name', help='DynamoDB table name (defaults to DYNAMODB_TABLE)')
+    parser.add_argument('--backend', choices=['aws', 'local'],
+                        help='Run against AWS or the offline in-process stand-ins (defaults to LAMBDA_TESTER_BACKEND, else aws)')
+    parser.add_argument('--patterns', default=','.join(PATTERNS),
+                        help=f"Comma-separated access patterns (default: {','.join(PATTERNS)})")
+    scale = parser.add_argument_group('data scale')
+    scale.add_argument('--users', type=int, default=200, help='Synthetic users to seed (default: 200)')
+    scale.add_argument('--characters', type=int, default=2, help='Characters per user (default: 2)')
+    scale.add_argument('--channels', type=int, default=2, help='Notification channels per user (default: 2)')
+    scale.add_argument('--goals-per-character', type=int, default=2, help='Goals per character (default: 2)')
+    scale.add_argument('--progress-per-goal', type=int, default=30, help='Daily progress items per goal (default: 30)')
+    parser.add_argument('--operations', type=int, default=1000, help='Operations per pattern (default: 1000)')
+    parser.add_argument('--concurrency', type=int, default=10, help='Operations in flight (default: 10)')
+    parser.add_argument('--skew', type=float, default=0.0,
+                        help='Zipf exponent for choosing target users; 0 is uniform (default: 0)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for choosing target users (default: 42)')
+    parser.add_argument('--retain-data', action='store_true',
+                        help='Keep the seeded users (recorded for bulk_cleanup.py --run-id)')
+    args = parser.parse_args()
+
+    load_env()
+    if args.backend:
+        use_backend(args.backend)
+    report = run_table_benchmark(
+        table_name=args.table_name,
+        patterns=args.patterns.split(','),
+        users=args.users,
+        characters=args.characters,
+        channels=args.channels,
+        goals_per_character=args.goals_per_character,
+        progress_per_goal=args.progress_per_goal,
+        operations=args.operations,
+        concurrency=args.concurrency,
+        skew=args.skew,
+        seed=args.seed,
+        retain_data=args.retain_data
+    )
+    print(json.dumps(report, indent=2))
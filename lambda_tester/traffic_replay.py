@@ -0,0 +1,248 @@
+"""Record invocation payloads and replay them later, against any stage.
+
+A traffic file is JSON Lines, one invocation per line, optionally gzip
+(`.gz`) or zstd (`.zst`, needs the `zstandard` package) compressed:
+
+    {"t":0.003,"function":"CreateUser","invoke":"api","event":{"body":"{\\"email\\":\\"...\\"}"},"userId":"..."}
+    {"t":0.412,"function":"GetUser","invoke":"api","event":{"pathParameters":{"userId":"..."}}}
+
+`t` is when the invocation started, in seconds since recording began. API
+events are stored before API Gateway wrapping (path parameters, body, ...),
+direct events as sent, and CreateUser records also carry the userId that
+was created. Record with `lambda_tester.py --record traffic.jsonl.gz`, then:
+
+    python3 traffic_replay.py --file traffic.jsonl.gz --table-name GoalTracker-prod --stage prod --speed 2
+
+Replay starts each invocation at its recorded offset divided by `--speed`
+(`--speed 0` sends as fast as `--concurrency` allows), on a worker pool, and
+reports per-function latency and how far behind schedule invocations started.
+Recorded userIds are rewritten to the users the replay's own CreateUser calls
+create, so a recorded chain replays coherently on another stage; other IDs
+are replayed as-is.
+"""
+import gzip
+import heapq
+import json
+import os
+import re
+import threading
+import time
+import concurrent.futures
+from typing import Iterator, List, Dict, Any
+
+import lambda_tester
+from bulk_cleanup import cleanup_users
+from lambda_tester import log, invoke_lambda, invoke_lambda_direct, extract_user_id
+from metrics import LatencyHistogram
+from result_sink import ResultSink
+
+# Records are written at completion; none starts more than this long before a later-written one
+REORDER_WINDOW_SECONDS = 60
+UUID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+def open_traffic(path: str, mode: str):
+    """Open a traffic file for text reading ('r') or writing ('w'), compressed according to its extension."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't')
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("Reading or writing .zst traffic files needs the zstandard package (pip install zstandard)")
+        return zstandard.open(path, mode + 't')
+    return open(path, mode)
+
+
+class TrafficRecorder:
+    """Thread-safe appender of invocation payloads, installed as `lambda_tester.RECORDER`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = open_traffic(path, 'w')
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def record(self, function_name: str, invoke: str, event: Dict[str, Any], started: float,
+               result: Dict[str, Any]):
+        """Write one invocation, stamped with when it started (a time.monotonic() value)."""
+        record = {'t': round(started - self._start, 6), 'function': function_name, 'invoke': invoke, 'event': event}
+        user_id = extract_user_id([result])
+        if user_id:
+            record['userId'] = user_id
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        log(f"Recorded {self.count} invocations to {self.path}")
+
+
+def read_traffic(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield a traffic file's records in start order.
+
+    Records are written when invocations finish, so they are only ordered to
+    within the longest invocation; a heap over a sliding window restores
+    start order without reading the whole file into memory.
+    """
+    heap = []
+    with open_traffic(path, 'r') as f:
+        for sequence, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            heapq.heappush(heap, (record['t'], sequence, record))
+            while heap[0][0] <= record['t'] - REORDER_WINDOW_SECONDS:
+                yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+class UserIdMap:
+    """Maps recorded userIds to the ones the replayed CreateUser calls return.
+
+    Replayed invocations that reference a recorded user wait (up to
+    `timeout`) until that user's CreateUser has been replayed, so the
+    original causal order holds even when the target stage is slower.
+    """
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._created: Dict[str, threading.Event] = {}
+        self._mapping: Dict[str, str] = {}
+
+    def expect(self, recorded_user_id: str):
+        with self._lock:
+            self._created.setdefault(recorded_user_id, threading.Event())
+
+    def created(self, recorded_user_id: str, user_id: str = None):
+        with self._lock:
+            if user_id:
+                self._mapping[recorded_user_id] = user_id
+            self._created[recorded_user_id].set()
+
+    def rewrite(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        text = json.dumps(event)
+        recorded_ids = set(UUID.findall(text))
+        with self._lock:
+            waits = [self._created[user_id] for user_id in recorded_ids if user_id in self._created]
+        for created in waits:
+            created.wait(self.timeout)
+        with self._lock:
+            if not any(user_id in self._mapping for user_id in recorded_ids):
+                return event
+            return json.loads(UUID.sub(lambda m: self._mapping.get(m.group(0), m.group(0)), text))
+
+
+def replay_traffic(path: str, stage: str = None, table_name: str = None, speed: float = 1.0,
+                   concurrency: int = 50, retain_data: bool = False, results_file: str = None) -> Dict[str, Any]:
+    """Replay a traffic file open-loop against `stage` and return per-function metrics and schedule lag."""
+    if stage is None:
+        stage = os.environ.get('STAGE', 'dev')
+    if table_name is None:
+        table_name = os.environ.get('DYNAMODB_TABLE')
+    if not table_name and not retain_data:
+        raise ValueError("DynamoDB table name must be provided to clean up replayed users (or set retain_data)")
+    if speed < 0:
+        raise ValueError("speed must be zero (no delays) or positive")
+
+    lambda_tester.get_backend().configure(max_pool_connections=concurrency)
+    lambda_tester.get_backend().use_table(table_name)
+    lag = LatencyHistogram()
+    lock = threading.Lock()
+    user_ids: List[str] = []
+    users = UserIdMap()
+
+    def replay_one(record: Dict[str, Any], scheduled: float):
+        with lock:
+            lag.record(max(0.0, time.monotonic() - scheduled) * 1000)
+        event = users.rewrite(record['event'])
+        if record['invoke'] == 'direct':
+            result = invoke_lambda_direct(record['function'], event, stage)
+        else:
+            result = invoke_lambda(record['function'], event, stage)
+        sink.write(result)
+        user_id = extract_user_id([result])
+        if 'userId' in record:
+            users.created(record['userId'], user_id)
+        if user_id:
+            with lock:
+                user_ids.append(user_id)
+
+    log(f"Replaying {path} against stage: {stage} at {'max' if speed == 0 else f'{speed}x'} speed")
+    verbose = lambda_tester.VERBOSE
+    lambda_tester.VERBOSE = False
+    sink = ResultSink(results_file)
+    start = time.monotonic()
+    first = None
+    try:
+        # Bounding queued submissions keeps memory flat for long recordings
+        slots = threading.Semaphore(concurrency * 4)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for record in read_traffic(path):
+                if first is None:
+                    first = record['t']
+                if 'userId' in record:
+                    users.expect(record['userId'])
+                scheduled = start + ((record['t'] - first) / speed if speed else 0.0)
+                delay = scheduled - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                slots.acquire()
+                future = executor.submit(replay_one, record, scheduled)
+                future.add_done_callback(lambda _: slots.release())
+    finally:
+        elapsed = time.monotonic() - start
+        lambda_tester.VERBOSE = verbose
+        sink.close()
+        if user_ids and not retain_data:
+            cleanup_users(table_name, user_ids)
+
+    log(f"Replay completed. Invocations: {sink.total}, Failed: {sink.failure_count}, Elapsed: {elapsed:.1f}s")
+    return {
+        'file': path,
+        'stage': stage,
+        'speed': speed,
+        'invocations': sink.total,
+        'durationSeconds': round(elapsed, 3),
+        'throughput': round(sink.total / elapsed, 2) if elapsed else 0.0,
+        'scheduleLagMs': lag.summary(),
+        'functions': sink.metrics.report(elapsed),
+        'failures': {'total': sink.failure_count, 'sample': sink.failed_summary()}
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    from lambda_tester import load_env
+
+    parser = argparse.ArgumentParser(description='Replay recorded Lambda traffic against a stage')
+    parser.add_argument('--file', required=True, help='Traffic file recorded with lambda_tester.py --record')
+    parser.add_argument('--table-name', help='DynamoDB table name, for cleaning up users the replay creates')
+    parser.add_argument('--stage', help='Deployment stage (defaults to STAGE environment variable)')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Replay speed multiplier; 0 sends as fast as concurrency allows (default: 1)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Maximum invocations in flight (default: 50)')
+    parser.add_argument('--retain-data', action='store_true', help='Keep users created by the replay')
+    parser.add_argument('--results-file', help="Stream every result to this file as JSON lines ('-' for stdout)")
+    args = parser.parse_args()
+
+    load_env()
+    if args.results_file == '-':
+        # Keep stdout to the JSON lines: logs and the final report go to stderr
+        lambda_tester.LOG_FILE = sys.stderr
+    print(json.dumps(replay_traffic(
+        args.file,
+        stage=args.stage,
+        table_name=args.table_name,
+        speed=args.speed,
+        concurrency=args.concurrency,
+        retain_data=args.retain_data,
+        results_file=args.results_file
+    ), indent=2), file=sys.stderr if args.results_file == '-' else sys.stdout)